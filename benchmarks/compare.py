@@ -0,0 +1,46 @@
+"""Сравнение двух результатов бенчмарков
+
+    $ python3 benchmarks/compare.py before.json after.json [--threshold 10]
+
+Завершается с кодом 1, если какая-либо операция замедлилась или стала выделять больше памяти
+более чем на threshold процентов.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return {result['name']: result for result in json.load(file)['results']}
+
+
+def compare(before: dict, after: dict, threshold: float) -> bool:
+    regression = False
+    print(f'{"name":<24}{"ops/s before":>14}{"ops/s after":>14}{"change":>9}{"B/op before":>13}{"B/op after":>12}')
+    for name, old in before.items():
+        new = after.get(name)
+        if new is None:
+            continue
+
+        change = (new['ops_per_sec'] - old['ops_per_sec']) / old['ops_per_sec'] * 100
+        slower = change < -threshold
+        heavier = new['bytes_per_op'] > old['bytes_per_op'] * (1 + threshold / 100) + 1
+        marker = ' !' if slower or heavier else ''
+        regression = regression or slower or heavier
+        print(f'{name:<24}{old["ops_per_sec"]:>14.0f}{new["ops_per_sec"]:>14.0f}{change:>8.1f}%'
+              f'{old["bytes_per_op"]:>13.1f}{new["bytes_per_op"]:>12.1f}{marker}')
+    return regression
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='допустимое ухудшение, %%')
+    args = parser.parse_args()
+    sys.exit(1 if compare(load(args.before), load(args.after), args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Бенчмарк задержек контроллера на виртуальной плате
+
+    $ python3 benchmarks/controller_latency.py > latency.json
+
+Измеряет в виртуальном времени задержку от появления сигнала вызова на оптопаре до публикации 'ON',
+от поступления команды OPEN_DOOR до срабатывания оптопары открытия двери и до её отпускания,
+для блокирующего цикла, блокирующего цикла со сном между событиями (idle, IDLE_MODE = 'poll')
+и асинхронного цикла и для каждого профиля длительностей из PROFILES (имена результатов профиля
+'safe' без имени профиля). Результат - JSON документ.
+"""
+import json
+import sys
+
+ROOT = (__file__.rsplit('/', 1)[0] if '/' in __file__ else '.') + '/..'
+sys.path.insert(0, ROOT + '/src')
+sys.path.insert(0, ROOT)
+
+import simulation  # noqa: E402
+
+SOUND_MODE_RELAY_PIN = 14
+HANDSET_RELAY_PIN = 12
+INCOMING_CALL_OPTOCOUPLER_PIN = 16
+DOOR_OPENING_OPTOCOUPLER_PIN = 13
+
+CALL_TOPIC = 'call/state'
+CONTROL_TOPIC = 'control'
+
+CALL_START_MS = 5000
+COMMAND_MS = 7000
+SIMULATION_MS = 20000
+PROFILES = ('safe', 'fast')
+RUNTIMES = ('blocking', 'idle', 'async')
+
+
+def create_controller(board, **kwargs):
+    from umqtt.simple import MQTTClient
+
+    from cyfral_controller.controller import CyfralController
+    from cyfral_controller.electronic_components.clock import DS1307, CachedClock
+    import machine
+
+    return CyfralController(
+        sound_mode_relay_pin=SOUND_MODE_RELAY_PIN,
+        handset_relay_pin=HANDSET_RELAY_PIN,
+        incoming_call_optocoupler_pin=INCOMING_CALL_OPTOCOUPLER_PIN,
+        door_opening_optocoupler_pin=DOOR_OPENING_OPTOCOUPLER_PIN,
+        mqtt_client=MQTTClient(client_id='cyfral', server='localhost', keepalive=60),
+        mqtt_incoming_call_state_topic=CALL_TOPIC,
+        mqtt_sound_mode_state_topic='sound_mode/state',
+        mqtt_auto_open_mode_topic='auto_open/state',
+        mqtt_control_topic=CONTROL_TOPIC,
+        real_time_clock=CachedClock(DS1307(machine.I2C(scl=machine.Pin(5), sda=machine.Pin(4)))),
+        **kwargs
+    )
+
+
+def run_scenario(runtime: str, profile: str = 'safe') -> list:
+    board = simulation.install()
+    controller = create_controller(board, timing_profile=profile, idle_mode='poll' if runtime == 'idle' else None)
+
+    board.pin(INCOMING_CALL_OPTOCOUPLER_PIN).drive_waveform(
+        simulation.ring_waveform(CALL_START_MS, 10000)
+    )
+    board.broker.inject_at(COMMAND_MS, CONTROL_TOPIC, 'OPEN_DOOR')
+
+    if runtime == 'async':
+        from simulation import aio
+
+        board.run_until(lambda: aio.run(controller.run_async()), SIMULATION_MS)
+    else:
+        board.run_until(controller.run, SIMULATION_MS)
+
+    call_published = board.broker.first_message(CALL_TOPIC, 'ON', after_us=CALL_START_MS * 1000)
+    door_pin = board.pin(DOOR_OPENING_OPTOCOUPLER_PIN)
+    door_pulse_us = door_pin.first_change(1, after_us=COMMAND_MS * 1000)
+    door_release_us = None if door_pulse_us is None else door_pin.first_change(0, after_us=door_pulse_us)
+    prefix = runtime if profile == 'safe' else f'{runtime}_{profile}'
+    return [
+        {
+            'name': f'{prefix}_call_to_publish',
+            'latency_us': None if call_published is None else call_published.time_us - CALL_START_MS * 1000,
+        },
+        {
+            'name': f'{prefix}_command_to_door_relay',
+            'latency_us': None if door_pulse_us is None else door_pulse_us - COMMAND_MS * 1000,
+        },
+        {
+            'name': f'{prefix}_command_to_door_release',
+            'latency_us': None if door_release_us is None else door_release_us - COMMAND_MS * 1000,
+        },
+    ]
+
+
+def main():
+    results = []
+    for profile in PROFILES:
+        for runtime in RUNTIMES:
+            results.extend(run_scenario(runtime, profile))
+    print(json.dumps({'implementation': sys.implementation.name, 'results': results}))
+
+
+if __name__ == '__main__':
+    main()
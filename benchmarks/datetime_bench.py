@@ -0,0 +1,142 @@
+"""Бенчмарки пакета datetime
+
+Запускается как в CPython, так и в unix-порте MicroPython:
+
+    $ python3 benchmarks/datetime_bench.py > cpython.json
+    $ micropython benchmarks/datetime_bench.py > micropython.json
+
+Результат - JSON документ с числом операций в секунду и объёмом выделенной памяти на операцию.
+В MicroPython память считается по gc.mem_alloc() при отключённом сборщике мусора (учитываются
+все выделения), в CPython - по tracemalloc (учитываются только объекты, пережившие операцию).
+Сравнение двух результатов: benchmarks/compare.py
+"""
+import gc
+import sys
+import time
+
+sys.path.insert(0, (__file__.rsplit('/', 1)[0] if '/' in __file__ else '.') + '/../src')
+
+from datetime import Date, Datetime, Time, Timedelta  # noqa: E402
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+MICROPYTHON = sys.implementation.name == 'micropython'
+
+if MICROPYTHON:
+    def _timer_us():
+        return time.ticks_us()
+
+    def _elapsed_us(start):
+        return time.ticks_diff(time.ticks_us(), start)
+else:
+    import tracemalloc
+
+    def _timer_us():
+        return time.perf_counter_ns() // 1000
+
+    def _elapsed_us(start):
+        return time.perf_counter_ns() // 1000 - start
+
+TIME_A = Time(12, 30, 15, 500)
+TIME_B = Time(12, 30, 15, 501)
+DATE_A = Date(2024, 2, 29)
+DATE_B = Date(2024, 3, 1)
+DATETIME_A = Datetime(2024, 2, 29, 23, 59, 59, 999999)
+DATETIME_B = Datetime(2024, 3, 1, 0, 0, 0, 0)
+TIMEDELTA = Timedelta(days=1, seconds=3600, microseconds=1)
+ORDINAL = DATE_A.toordinal()
+ISOFORMAT_BUFFER = bytearray(Datetime.ISOFORMAT_SIZE)
+DATETIME_ISOFORMAT = DATETIME_A.isoformat().encode()
+
+CASES = (
+    ('noop', lambda: None),
+    ('timedelta_new', lambda: Timedelta(days=1, hours=2, minutes=3, seconds=4, microseconds=5)),
+    ('time_new', lambda: Time(12, 30, 15, 500)),
+    ('date_new', lambda: Date(2024, 2, 29)),
+    ('datetime_new', lambda: Datetime(2024, 2, 29, 23, 59, 59, 999999)),
+    ('time_compare', lambda: TIME_A < TIME_B),
+    ('date_compare', lambda: DATE_A < DATE_B),
+    ('datetime_compare', lambda: DATETIME_A < DATETIME_B),
+    ('datetime_eq', lambda: DATETIME_A == DATETIME_B),
+    ('date_add', lambda: DATE_A + TIMEDELTA),
+    ('date_sub', lambda: DATE_B - DATE_A),
+    ('datetime_add', lambda: DATETIME_A + TIMEDELTA),
+    ('datetime_sub_timedelta', lambda: DATETIME_A - TIMEDELTA),
+    ('datetime_sub_datetime', lambda: DATETIME_B - DATETIME_A),
+    ('toordinal', lambda: DATE_A.toordinal()),
+    ('fromordinal', lambda: Date.fromordinal(ORDINAL)),
+    ('fromordinal_fields', lambda: Date.fromordinal(ORDINAL).day),
+    ('time_isoformat', lambda: TIME_A.isoformat()),
+    ('date_isoformat', lambda: DATE_A.isoformat()),
+    ('datetime_isoformat', lambda: DATETIME_A.isoformat()),
+    ('time_isoformat_into', lambda: TIME_A.isoformat_into(ISOFORMAT_BUFFER)),
+    ('date_isoformat_into', lambda: DATE_A.isoformat_into(ISOFORMAT_BUFFER)),
+    ('datetime_isoformat_into', lambda: DATETIME_A.isoformat_into(ISOFORMAT_BUFFER)),
+    ('date_fromisoformat', lambda: Date.fromisoformat(b'2024-02-29')),
+    ('time_fromisoformat', lambda: Time.fromisoformat(b'23:59:59.999999')),
+    ('datetime_fromisoformat', lambda: Datetime.fromisoformat(DATETIME_ISOFORMAT)),
+)
+
+
+def _measure_speed(func, iterations: int) -> float:
+    """Число операций в секунду"""
+    gc.collect()
+    start = _timer_us()
+    for _ in range(iterations):
+        func()
+    elapsed = _elapsed_us(start) or 1
+    return iterations * 1000000 / elapsed
+
+
+def _measure_allocation(func, iterations: int) -> float:
+    """Объём выделенной памяти в байтах на одну операцию"""
+    gc.collect()
+    if MICROPYTHON:
+        gc.disable()
+        before = gc.mem_alloc()
+        for _ in range(iterations):
+            func()
+        allocated = gc.mem_alloc() - before
+        gc.enable()
+        return allocated / iterations
+
+    results = [None] * iterations
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(iterations):
+        results[i] = func()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / iterations
+
+
+def run(iterations: int, allocation_iterations: int) -> dict:
+    results = []
+    for name, func in CASES:
+        results.append({
+            'name': name,
+            'ops_per_sec': round(_measure_speed(func, iterations), 1),
+            'bytes_per_op': round(_measure_allocation(func, allocation_iterations), 1),
+        })
+
+    return {
+        'implementation': sys.implementation.name,
+        'version': '.'.join(str(part) for part in sys.implementation.version[:3]),
+        'platform': sys.platform,
+        'iterations': iterations,
+        'results': results,
+    }
+
+
+def main():
+    iterations = 2000 if MICROPYTHON else 20000
+    if len(sys.argv) > 1:
+        iterations = int(sys.argv[1])
+    print(json.dumps(run(iterations, min(iterations, 500))))
+
+
+if __name__ == '__main__':
+    main()
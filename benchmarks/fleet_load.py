@@ -0,0 +1,214 @@
+"""Нагрузочный бенчмарк моста fleet
+
+    $ python3 benchmarks/fleet_load.py > fleet.json
+    $ python3 benchmarks/fleet_load.py --devices 100,1000,5000 --rate 2 --duration 10
+
+Дочерний процесс запускает локальный брокер fleet.broker.LocalBroker и N имитаторов контроллеров,
+каждый со своим соединением: имитатор публикует retained состояния, переключает call/state
+с частотой rate сообщений в секунду и отвечает на MUTE_SOUND/UNMUTE_SOUND публикацией
+sound_mode/state, как контроллер. Мост работает в основном процессе. Для каждого N измеряются:
+- offered_per_s / processed_per_s - поток сообщений устройств и поток, обработанный мостом;
+- bridge_cpu_us_per_message и bridge_capacity_per_s - процессорное время моста на сообщение
+  и оценка предельного потока одного ядра (не зависит от того, успевает ли имитатор);
+- fan_out_ms - от рассылки MUTE_SOUND всем устройствам до получения мостом всех подтверждений
+  sound_mode/state OFF (и то же для UNMUTE_SOUND);
+- query_ms - время HTTP запроса GET /devices?call=ON через QueryApi.
+
+scaling_limit - первое N, на котором мост обработал меньше 95% потока, подтверждения рассылки
+пришли позже FAN_OUT_LIMIT_MS или загрузка ядра моста превысила 90%. Результат - JSON документ.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import random
+import resource
+import statistics
+import sys
+import time
+
+ROOT = (__file__.rsplit('/', 1)[0] if '/' in __file__ else '.') + '/..'
+sys.path.insert(0, ROOT)
+
+from fleet import FleetBridge, LocalBroker, MQTTClient, QueryApi  # noqa: E402
+
+DEVICES = (100, 250, 500, 1000, 2000)
+RATE = 1.0
+DURATION_S = 5.0
+FAN_OUT_LIMIT_MS = 1000
+SETTLE_TIMEOUT_S = 60
+QUERIES = 20
+
+
+def _raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+class SimulatedDevice:
+    """Имитатор контроллера в топиках dev<номер>/"""
+
+    def __init__(self, index: int, port: int, rate: float):
+        self.prefix = f'dev{index:05}/'
+        self.rate = rate
+        self.client = MQTTClient(self.prefix.rstrip('/'), '127.0.0.1', port, keepalive=0)
+        self.client.callback = self._on_command
+        self.call = 'OFF'
+
+    async def run(self):
+        await self.client.connect()
+        await self.client.subscribe(self.prefix + 'control')
+        self._publish('call/state', self.call)
+        self._publish('sound_mode/state', 'ON')
+        self._publish('auto_open/state', 'OFF')
+        await self.client.flush()
+        if not self.rate:
+            return
+        await asyncio.sleep(random.random() / self.rate)
+        while True:
+            self.call = 'OFF' if self.call == 'ON' else 'ON'
+            self._publish('call/state', self.call)
+            await asyncio.sleep(1 / self.rate)
+
+    def _publish(self, suffix: str, state: str):
+        self.client.publish(self.prefix + suffix, state, retain=True)
+
+    def _on_command(self, topic: bytes, payload: bytes):
+        if payload == b'MUTE_SOUND':
+            self._publish('sound_mode/state', 'OFF')
+        elif payload == b'UNMUTE_SOUND':
+            self._publish('sound_mode/state', 'ON')
+
+
+def simulate_devices(devices: int, rate: float, ports: multiprocessing.Queue):
+    """Процесс брокера и имитаторов контроллеров"""
+    _raise_file_limit()
+
+    async def main():
+        broker = LocalBroker()
+        port = await broker.start()
+        simulators = [SimulatedDevice(index, port, rate) for index in range(devices)]
+        tasks = [asyncio.create_task(simulator.run()) for simulator in simulators]
+        ports.put(port)
+        await asyncio.gather(*tasks)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+async def _http_get(port: int, target: str) -> bytes:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+async def _wait_for(condition, timeout_s: float = SETTLE_TIMEOUT_S) -> float:
+    """Ожидает выполнения условия, возвращает время ожидания в мс"""
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout_s:
+            raise TimeoutError('condition not reached')
+        await asyncio.sleep(0.001)
+    return (time.perf_counter() - start) * 1000
+
+
+async def measure_bridge(port: int, devices: int, rate: float, duration_s: float) -> dict:
+    bridge = FleetBridge(MQTTClient('fleet-load', '127.0.0.1', port, keepalive=0))
+    runner = asyncio.create_task(bridge.run())
+    api = QueryApi(bridge, port=0)
+    api_port = await api.start()
+    result = {'devices': devices}
+    try:
+        result['settle_ms'] = round(await _wait_for(lambda: len(bridge.query(sound_mode='ON')) == devices))
+
+        messages = bridge.messages
+        cpu = time.process_time()
+        start = time.perf_counter()
+        await asyncio.sleep(duration_s)
+        elapsed = time.perf_counter() - start
+        processed = bridge.messages - messages
+        cpu_s = time.process_time() - cpu
+        result['offered_per_s'] = round(devices * rate)
+        result['processed_per_s'] = round(processed / elapsed)
+        result['bridge_cpu_us_per_message'] = round(cpu_s * 1000000 / max(processed, 1), 1)
+        result['bridge_load'] = round(cpu_s / elapsed, 2)
+        result['bridge_capacity_per_s'] = round(processed / cpu_s) if cpu_s else None
+
+        fan_out = {}
+        for command, state in (('MUTE_SOUND', 'OFF'), ('UNMUTE_SOUND', 'ON')):
+            start = time.perf_counter()
+            bridge.broadcast(command)
+            await bridge.flush()
+            await _wait_for(lambda: len(bridge.query(sound_mode=state)) == devices)
+            fan_out[command] = round((time.perf_counter() - start) * 1000, 1)
+        result['fan_out_ms'] = fan_out
+
+        timings = []
+        for _ in range(QUERIES):
+            start = time.perf_counter()
+            await _http_get(api_port, '/devices?call=ON')
+            timings.append((time.perf_counter() - start) * 1000)
+        result['query_ms'] = round(statistics.median(timings), 2)
+    finally:
+        await api.stop()
+        runner.cancel()
+        await bridge.close()
+    return result
+
+
+def run_scenario(devices: int, rate: float, duration_s: float) -> dict:
+    ports = multiprocessing.Queue()
+    simulator = multiprocessing.Process(target=simulate_devices, args=(devices, rate, ports), daemon=True)
+    simulator.start()
+    try:
+        port = ports.get(timeout=SETTLE_TIMEOUT_S)
+        # сообщения моста о подключении не смешиваются с JSON документом результата
+        with contextlib.redirect_stdout(sys.stderr):
+            return asyncio.run(measure_bridge(port, devices, rate, duration_s))
+    finally:
+        simulator.terminate()
+        simulator.join()
+
+
+def scaling_limit(result: dict):
+    overloaded = (
+        result['processed_per_s'] < result['offered_per_s'] * 0.95
+        or max(result['fan_out_ms'].values()) > FAN_OUT_LIMIT_MS
+        or result['bridge_load'] > 0.9
+    )
+    return result['devices'] if overloaded else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--devices', default=','.join(str(devices) for devices in DEVICES))
+    parser.add_argument('--rate', type=float, default=RATE, help='сообщений call/state в секунду на устройство')
+    parser.add_argument('--duration', type=float, default=DURATION_S, help='длительность измерения потока, с')
+    arguments = parser.parse_args()
+
+    _raise_file_limit()
+    results = []
+    limit = None
+    for devices in (int(value) for value in arguments.devices.split(',')):
+        result = run_scenario(devices, arguments.rate, arguments.duration)
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+        limit = scaling_limit(result)
+        if limit:
+            break
+
+    print(json.dumps({
+        'implementation': sys.implementation.name,
+        'cpus': multiprocessing.cpu_count(),
+        'rate': arguments.rate,
+        'results': results,
+        'scaling_limit': limit,
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Проверка бюджета памяти контроллера на виртуальной плате
+
+    $ python3 benchmarks/heap_budget.py
+    $ micropython benchmarks/heap_budget.py
+
+Контроллер работает в блокирующем цикле симуляции в режиме ожидания вызова. Измеряются:
+steady_heap_bytes - память, занятая объектами контроллера после подключения к брокеру и публикации
+состояний (после сборки мусора, без учёта байт-кода импортированных модулей), loop_alloc_bytes -
+выделение памяти на одну итерацию основного цикла и unit_heap_bytes - прирост steady_heap_bytes
+на каждый блок домофона супервизора (разница между супервизорами с UNITS и с одним блоком).
+В MicroPython выделение считается по gc.mem_alloc() при отключённом сборщике мусора (учитываются
+все выделения), в CPython - по tracemalloc (учитываются только объекты, пережившие итерацию).
+
+Результат - JSON документ, код возврата 1, если любая величина превышает бюджет BUDGETS для текущей
+реализации Python. Бюджет откалиброван только для CPython: для unix-порта MicroPython он ещё
+не измерен (None), поэтому там скрипт только выводит измерения с "budget": null и не проверяет их.
+"""
+import gc
+import sys
+
+ROOT = (__file__.rsplit('/', 1)[0] if '/' in __file__ else '.') + '/..'
+sys.path.insert(0, ROOT + '/src')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, ROOT + '/benchmarks')
+
+import simulation  # noqa: E402
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+MICROPYTHON = sys.implementation.name == 'micropython'
+
+# Бюджеты в байтах. Бюджет unix-порта MicroPython (64-битные объекты, на ESP8266 они вдвое меньше)
+# ещё не измерен: его нужно откалибровать по выводу скрипта в этом порте
+BUDGETS = {
+    'micropython': None,
+    'cpython': {'steady_heap_bytes': 20480, 'loop_alloc_bytes': 8, 'unit_heap_bytes': 6144},
+}
+
+WARM_UP_MS = 2000
+MEASUREMENT_MS = 1000
+UNITS = 8
+
+if MICROPYTHON:
+    def _start_tracing():
+        pass
+
+    def _heap_used() -> int:
+        return gc.mem_alloc()
+
+    def _pause_collection():
+        gc.disable()
+
+    def _resume_collection():
+        gc.enable()
+else:
+    import tracemalloc
+
+    def _start_tracing():
+        tracemalloc.start()
+
+    def _heap_used() -> int:
+        return tracemalloc.get_traced_memory()[0]
+
+    def _pause_collection():
+        pass
+
+    def _resume_collection():
+        pass
+
+
+def measure() -> dict:
+    board = simulation.install()
+
+    # модули импортируются до начала измерений: на устройстве их байт-код заморожен во флеш-памяти;
+    # __import__ вместо importlib, которого нет в MicroPython
+    import controller_latency
+    __import__('cyfral_controller.controller')
+
+    _start_tracing()
+    gc.collect()
+    base = _heap_used()
+
+    controller = controller_latency.create_controller(
+        board,
+        mqtt_metrics_topic='metrics',
+        metrics_period_ms=24 * 3600 * 1000
+    )
+    metrics = controller._metrics
+    result = {}
+
+    def steady_state():
+        gc.collect()
+        result['steady_heap_bytes'] = _heap_used() - base
+        result['loops'] = metrics.loop_iterations
+        _pause_collection()
+        result['heap_before_loops'] = _heap_used()
+
+    def end_of_measurement():
+        allocated = _heap_used() - result.pop('heap_before_loops')
+        _resume_collection()
+        loops = metrics.loop_iterations - result['loops']
+        result['loops'] = loops
+        result['loop_alloc_bytes'] = allocated // max(loops, 1)
+
+    board.clock.call_at(WARM_UP_MS * 1000, steady_state)
+    board.clock.call_at((WARM_UP_MS + MEASUREMENT_MS) * 1000, end_of_measurement)
+    board.run_until(controller.run, WARM_UP_MS + MEASUREMENT_MS + 1)
+    return result
+
+
+def create_supervisor(board, units: int):
+    from umqtt.simple import MQTTClient
+
+    from cyfral_controller.controller import IntercomSupervisor
+    from cyfral_controller.electronic_components.clock import DS1307, CachedClock
+    from cyfral_controller.unit import IntercomUnit
+    import machine
+
+    return IntercomSupervisor(
+        [
+            IntercomUnit(
+                sound_mode_relay_pin=20 + index * 4,
+                handset_relay_pin=21 + index * 4,
+                incoming_call_optocoupler_pin=22 + index * 4,
+                door_opening_optocoupler_pin=23 + index * 4,
+                mqtt_incoming_call_state_topic=f'unit{index}/call/state',
+                mqtt_sound_mode_state_topic=f'unit{index}/sound_mode/state',
+                mqtt_auto_open_mode_topic=f'unit{index}/auto_open/state',
+                mqtt_control_topic=f'unit{index}/control'
+            )
+            for index in range(units)
+        ],
+        MQTTClient(client_id='cyfral', server='localhost', keepalive=60),
+        CachedClock(DS1307(machine.I2C(scl=machine.Pin(5), sda=machine.Pin(4))))
+    )
+
+
+def measure_supervisor(units: int) -> int:
+    """Память, занятая супервизором с units блоками после подключения к брокеру"""
+    board = simulation.install()
+
+    __import__('cyfral_controller.controller')
+
+    # выводы виртуальной платы создаются заранее: их состояние - часть симуляции, а не контроллера
+    for pin in range(20, 24 + units * 4):
+        board.pin(pin)
+
+    _start_tracing()
+    gc.collect()
+    base = _heap_used()
+    supervisor = create_supervisor(board, units)
+    result = {}
+
+    def steady_state():
+        gc.collect()
+        result['heap'] = _heap_used() - base
+
+    board.clock.call_at(WARM_UP_MS * 1000, steady_state)
+    board.run_until(supervisor.run, WARM_UP_MS + 1)
+    return result['heap']
+
+
+def main():
+    implementation = sys.implementation.name
+    result = measure()
+    result['unit_heap_bytes'] = (measure_supervisor(UNITS) - measure_supervisor(1)) // (UNITS - 1)
+    budget = BUDGETS.get(implementation)
+    exceeded = [name for name, limit in budget.items() if result[name] > limit] if budget else []
+    if budget is None:
+        print(f'Heap budget for {implementation} is not measured yet, check skipped', file=sys.stderr)
+
+    print(json.dumps({
+        'implementation': implementation,
+        'result': result,
+        'budget': budget,
+        'exceeded': exceeded,
+    }))
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""Мост для парка контроллеров домофона (CPython, asyncio)
+
+Один процесс подключается к MQTT брокеру, собирает в памяти состояния всех устройств
+(call/state, sound_mode/state, auto_open/state, sequence/state), рассылает команды в их
+топики control, в том числе по ежедневному расписанию, и отвечает на запросы по HTTP:
+
+    $ python3 -m fleet --server 192.168.1.10 --schedule "22:00 MUTE_SOUND" --schedule "07:00 UNMUTE_SOUND"
+"""
+from fleet.api import QueryApi
+from fleet.bridge import COMMANDS, DeviceState, FleetBridge, ScheduledCommand, validate_command
+from fleet.broker import LocalBroker
+from fleet.mqtt import MQTTClient, MQTTException
+
+__all__ = [
+    'COMMANDS',
+    'DeviceState',
+    'FleetBridge',
+    'LocalBroker',
+    'MQTTClient',
+    'MQTTException',
+    'QueryApi',
+    'ScheduledCommand',
+    'validate_command',
+]
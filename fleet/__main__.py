@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+
+from fleet import FleetBridge, MQTTClient, QueryApi
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(prog='python3 -m fleet', description='Мост для парка контроллеров домофона')
+    parser.add_argument('--server', default='localhost', help='адрес MQTT брокера')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--user')
+    parser.add_argument('--password')
+    parser.add_argument('--client-id', default='cyfral-fleet')
+    parser.add_argument('--root', default='', help='общий префикс топиков устройств, например "intercom/"')
+    parser.add_argument('--http-host', default='127.0.0.1')
+    parser.add_argument('--http-port', type=int, default=8080)
+    parser.add_argument('--schedule', action='append', default=[], metavar='"ЧЧ:ММ КОМАНДА"',
+                        help='ежедневная рассылка команды всем устройствам')
+    return parser.parse_args()
+
+
+async def main(arguments):
+    bridge = FleetBridge(
+        MQTTClient(arguments.client_id, arguments.server, arguments.port, arguments.user, arguments.password),
+        root=arguments.root
+    )
+    for entry in arguments.schedule:
+        at, _, command = entry.partition(' ')
+        bridge.schedule(at, command)
+    api = QueryApi(bridge, arguments.http_host, arguments.http_port)
+    print(f'Query API on http://{arguments.http_host}:{await api.start()}')
+    try:
+        await bridge.run()
+    finally:
+        await api.stop()
+        await bridge.close()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main(parse_arguments()))
+    except KeyboardInterrupt:
+        pass
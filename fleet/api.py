@@ -0,0 +1,130 @@
+"""HTTP API запросов к мосту (JSON)
+
+    GET  /summary                        - число устройств по состояниям и статистика моста
+    GET  /devices[?call=ON&prefix=dom1/] - устройства, отобранные FleetBridge.query()
+    GET  /devices/<устройство>           - состояние одного устройства
+    POST /commands                       - {"command": "MUTE_SOUND", "devices": [...]} или
+                                           {"command": "MUTE_SOUND", "filter": {"sound_mode": "ON"}}
+    GET  /schedule                       - ежедневные рассылки
+    POST /schedule                       - {"at": "22:00", "command": "MUTE_SOUND", "filter": {}}
+"""
+import asyncio
+import json
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from fleet.bridge import FleetBridge
+
+MAX_REQUEST_BODY = 65536
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryApi:
+    """HTTP сервер API запросов в цикле событий моста
+
+    Соединения обслуживаются по одному запросу (Connection: close), обработчики выполняются
+    синхронно над состоянием в памяти, поэтому запросы не конкурируют с приёмом сообщений
+    """
+
+    def __init__(self, bridge: FleetBridge, host: str = '127.0.0.1', port: int = 8080):
+        self._bridge = bridge
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def handle(self, method: str, target: str, body: bytes = b'') -> tuple:
+        """Обрабатывает запрос, возвращает (код ответа, документ)"""
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip('/')
+        query = dict(parse_qsl(url.query))
+        try:
+            if path == '/summary':
+                self._allow(method, 'GET')
+                return 200, self._bridge.summary()
+            if path == '/devices':
+                self._allow(method, 'GET')
+                return 200, [state.as_dict() for state in self._bridge.query(**query)]
+            if path.startswith('/devices/'):
+                self._allow(method, 'GET')
+                state = self._bridge.get(path[len('/devices/'):])
+                if state is None:
+                    raise HttpError(404, 'unknown device')
+                return 200, state.as_dict()
+            if path == '/commands':
+                self._allow(method, 'POST')
+                request = self._document(body)
+                sent = self._bridge.broadcast(request.get('command', ''), request.get('devices'),
+                                              **request.get('filter', {}))
+                return 200, {'sent': sent}
+            if path == '/schedule':
+                if method == 'POST':
+                    request = self._document(body)
+                    job = self._bridge.schedule(request.get('at', ''), request.get('command', ''),
+                                                **request.get('filter', {}))
+                    return 200, job.as_dict()
+                self._allow(method, 'GET')
+                return 200, [job.as_dict() for job in self._bridge.scheduled]
+        except HttpError as ex:
+            return ex.status, {'error': str(ex)}
+        except (ValueError, TypeError) as ex:
+            return 400, {'error': str(ex)}
+        except OSError as ex:
+            return 503, {'error': str(ex)}
+        return 404, {'error': 'not found'}
+
+    @staticmethod
+    def _allow(method: str, allowed: str):
+        if not method == allowed:
+            raise HttpError(405, f'{method} not allowed')
+
+    @staticmethod
+    def _document(body: bytes) -> dict:
+        document = json.loads(body or b'{}')
+        if not isinstance(document, dict):
+            raise ValueError('JSON object expected')
+        return document
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            if len(request_line) < 2 or length > MAX_REQUEST_BODY:
+                status, document = 400, {'error': 'bad request'}
+            else:
+                body = await reader.readexactly(length) if length else b''
+                status, document = self.handle(request_line[0], request_line[1], body)
+            payload = json.dumps(document).encode()
+            writer.write(
+                f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n'
+                f'Connection: close\r\n\r\n'.encode() + payload
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
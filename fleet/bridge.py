@@ -0,0 +1,282 @@
+"""Мост между MQTT брокером и парком контроллеров домофона"""
+import asyncio
+import datetime
+import re
+import time
+
+from fleet.mqtt import MQTTClient
+
+# суффиксы топиков устройства (см. настройки MQTT_*_TOPIC контроллера) и поля состояния
+STATE_TOPICS = {
+    'call/state': 'call',
+    'sound_mode/state': 'sound_mode',
+    'auto_open/state': 'auto_open',
+    'sequence/state': 'sequence',
+}
+CONTROL_TOPIC = 'control'
+
+_DURATION = r'( (?P<value>\d+)(?P<unit>ms|s|m|h)?)?'
+_TIME_RANGE = r' ([01]?\d|2[0-3]):[0-5]?\d-([01]?\d|2[0-3]):[0-5]?\d'
+_WORD = r' [^ ]+'
+# словарь команд управляющего топика контроллера (cyfral_controller.unit._build_command_router)
+COMMANDS = {
+    'OPEN_DOOR': _DURATION,
+    'REJECT_CALL': '',
+    'MUTE_SOUND': '',
+    'UNMUTE_SOUND': '',
+    'ENABLE_AUTO_OPEN': _DURATION,
+    'DISABLE_AUTO_OPEN': '',
+    'SET_MUTE_WINDOW': _TIME_RANGE,
+    'SET_TIMING_PROFILE': _WORD,
+}
+_COMMAND_PATTERNS = {name: re.compile(name + argument + ' *') for name, argument in COMMANDS.items()}
+# контроллер отклоняет длительности больше суток (cyfral_controller.commands.MAX_DURATION_MS)
+MAX_DURATION_MS = 24 * 3600 * 1000
+_DURATION_UNITS_MS = {None: 1, 'ms': 1, 's': 1000, 'm': 60000, 'h': 3600000}
+
+RECONNECT_MIN_DELAY_S = 1
+RECONNECT_MAX_DELAY_S = 60
+
+
+def validate_command(command: str) -> str:
+    """Проверяет команду по словарю контроллера, неверная команда вызывает ValueError"""
+    command = command.strip()
+    pattern = _COMMAND_PATTERNS.get(command.split(' ', 1)[0])
+    if pattern is None:
+        raise ValueError(f'unknown command {command!r}')
+    match = pattern.fullmatch(command)
+    if not match:
+        raise ValueError(f'invalid argument in {command!r}')
+    if 'value' in pattern.groupindex and match['value'] is not None:
+        if int(match['value']) * _DURATION_UNITS_MS[match['unit']] > MAX_DURATION_MS:
+            raise ValueError(f'duration exceeds 24 h in {command!r}')
+    return command
+
+
+class DeviceState:
+    """Последнее известное состояние устройства"""
+
+    __slots__ = 'device', 'call', 'sound_mode', 'auto_open', 'sequence', 'calls', 'updated'
+
+    def __init__(self, device: str):
+        self.device = device
+        self.call = None
+        self.sound_mode = None
+        self.auto_open = None
+        self.sequence = None
+        self.calls = 0
+        self.updated = None
+
+    def as_dict(self) -> dict:
+        return {
+            'device': self.device,
+            'call': self.call,
+            'sound_mode': self.sound_mode,
+            'auto_open': self.auto_open,
+            'sequence': self.sequence,
+            'calls': self.calls,
+            'updated_s_ago': None if self.updated is None else round(time.monotonic() - self.updated, 1),
+        }
+
+
+class ScheduledCommand:
+    """Команда, ежедневно отправляемая выбранным устройствам в заданное время"""
+
+    __slots__ = 'at', 'command', 'filters', 'runs', 'sent', '_task'
+
+    def __init__(self, at: str, command: str, filters: dict):
+        self.at = datetime.time.fromisoformat(at)
+        self.command = validate_command(command)
+        self.filters = filters
+        self.runs = 0
+        self.sent = 0
+        self._task = None
+
+    def delay_s(self, now: datetime.datetime) -> float:
+        """Время до ближайшего выполнения по местному времени"""
+        moment = datetime.datetime.combine(now.date(), self.at)
+        if moment <= now:
+            moment += datetime.timedelta(days=1)
+        return (moment - now).total_seconds()
+
+    def as_dict(self) -> dict:
+        return {
+            'at': self.at.strftime('%H:%M'),
+            'command': self.command,
+            'filter': self.filters,
+            'runs': self.runs,
+            'sent': self.sent,
+        }
+
+
+class FleetBridge:
+    """Агрегатор состояний и рассылка команд для парка контроллеров
+
+    Одно соединение с брокером подписано на root + '#'. Устройство определяется префиксом топика
+    перед суффиксом из state_topics, поэтому блоки супервизора с префиксами топиков (INTERCOM_UNITS)
+    видны как отдельные устройства. Состояния хранятся в памяти и при переподключении
+    восстанавливаются из retained сообщений. Команды отправляются в топик <устройство>/control
+    """
+
+    def __init__(self, mqtt_client: MQTTClient, root: str = '', state_topics: dict = None,
+                 control_topic: str = CONTROL_TOPIC):
+        self._mqtt_client = mqtt_client
+        self._mqtt_client.callback = self._on_message
+        self._root = root.encode()
+        self._control_topic = control_topic
+        self._fields = {}
+        for suffix, field in (state_topics or STATE_TOPICS).items():
+            self._fields.setdefault(suffix.count('/') + 1, {})[suffix.encode()] = field
+        self._devices = {}
+        self._schedule = []
+        self.messages = 0
+        self.ignored = 0
+        self.commands_sent = 0
+        self.connections = 0
+        self.on_update = None
+
+    @property
+    def connected(self) -> bool:
+        return self._mqtt_client.connected
+
+    async def run(self):
+        """Поддерживает соединение с брокером с экспоненциальной задержкой переподключения"""
+        delay = RECONNECT_MIN_DELAY_S
+        while True:
+            try:
+                await self._mqtt_client.connect()
+                await self._mqtt_client.subscribe(self._root + b'#')
+            except OSError as ex:
+                print(f'Failed to connect to MQTT server ({ex}), retry in {delay} s')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY_S)
+                continue
+            self.connections += 1
+            delay = RECONNECT_MIN_DELAY_S
+            print(f'Connected to MQTT server {self._mqtt_client.server}:{self._mqtt_client.port}')
+            await self._mqtt_client.closed.wait()
+            print('Connection to MQTT server lost')
+            await self._mqtt_client.disconnect()
+
+    async def close(self):
+        for job in self._schedule:
+            job._task.cancel()
+        await self._mqtt_client.disconnect()
+
+    def _on_message(self, topic: bytes, payload: bytes):
+        self.messages += 1
+        if not topic.startswith(self._root):
+            self.ignored += 1
+            return
+        topic = topic[len(self._root):]
+        for levels, fields in self._fields.items():
+            parts = topic.rsplit(b'/', levels)
+            if len(parts) > levels:
+                device = parts[0]
+                field = fields.get(topic[len(device) + 1:])
+            else:
+                # топики контроллера без префикса, устройство задаётся только root
+                device = b''
+                field = fields.get(topic)
+            if field is not None:
+                self._update(device.decode(), field, payload.decode(errors='replace'))
+                return
+        self.ignored += 1
+
+    def _update(self, device: str, field: str, value: str):
+        state = self._devices.get(device)
+        if state is None:
+            state = self._devices[device] = DeviceState(device)
+        if field == 'call' and value == 'ON' and not state.call == 'ON':
+            state.calls += 1
+        setattr(state, field, value)
+        state.updated = time.monotonic()
+        if self.on_update:
+            self.on_update(state, field)
+
+    def get(self, device: str) -> DeviceState:
+        """Состояние устройства или None, если от него не было сообщений"""
+        return self._devices.get(device)
+
+    def query(self, prefix: str = None, **filters) -> list:
+        """Устройства, префикс которых начинается с prefix, а поля состояния равны filters"""
+        for field in filters:
+            if field not in DeviceState.__slots__:
+                raise ValueError(f'unknown field {field!r}')
+        return [
+            state for device, state in self._devices.items()
+            if (prefix is None or device.startswith(prefix))
+            and all(getattr(state, field) == value for field, value in filters.items())
+        ]
+
+    def summary(self) -> dict:
+        """Число устройств по значениям каждого поля состояния и статистика моста"""
+        fields = {field: {} for field in ('call', 'sound_mode', 'auto_open')}
+        for state in self._devices.values():
+            for field, counts in fields.items():
+                value = getattr(state, field)
+                counts[value] = counts.get(value, 0) + 1
+        return {
+            'devices': len(self._devices),
+            'states': {field: {str(value): count for value, count in counts.items()}
+                       for field, counts in fields.items()},
+            'connected': self.connected,
+            'connections': self.connections,
+            'messages': self.messages,
+            'ignored': self.ignored,
+            'commands_sent': self.commands_sent,
+        }
+
+    def send(self, device: str, command: str):
+        """Отправляет команду одному устройству"""
+        self._publish(device, validate_command(command))
+
+    def broadcast(self, command: str, devices=None, **filters) -> int:
+        """Отправляет команду списку devices или устройствам, выбранным query(**filters)
+
+        Публикации записываются в буфер соединения без ожидания, поэтому рассылка сотням
+        устройств не прерывается обработкой входящих сообщений. Возвращает число устройств
+        """
+        command = validate_command(command)
+        if devices is None:
+            devices = [state.device for state in self.query(**filters)]
+        for device in devices:
+            self._publish(device, command)
+        return len(devices)
+
+    async def flush(self):
+        """Ожидает отправки команд, записанных в буфер соединения"""
+        await self._mqtt_client.flush()
+
+    def _publish(self, device: str, command: str):
+        topic = f'{device}/{self._control_topic}' if device else self._control_topic
+        self._mqtt_client.publish(self._root + topic.encode(), command)
+        self.commands_sent += 1
+
+    def schedule(self, at: str, command: str, **filters) -> ScheduledCommand:
+        """Ежедневная рассылка команды в время at (ЧЧ:ММ, местное время), например MUTE_SOUND в 22:00"""
+        self.query(**filters)  # проверка полей фильтра
+        job = ScheduledCommand(at, command, filters)
+        job._task = asyncio.create_task(self._scheduled_command_task(job))
+        self._schedule.append(job)
+        return job
+
+    def unschedule(self, job: ScheduledCommand):
+        job._task.cancel()
+        self._schedule.remove(job)
+
+    @property
+    def scheduled(self) -> list:
+        return list(self._schedule)
+
+    async def _scheduled_command_task(self, job: ScheduledCommand):
+        while True:
+            await asyncio.sleep(job.delay_s(datetime.datetime.now()))
+            job.runs += 1
+            try:
+                job.sent += self.broadcast(job.command, **job.filters)
+                await self.flush()
+            except OSError as ex:
+                print(f'Failed to send scheduled command {job.command!r} ({ex})')
+            # не дать выполнению сработать повторно в ту же секунду
+            await asyncio.sleep(1)
@@ -0,0 +1,122 @@
+"""Локальная замена MQTT брокера для проверки моста и нагрузочного бенчмарка
+
+Поддерживает подмножество MQTT 3.1.1, которым пользуются контроллеры и мост: QoS 0,
+retained сообщения, подписки с '+' и '#' и keepalive. Сессии всегда чистые
+"""
+import asyncio
+
+from fleet.mqtt import (CONNACK, CONNECT, DISCONNECT, PINGREQ, PINGRESP, PUBLISH, SUBACK, SUBSCRIBE,
+                        decode_publish, encode_packet, encode_publish, read_packet, topic_matches)
+
+
+class _Session:
+    __slots__ = 'writer', 'patterns'
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.patterns = []
+
+
+class LocalBroker:
+    """MQTT брокер в текущем цикле событий asyncio
+
+    Подписки с точным топиком ищутся по словарю, подписки с шаблонами проверяются перебором,
+    поэтому стоимость доставки определяется числом шаблонных подписок, а не числом клиентов
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.retained = {}
+        self.received = 0
+        self.delivered = 0
+        self._exact = {}
+        self._wildcards = []
+        self._server = None
+
+    async def start(self) -> int:
+        """Запускает приём соединений и возвращает номер порта"""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def publish(self, topic: bytes, payload: bytes, retain: bool = False):
+        """Доставляет сообщение подписчикам и сохраняет retained сообщение"""
+        self.received += 1
+        if retain:
+            if payload:
+                self.retained[topic] = payload
+            else:
+                self.retained.pop(topic, None)
+        packet = encode_publish(topic, payload)
+        for session in self._exact.get(topic, ()):
+            session.writer.write(packet)
+            self.delivered += 1
+        for pattern, session in self._wildcards:
+            if topic_matches(pattern, topic):
+                session.writer.write(packet)
+                self.delivered += 1
+
+    def _subscribe(self, session: _Session, pattern: bytes):
+        if pattern in session.patterns:
+            return
+        session.patterns.append(pattern)
+        if b'+' in pattern or b'#' in pattern:
+            self._wildcards.append((pattern, session))
+            retained = [topic for topic in self.retained if topic_matches(pattern, topic)]
+        else:
+            self._exact.setdefault(pattern, []).append(session)
+            retained = [pattern] if pattern in self.retained else []
+        for topic in retained:
+            session.writer.write(encode_publish(topic, self.retained[topic], retain=True))
+
+    def _drop(self, session: _Session):
+        for pattern in session.patterns:
+            subscribers = self._exact.get(pattern)
+            if subscribers and session in subscribers:
+                subscribers.remove(session)
+                if not subscribers:
+                    del self._exact[pattern]
+        self._wildcards = [(pattern, subscriber) for pattern, subscriber in self._wildcards
+                           if subscriber is not session]
+        session.patterns.clear()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = _Session(writer)
+        try:
+            header, _ = await read_packet(reader)
+            if not header == CONNECT:
+                return
+            writer.write(encode_packet(CONNACK, b'\x00\x00'))
+            while True:
+                header, body = await read_packet(reader)
+                kind = header & 0xF0
+                if kind == PUBLISH:
+                    topic, payload, retain = decode_publish(header, body)
+                    self.publish(topic, payload, retain)
+                elif header == SUBSCRIBE:
+                    position = 2
+                    codes = bytearray()
+                    while position < len(body):
+                        length = int.from_bytes(body[position:position + 2], 'big')
+                        self._subscribe(session, body[position + 2:position + 2 + length])
+                        position += 3 + length
+                        codes.append(0)
+                    writer.write(encode_packet(SUBACK, body[:2] + bytes(codes)))
+                elif header == PINGREQ:
+                    writer.write(encode_packet(PINGRESP))
+                elif header == DISCONNECT:
+                    return
+                if writer.transport.get_write_buffer_size() > 65536:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            self._drop(session)
+            writer.close()
@@ -0,0 +1,204 @@
+"""Минимальный клиент MQTT 3.1.1 поверх потоков asyncio (QoS 0)
+
+Контроллеры публикуют состояния и принимают команды с QoS 0, поэтому мосту достаточно пакетов
+CONNECT, PUBLISH, SUBSCRIBE, PINGREQ и DISCONNECT. Кодек пакетов используется и клиентом,
+и локальной заменой брокера fleet.broker
+"""
+import asyncio
+
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+SUBSCRIBE = 0x82
+SUBACK = 0x90
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+_RETAIN = 0x01
+_CLEAN_SESSION = 0x02
+_USERNAME = 0x80
+_PASSWORD = 0x40
+MAX_PACKET_SIZE = 268435455
+
+
+class MQTTException(OSError):
+    pass
+
+
+def topic_matches(pattern: bytes, topic: bytes) -> bool:
+    """Проверяет соответствие топика шаблону подписки с '+' и '#'"""
+    pattern_levels = pattern.split(b'/')
+    topic_levels = topic.split(b'/')
+    for index, level in enumerate(pattern_levels):
+        if level == b'#':
+            return True
+        if index >= len(topic_levels):
+            return False
+        if not level == b'+' and not level == topic_levels[index]:
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+def _string(value: bytes) -> bytes:
+    return len(value).to_bytes(2, 'big') + value
+
+
+def encode_packet(header: int, body: bytes = b'') -> bytes:
+    """Пакет с фиксированным заголовком и длиной остатка в формате variable byte integer"""
+    length = len(body)
+    if length > MAX_PACKET_SIZE:
+        raise ValueError('packet too large')
+    packet = bytearray((header,))
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        packet.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    return bytes(packet) + body
+
+
+def encode_connect(client_id: bytes, keepalive: int, user: bytes = None, password: bytes = None) -> bytes:
+    flags = _CLEAN_SESSION
+    payload = _string(client_id)
+    if user is not None:
+        flags |= _USERNAME
+        payload += _string(user)
+        if password is not None:
+            flags |= _PASSWORD
+            payload += _string(password)
+    return encode_packet(CONNECT, _string(b'MQTT') + bytes((4, flags)) + keepalive.to_bytes(2, 'big') + payload)
+
+
+def encode_publish(topic: bytes, payload: bytes, retain: bool = False) -> bytes:
+    return encode_packet(PUBLISH | (_RETAIN if retain else 0), _string(topic) + payload)
+
+
+def decode_publish(flags: int, body: bytes) -> tuple:
+    """Разбирает тело пакета PUBLISH: (топик, сообщение, retain)"""
+    length = int.from_bytes(body[:2], 'big')
+    start = 2 + length
+    if flags & 0x06:
+        start += 2  # идентификатор пакета QoS 1/2
+    return body[2:2 + length], body[start:], bool(flags & _RETAIN)
+
+
+def encode_subscribe(packet_id: int, patterns) -> bytes:
+    body = packet_id.to_bytes(2, 'big')
+    for pattern in patterns:
+        body += _string(pattern) + b'\x00'
+    return encode_packet(SUBSCRIBE, body)
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple:
+    """Читает пакет из потока: (первый байт заголовка, тело)"""
+    header = (await reader.readexactly(1))[0]
+    length = 0
+    shift = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+        if shift > 21:
+            raise MQTTException('malformed remaining length')
+    return header, await reader.readexactly(length) if length else b''
+
+
+def _to_bytes(value) -> bytes:
+    return value.encode() if isinstance(value, str) else bytes(value)
+
+
+class MQTTClient:
+    """Асинхронный MQTT клиент
+
+    Входящие публикации передаются в callback(topic, payload) из задачи чтения, поэтому
+    обработчик должен быть быстрым и не ожидать. Публикации записываются в буфер соединения
+    без ожидания, поэтому рассылка команд сотням устройств завершается одним вызовом flush()
+    """
+
+    def __init__(self, client_id, server: str, port: int = 1883, user=None, password=None,
+                 keepalive: int = 60):
+        self.client_id = _to_bytes(client_id)
+        self.server = server
+        self.port = port
+        self.user = None if user is None else _to_bytes(user)
+        self.password = None if password is None else _to_bytes(password)
+        self.keepalive = keepalive
+        self.callback = None
+        self._reader = None
+        self._writer = None
+        self._packet_id = 0
+        self._tasks = []
+        self.closed = asyncio.Event()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self.closed.is_set()
+
+    async def connect(self):
+        """Подключается к брокеру и запускает задачи чтения и keepalive"""
+        self._reader, self._writer = await asyncio.open_connection(self.server, self.port)
+        self.closed.clear()
+        self._writer.write(encode_connect(self.client_id, self.keepalive, self.user, self.password))
+        await self._writer.drain()
+        header, body = await read_packet(self._reader)
+        if not header == CONNACK or len(body) < 2 or body[1]:
+            self._writer.close()
+            self._writer = None
+            raise MQTTException(f'connection refused ({body[1] if len(body) > 1 else None})')
+        self._tasks = [asyncio.create_task(self._read_task())]
+        if self.keepalive:
+            self._tasks.append(asyncio.create_task(self._keepalive_task()))
+
+    async def subscribe(self, *patterns):
+        self._packet_id = self._packet_id % 0xFFFF + 1
+        self._writer.write(encode_subscribe(self._packet_id, [_to_bytes(pattern) for pattern in patterns]))
+        await self._writer.drain()
+
+    def publish(self, topic, payload, retain: bool = False):
+        """Записывает публикацию в буфер соединения без ожидания отправки"""
+        if not self.connected:
+            raise MQTTException('not connected')
+        self._writer.write(encode_publish(_to_bytes(topic), _to_bytes(payload), retain))
+
+    async def flush(self):
+        """Ожидает отправки записанных публикаций"""
+        if self.connected:
+            await self._writer.drain()
+
+    async def disconnect(self):
+        if self._writer is None:
+            return
+        for task in self._tasks:
+            task.cancel()
+        if not self.closed.is_set():
+            try:
+                self._writer.write(encode_packet(DISCONNECT))
+                await self._writer.drain()
+            except (ConnectionError, OSError):
+                pass
+        self._writer.close()
+        self._writer = None
+        self.closed.set()
+
+    async def _read_task(self):
+        try:
+            while True:
+                header, body = await read_packet(self._reader)
+                if header & 0xF0 == PUBLISH:
+                    topic, payload, _ = decode_publish(header, body)
+                    if self.callback:
+                        self.callback(topic, payload)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            self.closed.set()
+
+    async def _keepalive_task(self):
+        while self.connected:
+            await asyncio.sleep(self.keepalive / 2)
+            if self.connected:
+                self._writer.write(encode_packet(PINGREQ))
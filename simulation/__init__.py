@@ -0,0 +1,60 @@
+"""Симуляция оборудования контроллера для запуска прошивки на хосте (CPython)
+
+simulation.install() подменяет модули machine, micropython, network, ntptime, uselect и umqtt.simple
+и добавляет в модуль time функции ticks_ms/ticks_us/ticks_diff/ticks_add/sleep_ms/sleep_us,
+работающие по виртуальным часам (в unix-порте MicroPython подменяется модуль time целиком).
+Устанавливать симуляцию нужно до импорта cyfral_controller.
+"""
+import sys
+import time
+
+from simulation.board import Board, PinState, SimulatedDS1307, current, ring_waveform, set_current
+from simulation.broker import Broker, Message
+from simulation.clock import SimulationTimeout, VirtualClock
+
+__all__ = [
+    'Board',
+    'Broker',
+    'Message',
+    'PinState',
+    'SimulatedDS1307',
+    'SimulationTimeout',
+    'VirtualClock',
+    'current',
+    'install',
+    'ring_waveform',
+]
+
+
+def install(board: Board = None) -> Board:
+    """Устанавливает виртуальную плату и подменяет модули MicroPython"""
+    board = board or Board()
+    set_current(board)
+
+    from simulation import machine, micropython, network, ntptime, uselect
+    from simulation.umqtt import simple
+
+    sys.modules['machine'] = machine
+    sys.modules['micropython'] = micropython
+    sys.modules['network'] = network
+    sys.modules['ntptime'] = ntptime
+    sys.modules['uselect'] = uselect
+    sys.modules['umqtt'] = sys.modules['simulation.umqtt']
+    sys.modules['umqtt.simple'] = simple
+    network.WLAN._interfaces.clear()
+
+    clock = board.clock
+    try:
+        time.ticks_ms = clock.ticks_ms
+        time.ticks_us = clock.ticks_us
+        time.ticks_diff = clock.ticks_diff
+        time.ticks_add = clock.ticks_add
+        time.sleep_ms = clock.sleep_ms
+        time.sleep_us = clock.sleep_us
+    except AttributeError:
+        # MicroPython: атрибуты встроенного модуля time неизменяемы, поэтому подменяется сам модуль
+        from simulation import vtime
+
+        vtime.bind(clock)
+        sys.modules['time'] = vtime
+    return board
@@ -0,0 +1,52 @@
+"""Цикл событий asyncio, работающий по виртуальному времени симуляции"""
+import asyncio
+import selectors
+
+from simulation.board import current
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Вместо ожидания ввода-вывода продвигает виртуальные часы на время ожидания"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        if timeout is None:
+            next_event = self._clock.next_event_us()
+            if next_event is None:
+                raise RuntimeError('simulation deadlock: no scheduled events')
+            timeout = (next_event - self._clock.now_us) / 1000000
+
+        ready = super().select(0)
+        if not ready and timeout > 0:
+            next_event = self._clock.next_event_us()
+            delay_us = int(timeout * 1000000 + 0.5)
+            if next_event is not None:
+                delay_us = min(delay_us, next_event - self._clock.now_us)
+            self._clock.advance(delay_us)
+        return ready
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock=None):
+        self._clock = clock or current().clock
+        super().__init__(_VirtualSelector(self._clock))
+
+    def time(self):
+        return self._clock.time()
+
+
+def run(coroutine, clock=None):
+    """Аналог asyncio.run() с виртуальным временем"""
+    loop = VirtualTimeEventLoop(clock)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
@@ -0,0 +1,193 @@
+import time
+
+from simulation.broker import Broker
+from simulation.clock import SimulationTimeout, VirtualClock
+
+DS1307_ADDRESS = 0x68
+
+_current_board = None
+
+
+def current():
+    """Плата, установленная simulation.install()"""
+    if _current_board is None:
+        raise RuntimeError('simulation is not installed')
+    return _current_board
+
+
+def set_current(board):
+    global _current_board
+    _current_board = board
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """Число дней от 1970-01-01"""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _bcd(value: int) -> int:
+    return (value // 10) << 4 | (value % 10)
+
+
+def _dec(value: int) -> int:
+    return (value >> 4) * 10 + (value & 0x0F)
+
+
+class PinState:
+    """Состояние вывода платы, общее для всех объектов Pin с одним номером"""
+
+    def __init__(self, board, number: int):
+        self.board = board
+        self.number = number
+        self.value = 0
+        self.history = []
+        self.irq_handler = None
+        self.irq_trigger = 0
+        self.irq_pin = None
+
+    def set(self, value: int):
+        value = 1 if value else 0
+        if value == self.value:
+            return
+        self.value = value
+        self.history.append((self.board.clock.now_us, value))
+
+        trigger = 1 if value else 2  # Pin.IRQ_RISING, Pin.IRQ_FALLING
+        if self.irq_handler is not None and self.irq_trigger & trigger:
+            self.irq_handler(self.irq_pin)
+
+    def drive_waveform(self, transitions):
+        """Планирует изменения входного сигнала: последовательность (время в мс, значение)"""
+        for time_ms, value in transitions:
+            self.board.clock.call_at(time_ms * 1000, lambda value=value: self.set(value))
+
+    def first_change(self, value: int, after_us: int = 0):
+        """Время первого перехода в состояние value не раньше after_us"""
+        for time_us, new_value in self.history:
+            if time_us >= after_us and new_value == value:
+                return time_us
+        return None
+
+
+def ring_waveform(start_ms: int, duration_ms: int, on_ms: int = 1000, off_ms: int = 4000) -> list:
+    """Сигнал оптопары входящего вызова: пачки длительностью on_ms с паузами off_ms"""
+    transitions = []
+    time_ms = start_ms
+    while time_ms < start_ms + duration_ms:
+        transitions.append((time_ms, 1))
+        transitions.append((time_ms + on_ms, 0))
+        time_ms += on_ms + off_ms
+    return transitions
+
+
+class SimulatedDS1307:
+    """Карта регистров DS1307: часы 0x00-0x06, управление 0x07, ОЗУ 0x08-0x3F
+
+    Время идёт по виртуальным часам с заданным уходом drift_ppm
+    """
+
+    def __init__(self, clock, epoch_seconds: int = None, drift_ppm: float = 0.0):
+        self.clock = clock
+        self.drift_ppm = drift_ppm
+        self.registers = bytearray(64)
+        self._base_seconds = int(time.time()) if epoch_seconds is None else epoch_seconds
+        self._base_us = clock.now_us
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def epoch_seconds(self) -> int:
+        elapsed_us = (self.clock.now_us - self._base_us) * (1 + self.drift_ppm / 1000000)
+        return self._base_seconds + int(elapsed_us // 1000000)
+
+    def set_epoch_seconds(self, seconds: int):
+        self._base_seconds = seconds
+        self._base_us = self.clock.now_us
+
+    def _render_clock(self):
+        # индексы вместо атрибутов struct_time: в MicroPython gmtime() возвращает кортеж
+        year, month, day, hour, minute, second, weekday = time.gmtime(self.epoch_seconds)[:7]
+        registers = self.registers
+        registers[0] = _bcd(second) | (registers[0] & 0x80)
+        registers[1] = _bcd(minute)
+        registers[2] = _bcd(hour)
+        registers[3] = weekday + 1
+        registers[4] = _bcd(day)
+        registers[5] = _bcd(month)
+        registers[6] = _bcd(year - 2000)
+
+    def read(self, register: int, count: int) -> bytes:
+        self.reads += 1
+        self._render_clock()
+        return bytes(self.registers[register:register + count])
+
+    def write(self, register: int, data):
+        self.writes += 1
+        self._render_clock()
+        self.registers[register:register + len(data)] = data
+        if register < 7:
+            registers = self.registers
+            days = _days_from_civil(_dec(registers[6]) + 2000, _dec(registers[5]), _dec(registers[4]))
+            seconds = _dec(registers[2] & 0x3F) * 3600 + _dec(registers[1]) * 60 + _dec(registers[0] & 0x7F)
+            self.set_epoch_seconds(days * 86400 + seconds)
+
+
+class Board:
+    """Виртуальная плата: часы, выводы, устройства I2C, сеть и MQTT брокер
+
+    Стоимости операций задают, сколько виртуального времени занимает соответствующий вызов
+    """
+
+    def __init__(self, rtc_epoch_seconds: int = None, rtc_drift_ppm: float = 0.0):
+        self.clock = VirtualClock()
+        self.broker = Broker(self.clock)
+        self.pins = {}
+        self.i2c_devices = {DS1307_ADDRESS: SimulatedDS1307(self.clock, rtc_epoch_seconds, rtc_drift_ppm)}
+
+        self.internal_rtc_offset_seconds = None
+        self.wlan_connect_delay_ms = 2000
+        self.wlan_available = True
+        self.ntp_available = True
+        self.ntp_delay_ms = 300
+        self.ntp_epoch_seconds = None
+        self._ntp_base_us = 0
+
+        self.check_msg_cost_us = 500
+        self.publish_cost_us = 2000
+        self.connect_cost_us = 50000
+        self.connect_timeout_us = 1000000
+        self.i2c_transaction_cost_us = 300
+        self.idle_cost_us = 1000
+        # время, которое цикл программы тратит между двумя чтениями ticks_ms/ticks_us
+        self.clock.ticks_cost_us = 50
+
+    @property
+    def ds1307(self) -> SimulatedDS1307:
+        return self.i2c_devices[DS1307_ADDRESS]
+
+    def pin(self, number: int) -> PinState:
+        if number not in self.pins:
+            self.pins[number] = PinState(self, number)
+        return self.pins[number]
+
+    def ntp_time(self) -> int:
+        """Эталонное время NTP сервера в секундах от 1970-01-01"""
+        if self.ntp_epoch_seconds is None:
+            self.ntp_epoch_seconds = int(time.time())
+            self._ntp_base_us = self.clock.now_us
+        return self.ntp_epoch_seconds + (self.clock.now_us - self._ntp_base_us) // 1000000
+
+    def run_until(self, function, time_ms: int):
+        """Выполняет function() до достижения виртуального времени time_ms"""
+        self.clock.deadline_us = time_ms * 1000
+        try:
+            function()
+        except SimulationTimeout:
+            pass
+        finally:
+            self.clock.deadline_us = None
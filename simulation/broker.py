@@ -0,0 +1,102 @@
+def _to_bytes(value) -> bytes:
+    return value.encode() if isinstance(value, str) else bytes(value)
+
+
+def topic_matches(pattern: bytes, topic: bytes) -> bool:
+    """Проверяет соответствие топика шаблону подписки с '+' и '#'"""
+    pattern_levels = pattern.split(b'/')
+    topic_levels = topic.split(b'/')
+    for index, level in enumerate(pattern_levels):
+        if level == b'#':
+            return True
+        if index >= len(topic_levels):
+            return False
+        if not level == b'+' and not level == topic_levels[index]:
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+class Message:
+    """Опубликованное сообщение"""
+
+    __slots__ = 'time_us', 'topic', 'payload', 'retain', 'sender'
+
+    def __init__(self, time_us: int, topic: bytes, payload: bytes, retain: bool, sender):
+        self.time_us = time_us
+        self.topic = topic
+        self.payload = payload
+        self.retain = retain
+        self.sender = sender
+
+    def __repr__(self):
+        return f'Message({self.time_us}us, {self.topic!r}, {self.payload!r}, retain={self.retain})'
+
+
+class Broker:
+    """Встроенная замена MQTT брокера
+
+    Хранит retained сообщения, доставляет публикации подписчикам и ведёт журнал
+    всех публикаций с отметками виртуального времени
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.online = True
+        self.retained = {}
+        self.log = []
+        self._subscriptions = []
+
+    def connect(self, client):
+        if not self.online:
+            raise OSError(111, 'ECONNREFUSED')
+        # clean session: подписки прежнего соединения клиента не сохраняются
+        self.disconnect(client)
+
+    def disconnect(self, client):
+        self._subscriptions = [(pattern, subscriber) for pattern, subscriber in self._subscriptions
+                               if subscriber is not client]
+
+    def subscribe(self, client, pattern):
+        pattern = _to_bytes(pattern)
+        self._subscriptions.append((pattern, client))
+        for topic, message in self.retained.items():
+            if topic_matches(pattern, topic):
+                client.deliver(topic, message.payload)
+
+    def publish(self, topic, payload, retain: bool = False, sender=None) -> Message:
+        topic = _to_bytes(topic)
+        message = Message(self.clock.now_us, topic, _to_bytes(payload), retain, sender)
+        self.log.append(message)
+        if retain:
+            if message.payload:
+                self.retained[topic] = message
+            else:
+                self.retained.pop(topic, None)
+
+        for pattern, client in self._subscriptions:
+            if client is not sender and topic_matches(pattern, topic):
+                client.deliver(topic, message.payload)
+        return message
+
+    def inject(self, topic, payload, retain: bool = False) -> Message:
+        """Публикует сообщение от имени внешнего клиента"""
+        return self.publish(topic, payload, retain)
+
+    def inject_at(self, time_ms: int, topic, payload, retain: bool = False):
+        """Планирует публикацию внешнего сообщения на момент time_ms виртуального времени"""
+        self.clock.call_at(time_ms * 1000, lambda: self.inject(topic, payload, retain))
+
+    def messages(self, topic=None) -> list:
+        """Журнал публикаций (для заданного топика или всех)"""
+        if topic is None:
+            return list(self.log)
+        topic = _to_bytes(topic)
+        return [message for message in self.log if message.topic == topic]
+
+    def first_message(self, topic, payload=None, after_us: int = 0):
+        """Первое сообщение в топике (с заданным содержимым) не раньше after_us"""
+        payload = None if payload is None else _to_bytes(payload)
+        for message in self.messages(topic):
+            if message.time_us >= after_us and (payload is None or message.payload == payload):
+                return message
+        return None
@@ -0,0 +1,92 @@
+import heapq
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALF_PERIOD = TICKS_PERIOD >> 1
+
+
+class SimulationTimeout(Exception):
+    """Виртуальное время достигло заданного предела"""
+
+
+class VirtualClock:
+    """Виртуальные часы симуляции
+
+    Время идёт только при вызовах advance() (их делают sleep_ms, опрос MQTT и т.п.),
+    поэтому симуляция может работать быстрее реального времени. Запланированные события
+    (таймеры, изменения входных сигналов) выполняются в порядке их наступления
+    """
+
+    def __init__(self):
+        self.now_us = 0
+        self.deadline_us = None
+        self.ticks_cost_us = 0
+        self._events = []
+        self._sequence = 0
+
+    @property
+    def now_ms(self) -> int:
+        return self.now_us // 1000
+
+    def ticks_ms(self) -> int:
+        if self.ticks_cost_us:
+            self.advance(self.ticks_cost_us)
+        return (self.now_us // 1000) & TICKS_MAX
+
+    def ticks_us(self) -> int:
+        if self.ticks_cost_us:
+            self.advance(self.ticks_cost_us)
+        return self.now_us & TICKS_MAX
+
+    @staticmethod
+    def ticks_add(ticks: int, delta: int) -> int:
+        return (ticks + delta) & TICKS_MAX
+
+    @staticmethod
+    def ticks_diff(ticks1: int, ticks2: int) -> int:
+        diff = (ticks1 - ticks2) & TICKS_MAX
+        return diff - TICKS_PERIOD if diff >= TICKS_HALF_PERIOD else diff
+
+    def time(self) -> float:
+        """Время в секундах (для цикла событий asyncio)"""
+        return self.now_us / 1000000
+
+    def call_at(self, time_us: int, callback) -> list:
+        """Планирует вызов callback() в момент time_us, возвращает дескриптор для cancel()"""
+        self._sequence += 1
+        event = [max(time_us, self.now_us), self._sequence, callback]
+        heapq.heappush(self._events, event)
+        return event
+
+    def call_later(self, delay_us: int, callback) -> list:
+        return self.call_at(self.now_us + delay_us, callback)
+
+    @staticmethod
+    def cancel(event: list):
+        event[2] = None
+
+    def next_event_us(self):
+        """Время ближайшего запланированного события или None"""
+        while self._events and self._events[0][2] is None:
+            heapq.heappop(self._events)
+        return self._events[0][0] if self._events else None
+
+    def advance(self, delta_us: int):
+        """Продвигает время на delta_us, выполняя наступившие события"""
+        target = self.now_us + max(int(delta_us), 0)
+        while self._events and self._events[0][0] <= target:
+            time_us, _, callback = heapq.heappop(self._events)
+            if callback is None:
+                continue
+            self.now_us = time_us
+            callback()
+        self.now_us = max(self.now_us, target)
+
+        if self.deadline_us is not None and self.now_us >= self.deadline_us:
+            raise SimulationTimeout(self.now_us)
+
+    def sleep_ms(self, ms: int):
+        self.advance(ms * 1000)
+
+    def sleep_us(self, us: int):
+        self.advance(us)
@@ -0,0 +1,176 @@
+"""Замена модуля machine для симуляции"""
+import time
+
+from simulation.board import current
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._state = current().pin(id)
+        if value is not None:
+            self._state.set(value)
+
+    def value(self, value=None):
+        if value is None:
+            return self._state.value
+        self._state.set(value)
+
+    def on(self):
+        self._state.set(1)
+
+    def off(self):
+        self._state.set(0)
+
+    def irq(self, handler=None, trigger=IRQ_RISING | IRQ_FALLING, hard=False):
+        self._state.irq_handler = handler
+        self._state.irq_trigger = trigger
+        self._state.irq_pin = self
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.id = id
+        self._event = None
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=None):
+        self.deinit()
+        if freq is not None:
+            period = 1000 // freq
+        self._mode = mode
+        self._period_us = max(period, 1) * 1000
+        self._callback = callback
+        self._event = current().clock.call_later(self._period_us, self._fire)
+
+    def _fire(self):
+        if self._mode == Timer.PERIODIC:
+            self._event = current().clock.call_later(self._period_us, self._fire)
+        else:
+            self._event = None
+        self._callback(self)
+
+    def deinit(self):
+        if self._event is not None:
+            current().clock.cancel(self._event)
+            self._event = None
+
+
+class I2C:
+    def __init__(self, id=-1, scl=None, sda=None, freq=400000):
+        self._board = current()
+
+    def _device(self, addr):
+        device = self._board.i2c_devices.get(addr)
+        if device is None:
+            raise OSError(19, 'ENODEV')
+        self._board.clock.advance(self._board.i2c_transaction_cost_us)
+        return device
+
+    def scan(self) -> list:
+        return sorted(self._board.i2c_devices)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8) -> bytes:
+        return self._device(addr).read(memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        buf[:] = self._device(addr).read(memaddr, len(buf))
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self._device(addr).write(memaddr, bytes(buf))
+
+
+class RTC:
+    """Внутренние часы ESP8266, формат datetime(): (год, месяц, день, день недели, ч, мин, с, мкс)"""
+
+    def __init__(self):
+        self._board = current()
+
+    def datetime(self, datetimetuple=None):
+        board = self._board
+        if datetimetuple is not None:
+            from simulation.board import _days_from_civil
+
+            year, month, day, _, hour, minute, second = datetimetuple[:7]
+            seconds = _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+            board.internal_rtc_offset_seconds = seconds - board.clock.now_us // 1000000
+            return
+
+        offset = board.internal_rtc_offset_seconds or 946684800  # 2000-01-01
+        year, month, day, hour, minute, second, weekday = time.gmtime(offset + board.clock.now_us // 1000000)[:7]
+        return year, month, day, weekday, hour, minute, second, 0
+
+
+class _GpioOutMemory:
+    """Доступ machine.mem32 к регистру выходов GPIO ESP8266 (0x60000300): биты 0-15 - выводы платы"""
+
+    GPIO_OUT = 0x60000300
+
+    def __getitem__(self, address):
+        self._check(address)
+        board = current()
+        return sum(board.pin(pin).value << pin for pin in range(16) if pin in board.pins)
+
+    def __setitem__(self, address, value):
+        self._check(address)
+        board = current()
+        for pin in range(16):
+            if pin in board.pins:
+                board.pin(pin).set(value >> pin & 1)
+
+    def _check(self, address):
+        if not address == self.GPIO_OUT:
+            raise ValueError(f'unsupported register 0x{address:08x}')
+
+
+mem32 = _GpioOutMemory()
+
+
+def disable_irq():
+    return 1
+
+
+def enable_irq(state=1):
+    pass
+
+
+def idle():
+    board = current()
+    next_event = board.clock.next_event_us()
+    if next_event is None:
+        board.clock.advance(board.idle_cost_us)
+    else:
+        board.clock.advance(min(max(next_event - board.clock.now_us, 0), board.idle_cost_us))
+
+
+def lightsleep(time_ms=None):
+    board = current()
+    if time_ms is None:
+        next_event = board.clock.next_event_us()
+        board.clock.advance(board.idle_cost_us if next_event is None else next_event - board.clock.now_us)
+    else:
+        board.clock.advance(time_ms * 1000)
+
+
+def freq(value=None):
+    return 80000000
+
+
+def reset():
+    raise SystemExit('machine.reset()')
+
+
+def unique_id() -> bytes:
+    return b'\x00\x00\x00\x00'
@@ -0,0 +1,17 @@
+"""Замена модуля micropython для симуляции"""
+
+
+def const(value):
+    return value
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def mem_info(verbose=None):
+    print('mem: simulated')
+
+
+def schedule(function, argument):
+    function(argument)
@@ -0,0 +1,52 @@
+"""Замена модуля network для симуляции"""
+from simulation.board import current
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 5
+
+
+class WLAN:
+    _interfaces = {}
+
+    def __new__(cls, interface_id=STA_IF):
+        if interface_id not in cls._interfaces:
+            self = object.__new__(cls)
+            self._interface_id = interface_id
+            self._active = interface_id == AP_IF
+            self._connected_at_us = None
+            self._ifconfig = ('192.168.1.100', '255.255.255.0', '192.168.1.1', '8.8.8.8')
+            cls._interfaces[interface_id] = self
+        return cls._interfaces[interface_id]
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._active
+        self._active = bool(is_active)
+        if not self._active:
+            self._connected_at_us = None
+
+    def connect(self, ssid=None, password=None):
+        board = current()
+        if board.wlan_available:
+            self._connected_at_us = board.clock.now_us + board.wlan_connect_delay_ms * 1000
+
+    def disconnect(self):
+        self._connected_at_us = None
+
+    def isconnected(self) -> bool:
+        return (self._active and self._connected_at_us is not None
+                and current().clock.now_us >= self._connected_at_us)
+
+    def status(self, param=None):
+        if self.isconnected():
+            return STAT_GOT_IP
+        return STAT_CONNECTING if self._connected_at_us is not None else STAT_IDLE
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._ifconfig
+        self._ifconfig = tuple(config)
@@ -0,0 +1,24 @@
+"""Замена модуля ntptime для симуляции"""
+import time as _time
+
+from simulation.board import current
+
+host = 'pool.ntp.org'
+
+_EPOCH_2000 = 946684800
+
+
+def time() -> int:
+    """Секунды от 2000-01-01 по данным NTP сервера"""
+    board = current()
+    board.clock.advance(board.ntp_delay_ms * 1000)
+    if not board.ntp_available:
+        raise OSError(110, 'ETIMEDOUT')
+    return board.ntp_time() - _EPOCH_2000
+
+
+def settime():
+    from simulation.machine import RTC
+
+    year, month, day, hour, minute, second, weekday = _time.gmtime(time() + _EPOCH_2000)[:7]
+    RTC().datetime((year, month, day, weekday + 1, hour, minute, second, 0))
@@ -0,0 +1,86 @@
+"""Замена umqtt.simple для симуляции, подключающаяся к встроенному брокеру"""
+from simulation.board import current
+
+
+class MQTTException(Exception):
+    pass
+
+
+class MQTTClient:
+    def __init__(self, client_id, server, port=0, user=None, password=None, keepalive=0, ssl=False,
+                 ssl_params=None):
+        self.client_id = client_id
+        self.server = server
+        self.port = port
+        self.user = user
+        self.pswd = password
+        self.keepalive = keepalive
+        self.cb = None
+        self.sock = None
+        self.lw_topic = None
+        self.lw_msg = None
+        self.lw_retain = False
+        self._board = current()
+        self._inbox = []
+        self.pings = 0
+
+    def set_callback(self, f):
+        self.cb = f
+
+    def set_last_will(self, topic, msg, retain=False, qos=0):
+        self.lw_topic = topic
+        self.lw_msg = msg
+        self.lw_retain = retain
+
+    def _check_connection(self):
+        if self.sock is None or not self._board.broker.online:
+            self.sock = None
+            raise OSError(104, 'ECONNRESET')
+
+    def connect(self, clean_session=True):
+        board = self._board
+        if not board.broker.online:
+            board.clock.advance(board.connect_timeout_us)
+            raise OSError(113, 'EHOSTUNREACH')
+        board.clock.advance(board.connect_cost_us)
+        board.broker.connect(self)
+        self.sock = self
+        return False
+
+    def disconnect(self):
+        self._board.broker.disconnect(self)
+        self.sock = None
+
+    def ping(self):
+        self._check_connection()
+        self.pings += 1
+
+    def publish(self, topic, msg, retain=False, qos=0):
+        self._check_connection()
+        self._board.clock.advance(self._board.publish_cost_us)
+        self._board.broker.publish(topic, msg, retain, sender=self)
+
+    def subscribe(self, topic, qos=0):
+        self._check_connection()
+        self._board.broker.subscribe(self, topic)
+
+    def deliver(self, topic: bytes, payload: bytes):
+        """Вызывается брокером при доставке сообщения по подписке"""
+        self._inbox.append((topic, payload))
+
+    @property
+    def pending(self) -> int:
+        return len(self._inbox)
+
+    def check_msg(self):
+        self._board.clock.advance(self._board.check_msg_cost_us)
+        self._check_connection()
+        if self._inbox:
+            topic, payload = self._inbox.pop(0)
+            self.cb(topic, payload)
+
+    def wait_msg(self):
+        while not self._inbox:
+            self._board.clock.advance(self._board.idle_cost_us)
+            self._check_connection()
+        self.check_msg()
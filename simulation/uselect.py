@@ -0,0 +1,58 @@
+"""Замена модуля uselect для симуляции: ожидание сообщений встроенного брокера по виртуальным часам
+
+Регистрируется объект с атрибутом sock (клиент simulation.umqtt.simple.MQTTClient
+или его sock, который указывает на сам клиент)
+"""
+from simulation.board import current
+
+POLLIN = 0x001
+POLLOUT = 0x004
+POLLERR = 0x008
+POLLHUP = 0x010
+
+
+class poll:
+    def __init__(self):
+        self._objects = {}
+
+    def register(self, obj, eventmask=POLLIN | POLLOUT):
+        self._objects[obj] = eventmask
+
+    def modify(self, obj, eventmask):
+        self._objects[obj] = eventmask
+
+    def unregister(self, obj):
+        self._objects.pop(obj, None)
+
+    def _ready(self) -> list:
+        board = current()
+        ready = []
+        for obj, eventmask in self._objects.items():
+            if obj.sock is None or not board.broker.online:
+                ready.append((obj, POLLHUP))
+            elif eventmask & POLLIN and obj.pending:
+                ready.append((obj, POLLIN))
+            elif eventmask & POLLOUT:
+                ready.append((obj, POLLOUT))
+        return ready
+
+    def poll(self, timeout=-1) -> list:
+        """Продвигает виртуальное время до готовности объектов или истечения timeout мс"""
+        clock = current().clock
+        deadline = None if timeout < 0 else clock.now_us + timeout * 1000
+        while True:
+            ready = self._ready()
+            if ready or (deadline is not None and clock.now_us >= deadline):
+                return ready
+            next_event = clock.next_event_us()
+            if next_event is None:
+                if deadline is None:
+                    clock.advance(current().idle_cost_us)
+                    continue
+                next_event = deadline
+            elif deadline is not None:
+                next_event = min(next_event, deadline)
+            clock.advance(next_event - clock.now_us)
+
+    def ipoll(self, timeout=-1, flags=0):
+        return iter(self.poll(timeout))
@@ -0,0 +1,42 @@
+"""Замена модуля time для симуляции в MicroPython, где атрибуты встроенного модуля неизменяемы"""
+import time as _time
+
+gmtime = _time.gmtime
+localtime = _time.localtime
+mktime = _time.mktime
+time = _time.time
+
+_clock = None
+
+
+def bind(clock):
+    global _clock
+    _clock = clock
+
+
+def ticks_ms():
+    return _clock.ticks_ms()
+
+
+def ticks_us():
+    return _clock.ticks_us()
+
+
+def ticks_diff(ticks1, ticks2):
+    return _clock.ticks_diff(ticks1, ticks2)
+
+
+def ticks_add(ticks, delta):
+    return _clock.ticks_add(ticks, delta)
+
+
+def sleep_ms(ms):
+    _clock.sleep_ms(ms)
+
+
+def sleep_us(us):
+    _clock.sleep_us(us)
+
+
+def sleep(seconds):
+    _clock.advance(int(seconds * 1000000))
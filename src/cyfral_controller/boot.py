@@ -0,0 +1,115 @@
+import time
+
+from micropython import const
+
+PLAUSIBLE_MIN_YEAR = const(2024)
+PLAUSIBLE_MAX_YEAR = const(2099)
+NTP_RETRY_DELAY_MS = const(10000)
+
+_WLAN = const(0)
+_NTP = const(1)
+_DONE = const(2)
+
+
+class BootPipeline:
+    """Фоновая загрузка контроллера
+
+    Подключение к WLAN и синхронизация времени по NTP выполняются пошагово вызовами poll()
+    из цикла контроллера, поэтому отслеживание вызова и управление реле работают с первых
+    миллисекунд после включения. Синхронизация по NTP пропускается, если часы DS1307 хранят
+    правдоподобное время, иначе первую синхронизацию выполняет time_discipline. Время завершения
+    этапов (мс от создания объекта) собирается в timings
+    """
+
+    def __init__(self, sta_if, ap_if, ssid: str, password: str, real_time_clock, time_discipline,
+                 ifconfig: tuple = None):
+        self._start = time.ticks_ms()
+        self._sta_if = sta_if
+        self._ap_if = ap_if
+        self._ssid = ssid
+        self._password = password
+        self._ifconfig = ifconfig
+        self._rtc = real_time_clock
+        self._time_discipline = time_discipline
+        self._stage = None
+        self._next_ntp_attempt = self._start
+        self.timings = {}
+        self.reported = False
+
+    @property
+    def network_ready(self) -> bool:
+        """Подключена ли сеть WLAN"""
+        return 'wlan_ms' in self.timings
+
+    @property
+    def done(self) -> bool:
+        """Завершены ли этапы WLAN и NTP"""
+        return self._stage == _DONE
+
+    @property
+    def complete(self) -> bool:
+        """Завершены ли все этапы загрузки, включая подключение к MQTT серверу"""
+        return self.done and 'mqtt_ms' in self.timings
+
+    def mark(self, phase: str):
+        """Запоминает время завершения этапа phase, если оно ещё не записано"""
+        key = phase + '_ms'
+        if key not in self.timings:
+            self.timings[key] = time.ticks_diff(time.ticks_ms(), self._start)
+
+    def poll(self):
+        """Выполняет очередной шаг загрузки"""
+        if self._stage is None:
+            if self._rtc_time_plausible():
+                print('Datetime synchronization skipped: RTC time is plausible')
+                self.timings['ntp_skipped'] = True
+                self.mark('ntp')
+                self._time_discipline.defer()
+            self._start_wlan_connection()
+        elif self._stage == _WLAN:
+            if self._sta_if.isconnected():
+                print(f'Connection successful {self._sta_if.ifconfig()}')
+                self.mark('wlan')
+                self._stage = _DONE if 'ntp_ms' in self.timings else _NTP
+        elif self._stage == _NTP:
+            if time.ticks_diff(time.ticks_ms(), self._next_ntp_attempt) >= 0:
+                self._datetime_synchronization()
+
+    def _start_wlan_connection(self):
+        """Включает интерфейс STA и начинает подключение к сети без ожидания его завершения"""
+        print('Deactivate AP interface')
+        self._ap_if.active(False)
+
+        self._stage = _WLAN
+        if self._sta_if.isconnected():
+            print('Connection already established')
+            return
+
+        print('Activate STA interface...')
+        self._sta_if.active(True)
+        if self._ifconfig:
+            self._sta_if.ifconfig(self._ifconfig)
+
+        print('Connecting to wlan network...')
+        self._sta_if.connect(self._ssid, self._password)
+
+    def _rtc_time_plausible(self) -> bool:
+        """Хранят ли часы DS1307 правдоподобное время (после потери питания батареи оно сбрасывается)"""
+        try:
+            year = self._rtc.get_datetime().year
+        except (OSError, ValueError):
+            return False
+        return PLAUSIBLE_MIN_YEAR <= year <= PLAUSIBLE_MAX_YEAR
+
+    def _datetime_synchronization(self):
+        """Устанавливает время часов DS1307 по NTP"""
+        print('Synchronization of datetime')
+        try:
+            self._time_discipline.synchronize()
+        except OSError as ex:
+            print(f'Failed to synchronization datetime ({ex})')
+            self._next_ntp_attempt = time.ticks_add(time.ticks_ms(), NTP_RETRY_DELAY_MS)
+            return
+
+        self.mark('ntp')
+        self._stage = _DONE
@@ -0,0 +1,178 @@
+import time
+
+import machine
+from micropython import const
+
+SAMPLE_BUFFER_SIZE = const(64)  # должен быть степенью двойки
+
+_NONE = const(0)
+_CALL_STARTED = const(1)
+_CALL_ENDED = const(2)
+
+
+class RingEvent:
+    """Событие распознавания вызова"""
+    NONE = _NONE
+    CALL_STARTED = _CALL_STARTED
+    CALL_ENDED = _CALL_ENDED
+
+
+class RingCadenceDetector:
+    """Распознавание вызова по каденции сигнала оптопары
+
+    Таймер с периодом sample_period_ms записывает состояние оптопары в предвыделенный кольцевой
+    буфер. process() в основном цикле разбирает накопленные отсчёты: подавляет дребезг интегратором
+    на debounce_samples отсчётов и измеряет длительности пачек сигнала и пауз между ними в отсчётах.
+    Вызов начинается, когда пачка длится не меньше min_burst_ms. Вызов заканчивается, когда пауза
+    превышает max_gap_ms, а после второй пачки - измеренную паузу каденции с запасом
+    gap_tolerance_percent, или когда сигнал не пропадает дольше max_burst_ms
+    """
+
+    def __init__(self, optocoupler,
+                 sample_period_ms: int = 10,
+                 debounce_samples: int = 3,
+                 min_burst_ms: int = 100,
+                 max_burst_ms: int = 3000,
+                 max_gap_ms: int = 5000,
+                 gap_tolerance_percent: int = 15):
+        self._optocoupler = optocoupler
+        self._timer = None
+        self.sample_period_ms = sample_period_ms
+        self._debounce = max(debounce_samples, 1)
+        self._min_burst = max(min_burst_ms // sample_period_ms, 1)
+        self._max_burst = max_burst_ms // sample_period_ms
+        self._max_gap = max_gap_ms // sample_period_ms
+        self._gap_tolerance_percent = gap_tolerance_percent
+
+        self._samples = bytearray(SAMPLE_BUFFER_SIZE)
+        self._head = 0
+        self._tail = 0
+        self.lost_samples = 0
+
+        self._integrator = 0
+        self._level = 0
+        self._run = 0
+        self._bursts = 0
+        self._gap_limit = self._max_gap
+        self.ringing = False
+        self.event_ticks_ms = 0
+        self.event_ticks_us = 0
+
+    def start(self, callback=None):
+        """Запускает отсчёты по таймеру (callback заменяет коллбэк таймера, см. RingDetectorGroup)"""
+        if self._timer is None:
+            self._timer = machine.Timer(-1)
+        self._timer.init(period=self.sample_period_ms, callback=callback or self._sample)
+
+    def stop(self):
+        """Останавливает отсчёты"""
+        if self._timer:
+            self._timer.deinit()
+
+    @property
+    def pending(self) -> bool:
+        """Есть ли отсчёты, которые нельзя отложить: сигнал оптопары или распознавание вызова"""
+        if self._tail == self._head:
+            return False
+        return bool(self.ringing or self._integrator or self._samples[(self._head - 1) & (SAMPLE_BUFFER_SIZE - 1)])
+
+    @property
+    def milliseconds_to_overflow(self) -> int:
+        """Время в мс, за которое неразобранные отсчёты займут половину буфера"""
+        queued = (self._head - self._tail) & (SAMPLE_BUFFER_SIZE - 1)
+        return max(SAMPLE_BUFFER_SIZE // 2 - queued, 0) * self.sample_period_ms
+
+    def _sample(self, timer):
+        """Коллбэк таймера: сохраняет отсчёт в кольцевой буфер без выделения памяти"""
+        head = self._head
+        next_head = (head + 1) & (SAMPLE_BUFFER_SIZE - 1)
+        if next_head == self._tail:
+            self.lost_samples += 1
+            return
+        self._samples[head] = self._optocoupler.state
+        self._head = next_head
+
+    def process(self) -> int:
+        """Разбирает накопленные отсчёты до первого события и возвращает его (RingEvent)"""
+        while not self._tail == self._head:
+            sample = self._samples[self._tail]
+            self._tail = (self._tail + 1) & (SAMPLE_BUFFER_SIZE - 1)
+            event = self._step(sample)
+            if event:
+                # время события отсчитывается от текущего момента на число ещё не разобранных отсчётов
+                lag_ms = ((self._head - self._tail) & (SAMPLE_BUFFER_SIZE - 1)) * self.sample_period_ms
+                if event == _CALL_STARTED:
+                    lag_ms += (self._run + self._debounce) * self.sample_period_ms
+                self.event_ticks_ms = time.ticks_add(time.ticks_ms(), -lag_ms)
+                self.event_ticks_us = time.ticks_add(time.ticks_us(), -lag_ms * 1000)
+                return event
+        return _NONE
+
+    def _step(self, sample: int) -> int:
+        """Обрабатывает один отсчёт"""
+        if sample:
+            if self._integrator < self._debounce:
+                self._integrator += 1
+        elif self._integrator > 0:
+            self._integrator -= 1
+
+        if self._level == 0 and self._integrator == self._debounce:
+            self._level = 1
+            if self.ringing and self._bursts:
+                gap_limit = self._run * (100 + self._gap_tolerance_percent) // 100 + self._debounce
+                self._gap_limit = min(gap_limit, self._max_gap)
+            self._run = 0
+        elif self._level == 1 and self._integrator == 0:
+            self._level = 0
+            if self.ringing:
+                self._bursts += 1
+            self._run = 0
+        elif self._run <= self._max_gap or self._run <= self._max_burst:
+            self._run += 1
+
+        if self._level:
+            if not self.ringing and self._run + 1 == self._min_burst:
+                self.ringing = True
+                self._bursts = 0
+                self._gap_limit = self._max_gap
+                return _CALL_STARTED
+            if self.ringing and self._run >= self._max_burst:
+                self.ringing = False
+                return _CALL_ENDED
+        elif self.ringing and self._run >= self._gap_limit:
+            self.ringing = False
+            return _CALL_ENDED
+        return _NONE
+
+
+class RingDetectorGroup:
+    """Общий таймер отсчётов для нескольких детекторов с одинаковым периодом отсчётов
+
+    Блокам домофона не нужен таймер на каждый детектор: коллбэк таймера первого детектора
+    записывает отсчёты всех детекторов группы
+    """
+
+    __slots__ = ('_detectors',)
+
+    def __init__(self, detectors):
+        self._detectors = tuple(detectors)
+        for detector in self._detectors:
+            if not detector.sample_period_ms == self._detectors[0].sample_period_ms:
+                raise ValueError('ring detectors must share sample_period_ms')
+
+    def start(self):
+        """Запускает отсчёты всех детекторов"""
+        if len(self._detectors) == 1:
+            self._detectors[0].start()
+        elif self._detectors:
+            self._detectors[0].start(self._sample)
+
+    def stop(self):
+        """Останавливает отсчёты всех детекторов"""
+        if self._detectors:
+            self._detectors[0].stop()
+
+    def _sample(self, timer):
+        """Коллбэк таймера: сохраняет отсчёт каждого детектора"""
+        for detector in self._detectors:
+            detector._sample(timer)
@@ -0,0 +1,177 @@
+from micropython import const
+
+_SPACE = const(0x20)
+_DASH = const(0x2D)
+_COLON = const(0x3A)
+_ZERO = const(0x30)
+_NINE = const(0x39)
+_H = const(0x68)
+_M = const(0x6D)
+_S = const(0x73)
+
+MAX_DURATION_MS = const(24 * 3600 * 1000)  # сроки отсчитываются по ticks_ms, не больше суток
+
+
+class Argument:
+    """Тип аргумента команды"""
+    NONE = 0
+    DURATION = 1  # <число>[ms|s|m|h], без суффикса - мс, не больше MAX_DURATION_MS
+    TIME_RANGE = 2  # <ЧЧ:ММ>-<ЧЧ:ММ>, минуты от начала суток
+    WORD = 3  # слово без пробелов, передаётся обработчику строкой
+
+
+class Tokenizer:
+    """Разбор аргументов команды по байтам сообщения без выделения памяти"""
+
+    def __init__(self):
+        self._buf = b''
+        self._end = 0
+        self.position = 0
+
+    def reset(self, buf, position: int = 0):
+        self._buf = buf
+        self._end = len(buf)
+        self.position = position
+        self.skip_spaces()
+
+    @property
+    def at_end(self) -> bool:
+        return self.position >= self._end
+
+    def skip_spaces(self):
+        while self.position < self._end and self._buf[self.position] == _SPACE:
+            self.position += 1
+
+    def _peek(self) -> int:
+        return self._buf[self.position] if self.position < self._end else -1
+
+    def expect(self, char: int):
+        """Пропускает ожидаемый символ"""
+        if not self._peek() == char:
+            raise ValueError('unexpected character at', self.position)
+        self.position += 1
+
+    def integer(self) -> int:
+        """Неотрицательное целое число"""
+        value = 0
+        start = self.position
+        char = self._peek()
+        while _ZERO <= char <= _NINE:
+            value = value * 10 + char - _ZERO
+            self.position += 1
+            char = self._peek()
+        if self.position == start:
+            raise ValueError('number expected at', start)
+        return value
+
+    def duration_ms(self) -> int:
+        """Длительность с необязательным суффиксом единиц: ms, s, m или h, не больше MAX_DURATION_MS"""
+        start = self.position
+        value = self.integer()
+        char = self._peek()
+        if char == _M:
+            self.position += 1
+            if self._peek() == _S:
+                self.position += 1
+            else:
+                value *= 60000
+        elif char == _S:
+            self.position += 1
+            value *= 1000
+        elif char == _H:
+            self.position += 1
+            value *= 3600000
+        if value > MAX_DURATION_MS:
+            raise ValueError('duration exceeds 24 h at', start)
+        return value
+
+    def word(self) -> str:
+        """Слово до пробела или конца сообщения"""
+        start = self.position
+        while self.position < self._end and not self._buf[self.position] == _SPACE:
+            self.position += 1
+        if self.position == start:
+            raise ValueError('word expected at', start)
+        return bytes(self._buf[start:self.position]).decode()
+
+    def clock_minutes(self) -> int:
+        """Время суток ЧЧ:ММ в минутах от начала суток"""
+        hour = self.integer()
+        self.expect(_COLON)
+        minute = self.integer()
+        if hour > 23 or minute > 59:
+            raise ValueError('invalid time of day')
+        return hour * 60 + minute
+
+
+class Command:
+    """Команда маршрутизатора"""
+
+    __slots__ = ('handler', 'async_handler', 'argument', 'default')
+
+    def __init__(self, handler, async_handler, argument: int, default):
+        self.handler = handler
+        self.async_handler = async_handler
+        self.argument = argument
+        self.default = default
+
+
+class CommandRouter:
+    """Маршрутизатор команд управления
+
+    Таблица команд строится один раз, команда ищется по байтам сообщения без декодирования.
+    Сообщение имеет вид '<КОМАНДА>[ <аргумент>]', аргумент разбирается согласно типу команды.
+    Обработчики первым аргументом получают объект, которому адресована команда, поэтому одна
+    таблица несвязанных методов обслуживает любое количество объектов
+    """
+
+    def __init__(self):
+        self._commands = {}
+        self._tokenizer = Tokenizer()
+
+    def add(self, name: str, handler, async_handler=None, argument: int = Argument.NONE, default=None):
+        """Регистрирует обработчик команды и, при наличии, его асинхронный вариант"""
+        self._commands[name.encode()] = Command(handler, async_handler, argument, default)
+
+    def dispatch(self, payload: bytes, target, async_runtime: bool = False):
+        """Выполняет команду из сообщения для объекта target
+
+        Для асинхронной среды выполнения возвращает корутину асинхронного обработчика (если он есть),
+        которую нужно запустить отдельной задачей. Неизвестная команда вызывает KeyError,
+        неверный аргумент - ValueError
+        """
+        separator = payload.find(b' ')
+        if separator < 0:
+            command = self._commands[payload]
+            separator = len(payload)
+        else:
+            command = self._commands[payload[:separator]]
+
+        tokenizer = self._tokenizer
+        tokenizer.reset(payload, separator)
+        handler = command.async_handler if async_runtime and command.async_handler else command.handler
+
+        if command.argument == Argument.NONE:
+            self._check_end(tokenizer)
+            result = handler(target)
+        elif command.argument == Argument.DURATION:
+            value = command.default if tokenizer.at_end else tokenizer.duration_ms()
+            self._check_end(tokenizer)
+            result = handler(target, value)
+        elif command.argument == Argument.WORD:
+            value = tokenizer.word()
+            self._check_end(tokenizer)
+            result = handler(target, value)
+        else:
+            start = tokenizer.clock_minutes()
+            tokenizer.expect(_DASH)
+            end = tokenizer.clock_minutes()
+            self._check_end(tokenizer)
+            result = handler(target, start, end)
+        return result if handler is command.async_handler else None
+
+    @staticmethod
+    def _check_end(tokenizer: Tokenizer):
+        tokenizer.skip_spaces()
+        if not tokenizer.at_end:
+            raise ValueError('unexpected argument at', tokenizer.position)
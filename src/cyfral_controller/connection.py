@@ -0,0 +1,65 @@
+import time
+from micropython import const
+
+try:
+    import urandom as random
+except ImportError:
+    import random
+
+RECONNECT_INITIAL_DELAY_MS = const(1000)
+RECONNECT_MAX_DELAY_MS = const(60000)
+
+
+class ConnectionManager:
+    """Менеджер подключения к MQTT серверу
+
+    Попытки подключения выполняются не чаще, чем позволяет экспоненциальная задержка
+    со случайным разбросом ("equal jitter": половина задержки фиксирована, половина случайна),
+    чтобы контроллер не тратил время основного цикла на заведомо неудачные подключения,
+    а несколько контроллеров не переподключались к брокеру одновременно
+    """
+
+    def __init__(self, mqtt_client,
+                 initial_delay_ms: int = RECONNECT_INITIAL_DELAY_MS,
+                 max_delay_ms: int = RECONNECT_MAX_DELAY_MS):
+        self._mqtt_client = mqtt_client
+        self._initial_delay_ms = initial_delay_ms
+        self._max_delay_ms = max_delay_ms
+        self._delay_ms = initial_delay_ms
+        self._next_attempt = time.ticks_ms()
+        self.connected = False
+        self.failures = 0
+
+    @property
+    def attempt_due(self) -> bool:
+        """Пора ли выполнить очередную попытку подключения"""
+        return not self.connected and time.ticks_diff(time.ticks_ms(), self._next_attempt) >= 0
+
+    @property
+    def milliseconds_to_attempt(self) -> int:
+        """Время в мс до очередной попытки подключения"""
+        return max(time.ticks_diff(self._next_attempt, time.ticks_ms()), 0)
+
+    def connect(self):
+        """Подключается к MQTT серверу, при ошибке откладывает следующую попытку и пробрасывает исключение"""
+        try:
+            self._mqtt_client.connect()
+        except OSError:
+            self._schedule_next_attempt()
+            raise
+
+        self.connected = True
+        self.failures = 0
+        self._delay_ms = self._initial_delay_ms
+
+    def connection_lost(self):
+        """Помечает соединение как разорванное; первая попытка переподключения выполняется сразу"""
+        self.connected = False
+        self._next_attempt = time.ticks_ms()
+
+    def _schedule_next_attempt(self):
+        """Откладывает следующую попытку подключения и удваивает задержку"""
+        self.failures += 1
+        half = self._delay_ms // 2
+        self._next_attempt = time.ticks_add(time.ticks_ms(), half + random.getrandbits(16) % (half + 1))
+        self._delay_ms = min(self._delay_ms * 2, self._max_delay_ms)
@@ -1,310 +1,423 @@
-import time
+import json
 import machine
-from datetime import Time
+import time
+from micropython import const
 from umqtt.simple import MQTTClient
 
+from cyfral_controller.boot import BootPipeline
+from cyfral_controller.cadence import RingDetectorGroup
+from cyfral_controller.connection import ConnectionManager
 from cyfral_controller.electronic_components.clock import DS1307
-from cyfral_controller.electronic_components.relays import (
-    Relay,
-    ControlOptocoupler,
-    ControlledOptocoupler
-)
-from cyfral_controller.exceptions import (
-    CyfralControllerException,
-    SwitchSoundModeError,
-    PickUpHandsetError,
-    HangUpHandsetError,
-    PressOpenDoorButtonError
+from cyfral_controller.exceptions import CyfralControllerException
+from cyfral_controller.journal import JOURNAL_EVENT_NAMES, EventJournal, JournalEvent
+from cyfral_controller.metrics import Metrics
+from cyfral_controller.publisher import StatePublisher
+from cyfral_controller.schedule import SoundSchedule
+from cyfral_controller.timekeeping import TimeDiscipline
+from cyfral_controller.timing import DEFAULT_TIMING_PROFILE
+from cyfral_controller.unit import (  # noqa: F401 - перечисления доступны и из модуля контроллера
+    AUTO_OPEN_MODE_DURATION_MS,
+    AutoOpenMode,
+    IntercomState,
+    IntercomUnit,
+    SoundMode,
+    encode_topic,
+    execute_async_command
 )
 from cyfral_controller.utils import blinks
 
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
 
-class SoundMode:
-    """Режим звука"""
-    SILENT = 1
-    AUDIBLE = 2
+try:
+    import uselect as select
+except ImportError:
+    import select
 
+CALL_MONITORING_PERIOD_MS = const(10)
+MQTT_RECEIVE_PERIOD_MS = const(20)
+BOOT_POLL_PERIOD_MS = const(100)
+IDLE_MAX_SLEEP_MS = const(1000)
 
-class AutoOpenMode:
-    """Режим автоматического открытия двери"""
-    DISABLED = 0
-    ENABLED = 1
+# режимы сна основного цикла между событиями (None - цикл опрашивает блоки без пауз)
+IDLE_MODE_POLL = 'poll'
+IDLE_MODE_LIGHTSLEEP = 'lightsleep'
 
 
-class IntercomState:
-    """Состояние домофона"""
-    WAITING_CALL = 1
-    INCOMING_CALL = 2
-    HANDSET_IS_PICK_UP = 3
-    HANDSET_IS_HANG_UP = 4
+class IntercomSupervisor:
+    """Супервизор блоков домофона
 
+    Опрашивает блоки (IntercomUnit) в одном цикле и владеет общими для них MQTT соединением
+    с keepalive, очередью публикации, фоновой загрузкой, синхронизацией времени, журналом
+    событий и метриками. Сообщения распределяются по блокам поиском топика в словаре.
+    С idle_mode основной цикл между событиями спит: ожидает сигнала вызова или данных сокета MQTT
+    (IDLE_MODE_POLL) или переводит плату в machine.lightsleep() (IDLE_MODE_LIGHTSLEEP) до ближайшего срока
+    """
 
-class CyfralController:
-    """Контроллер домофона Cyfral"""
+    __slots__ = (
+        '_units', '_topic_units', '_ring_detectors', '_rtc', '_mqtt_client', '_connection', '_state_publisher',
+        '_mqtt_keepalive_timer', '_mqtt_metrics_topic', '_mqtt_event_journal_topic', '_metrics', '_journal',
+        '_async_runtime', '_boot', '_time_discipline', '_idle_mode', '_poller',
+    )
 
     def __init__(self,
-                 sound_mode_relay_pin: int,
-                 handset_relay_pin: int,
-                 incoming_call_optocoupler_pin: int,
-                 door_opening_optocoupler_pin: int,
+                 units: list,
                  mqtt_client: MQTTClient,
-                 mqtt_incoming_call_state_topic: str,
-                 mqtt_sound_mode_state_topic: str,
-                 mqtt_auto_open_mode_topic: str,
-                 mqtt_control_topic: str,
-                 real_time_clock: DS1307):
-        """Инициализирует атрибуты объекта CyfralController"""
-        self._sound_mode_relay = Relay(sound_mode_relay_pin)
-        self._handset_relay = Relay(handset_relay_pin)
-        self._incoming_call_optocoupler = ControlledOptocoupler(incoming_call_optocoupler_pin)
-        self._door_opening_optocoupler = ControlOptocoupler(door_opening_optocoupler_pin)
+                 real_time_clock: DS1307,
+                 mqtt_metrics_topic: str = None,
+                 metrics_period_ms: int = 60000,
+                 mqtt_event_journal_topic: str = None,
+                 boot: BootPipeline = None,
+                 time_discipline: TimeDiscipline = None,
+                 idle_mode: str = None):
+        """Инициализирует атрибуты объекта IntercomSupervisor"""
+        if idle_mode not in (None, IDLE_MODE_POLL, IDLE_MODE_LIGHTSLEEP):
+            raise ValueError('unknown idle mode', idle_mode)
         self._rtc = real_time_clock
+        self._mqtt_client = mqtt_client
+        self._connection = ConnectionManager(mqtt_client)
+        self._state_publisher = StatePublisher(mqtt_client)
+        self._mqtt_keepalive_timer = machine.Timer(-1)
+        self._mqtt_metrics_topic = encode_topic(mqtt_metrics_topic)
+        self._mqtt_event_journal_topic = encode_topic(mqtt_event_journal_topic)
+
+        self._metrics = Metrics(metrics_period_ms) if mqtt_metrics_topic else None
+        # журнал хранится в ОЗУ микросхемы DS1307 (CachedClock оборачивает её в атрибуте rtc)
+        self._journal = EventJournal(getattr(real_time_clock, 'rtc', real_time_clock)) \
+            if mqtt_event_journal_topic else None
+
+        self._units = tuple(units)
+        self._topic_units = {}
+        for index, unit in enumerate(self._units):
+            unit.attach(self, index, self._state_publisher, real_time_clock, self._metrics)
+            for topic in unit.topics:
+                if topic in self._topic_units:
+                    raise ValueError('topic is used by several units', topic)
+                self._topic_units[topic] = unit
+        self._ring_detectors = RingDetectorGroup(unit.ring_detector for unit in self._units if unit.ring_detector)
+
+        self._boot = boot
+        self._time_discipline = time_discipline
+        if time_discipline:
+            time_discipline.on_time_synchronized = self._time_synchronized
+
+        self._async_runtime = False
+        self._idle_mode = idle_mode
+        self._poller = None
 
-        self._intercom_state = IntercomState.WAITING_CALL
-        self._incoming_call_time = None
+    @property
+    def units(self) -> tuple:
+        """Блоки домофона в порядке их номеров"""
+        return self._units
 
-        self._sound_mode = None
-        self._sound_mode_switch_timer = machine.Timer(-1)
-        self._unmute_time = Time(hour=3)
-        self._mute_time = Time(hour=18)
+    def record_event(self, event: int, unit: int = 0):
+        """Записывает событие в журнал, если оно не может быть сразу передано MQTT серверу"""
+        if not self._journal or self._connection.connected:
+            return
 
-        self._auto_open_mode = AutoOpenMode.DISABLED
-        self._auto_open_mode_timer = machine.Timer(-1)
+        try:
+            self._journal.record(event, self._rtc.get_datetime(), unit)
+        except OSError as ex:
+            print(f'Event journal error: {ex}')
 
-        self._mqtt_client = mqtt_client
-        self._mqtt_connected = False
-        self._mqtt_keepalive_timer = machine.Timer(-1)
-        self._mqtt_control_topic = mqtt_control_topic
-        self._mqtt_incoming_call_state_topic = mqtt_incoming_call_state_topic
-        self._mqtt_sound_mode_state_topic = mqtt_sound_mode_state_topic
-        self._mqtt_auto_open_mode_topic = mqtt_auto_open_mode_topic
+    def flush_states(self):
+        """Публикует накопленные изменения состояний и сообщения из очереди"""
+        if not self._connection.connected or not self._state_publisher.pending:
+            return
+
+        try:
+            self._state_publisher.flush()
+        except OSError as ex:
+            print(f'Publishing state error: {ex}')
+            self._mqtt_connection_error()
 
     def run(self):
-        """Основной цикл контроллера"""
-        self._sound_mode_initialization()
-        self._enable_auto_sound_mode()
+        """Основной цикл супервизора"""
+        self._start_units()
+        if self._boot:
+            self._boot.mark('calls')
 
         while True:
-            if not self._mqtt_connected:
+            if self._boot:
+                self._poll_boot()
+            if self._time_discipline:
+                self._poll_time_discipline()
+
+            if self._metrics:
+                self._metrics.loop_iterations += 1
+                if self._metrics.report_due:
+                    self._publish_metrics()
+
+            for unit in self._units:
+                unit.poll()
+            blinks.poll_error_blink()
+
+            if self._connection.attempt_due and self._network_ready:
                 try:
                     self._connect_to_mqtt_server()
                 except OSError:
-                    blinks.error_blink()
+                    pass
                 else:
                     self._mqtt_keepalive_timer.init(
                         period=self._mqtt_client.keepalive * 1000,
                         callback=self._mqtt_keepalive_ping_callback
                     )
-                    self._subscribe_to_topic(self._mqtt_control_topic)
-                    self._mqtt_components_state_initialization()
-            else:
-                if self._incoming_call:
-                    if self._intercom_state == IntercomState.WAITING_CALL:
-                        self._intercom_state = IntercomState.INCOMING_CALL
-                        self._incoming_call_time = time.ticks_ms()
-                        self._publish_mqtt_message(self._mqtt_incoming_call_state_topic, 'ON')
-                    else:
-                        self._incoming_call_time = time.ticks_ms()
-                else:
-                    if not self._intercom_state == IntercomState.WAITING_CALL:
-                        incoming_call_time_diff = time.ticks_diff(time.ticks_ms(), self._incoming_call_time) // 1000
-                        if incoming_call_time_diff >= 5:
-                            self._intercom_state = IntercomState.WAITING_CALL
-                            self._publish_mqtt_message(self._mqtt_incoming_call_state_topic, 'OFF')
-
-                if self._intercom_state == IntercomState.INCOMING_CALL and self._auto_open_mode == AutoOpenMode.ENABLED:
-                    try:
-                        time.sleep_ms(3000)
-                        self.open_door()
-                    except CyfralControllerException as ex:
-                        print(f'Cyfral controller error: {ex}')
-                        blinks.error_blink()
+                    self._mqtt_session_initialization()
 
+            if self._connection.connected:
                 self._check_mqtt_message()
+                self.flush_states()
+
+            if self._idle_mode:
+                self._idle()
+
+    async def run_async(self):
+        """Асинхронная среда выполнения (uasyncio на устройстве, asyncio в CPython)
+
+        Отслеживание вызова, приём MQTT сообщений, keepalive и расписание звука каждого блока
+        выполняются отдельными задачами, поэтому переключение реле не блокирует остальную работу
+        """
+        self._async_runtime = True
+        self._start_units()
+
+        tasks = [
+            self._call_monitoring_task(),
+            self._mqtt_receive_task(),
+            self._mqtt_keepalive_task(),
+        ]
+        tasks.extend(unit.sound_schedule_task() for unit in self._units)
+        if self._metrics:
+            tasks.append(self._metrics_task())
+        await asyncio.gather(*tasks)
+
+    def _idle(self):
+        """Спит до ближайшего события блоков, соединения, загрузки, синхронизации времени или метрик
+
+        В IDLE_MODE_POLL цикл ждёт в machine.idle(), которая возвращает управление после любого
+        прерывания, в том числе от оптопары вызова, и перед каждым ожиданием проверяет фронты,
+        отсчёты детекторов и сокет MQTT, поэтому вызов публикуется сразу после фронта.
+        Прерывания оптопар не завершают lightsleep(), поэтому в IDLE_MODE_LIGHTSLEEP сон разбит
+        на отрезки CALL_MONITORING_PERIOD_MS, и публикация вызова задерживается до конца отрезка
+        """
+        remaining_ms = self._milliseconds_to_next_event()
+        if not remaining_ms:
+            return
 
-    def mute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
-        """Переводит домофон в режим "Без звука" """
-        if self._sound_mode == SoundMode.SILENT:
-            raise SwitchSoundModeError('Домофон уже находится в беззвучном режиме')
-
-        self._sound_mode_relay.enable()
-        self._sound_mode = SoundMode.SILENT
-
-        if mqtt_payload:
-            self._publish_mqtt_message(self._mqtt_sound_mode_state_topic, 'OFF')
+        start = time.ticks_us()
+        if self._idle_mode == IDLE_MODE_LIGHTSLEEP:
+            while remaining_ms > 0 and not self._input_pending():
+                sleep_ms = min(remaining_ms, CALL_MONITORING_PERIOD_MS)
+                machine.lightsleep(sleep_ms)
+                remaining_ms -= sleep_ms
+        else:
+            self._wait_for_input(remaining_ms)
+        if self._metrics:
+            self._metrics.idle_us += time.ticks_diff(time.ticks_us(), start)
+
+    def _milliseconds_to_next_event(self) -> int:
+        """Время в мс до ближайшего события, которое обрабатывает основной цикл"""
+        timeout = IDLE_MAX_SLEEP_MS
+        boot = self._boot
+        if boot:
+            if not boot.done:
+                timeout = BOOT_POLL_PERIOD_MS
+            elif boot.complete and not boot.reported:
+                return 0
+        if self._time_discipline and self._network_ready and (boot is None or boot.done):
+            timeout = min(self._time_discipline.milliseconds_to_attempt, timeout)
+        if self._metrics:
+            timeout = min(self._metrics.milliseconds_to_report, timeout)
+        if self._connection.connected:
+            if self._state_publisher.pending:
+                return 0
+        elif self._network_ready:
+            timeout = min(self._connection.milliseconds_to_attempt, timeout)
+        for unit in self._units:
+            timeout = unit.milliseconds_to_next_event(timeout)
+        return blinks.milliseconds_to_error_blink_step(timeout)
+
+    def _input_pending(self) -> bool:
+        """Есть ли у какого-либо блока необработанный сигнал вызова"""
+        for unit in self._units:
+            if unit.input_pending:
+                return True
+        return False
+
+    def _wait_for_input(self, timeout_ms: int):
+        """Ждёт до timeout_ms сигнала вызова какого-либо блока или данных сокета MQTT"""
+        deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+        while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            if self._input_pending():
+                return
+            if self._poller is not None:
+                for _ in self._poller.ipoll(0):
+                    return
+            machine.idle()
+
+    def _start_units(self):
+        """Записывает загрузку в журнал, запускает распознавание вызова и звуковые режимы блоков"""
+        self.record_event(JournalEvent.BOOT)
+        self._ring_detectors.start()
+        for unit in self._units:
+            unit.start(self._async_runtime)
+
+    def _mqtt_callback(self, topic, message):
+        """Обратный вызов MQTT подписки: передаёт сообщение блоку, которому принадлежит топик"""
+        unit = self._topic_units.get(topic)
+        if unit is None:
+            return
 
-        if check_auto_mode:
-            if self._determine_sound_mode() == SoundMode.AUDIBLE:
-                self._disable_auto_sound_mode()
-            else:
-                self._enable_auto_sound_mode()
+        if self._metrics:
+            self._metrics.command_received()
 
-        time.sleep_ms(500)
+        try:
+            command = unit.handle_message(topic, message)
+        except KeyError:
+            print(f'Method for "{message.decode()}" command not found')
+        except ValueError as ex:
+            print(f'Invalid command "{message.decode()}": {ex}')
+        except CyfralControllerException as ex:
+            print(f'Cyfral controller error: {ex}')
+            blinks.start_error_blink()
+        else:
+            if command is not None:
+                asyncio.create_task(execute_async_command(command))
 
-    def unmute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
-        """Переводит домофон в режим "Со звуком" """
-        if self._sound_mode == SoundMode.AUDIBLE:
-            raise SwitchSoundModeError('Домофон уже находится в звуковом режиме')
+    async def _call_monitoring_task(self):
+        """Задача отслеживания входящего вызова и автоматического открытия двери блоков,
+        фоновой загрузки и синхронизации времени"""
+        if self._boot:
+            self._boot.mark('calls')
 
-        self._sound_mode_relay.disable()
-        self._sound_mode = SoundMode.AUDIBLE
+        while True:
+            if self._boot:
+                self._poll_boot()
+            if self._time_discipline:
+                self._poll_time_discipline()
+
+            if self._metrics:
+                self._metrics.loop_iterations += 1
+            for unit in self._units:
+                unit.poll_async()
+            blinks.poll_error_blink()
+
+            self.flush_states()
+            await asyncio.sleep(CALL_MONITORING_PERIOD_MS / 1000)
+
+    async def _mqtt_receive_task(self):
+        """Задача подключения к MQTT серверу и приёма сообщений"""
+        while True:
+            if not self._connection.connected:
+                if not self._network_ready:
+                    await asyncio.sleep(MQTT_RECEIVE_PERIOD_MS / 1000)
+                    continue
+                if not self._connection.attempt_due:
+                    await asyncio.sleep(self._connection.milliseconds_to_attempt / 1000)
+                    continue
+                try:
+                    self._connect_to_mqtt_server()
+                except OSError:
+                    continue
+                self._mqtt_session_initialization()
 
-        if mqtt_payload:
-            self._publish_mqtt_message(self._mqtt_sound_mode_state_topic, 'ON')
+            self._check_mqtt_message()
+            self.flush_states()
+            await asyncio.sleep(MQTT_RECEIVE_PERIOD_MS / 1000)
 
-        if check_auto_mode:
-            if self._determine_sound_mode() == SoundMode.SILENT:
-                self._disable_auto_sound_mode()
-            else:
-                self._enable_auto_sound_mode()
+    async def _mqtt_keepalive_task(self):
+        """Задача поддержания соединения с MQTT сервером"""
+        if not self._mqtt_client.keepalive:
+            return
 
-        time.sleep_ms(500)
+        while True:
+            await asyncio.sleep(self._mqtt_client.keepalive)
+            if self._connection.connected:
+                self._mqtt_keepalive_ping_callback(None)
 
-    def open_door(self):
-        """Открывает дверь домофона"""
-        if self._sound_mode == SoundMode.AUDIBLE:
-            self._pick_up_handset()
-            self._press_open_door_button()
-            self._hang_up_handset()
-        else:
-            self._pick_up_handset()
-            self.unmute(mqtt_payload=False, check_auto_mode=False)
-            self._press_open_door_button()
-            self._hang_up_handset()
-            self.mute(mqtt_payload=False, check_auto_mode=False)
+    async def _metrics_task(self):
+        """Задача периодической публикации метрик"""
+        while True:
+            await asyncio.sleep(self._metrics.period_ms / 1000)
+            self._publish_metrics()
 
-    def reject_call(self):
-        """Сбрасывает входящий вызов"""
-        if self._sound_mode == SoundMode.AUDIBLE:
-            self._pick_up_handset()
-            self._hang_up_handset()
-        else:
-            self._pick_up_handset()
-            self.unmute(mqtt_payload=False, check_auto_mode=False)
-            self._hang_up_handset()
-            self.mute(mqtt_payload=False, check_auto_mode=False)
-
-    def _pick_up_handset(self):
-        """Поднимает трубку домофона и переводит контроллер в режим "Трубка поднята"""
-        if not self._intercom_state == IntercomState.INCOMING_CALL:
-            raise PickUpHandsetError('Невозможно снять трубку домофона без входящего звонка')
-
-        self._handset_relay.enable()
-        self._intercom_state = IntercomState.HANDSET_IS_PICK_UP
-        time.sleep_ms(500)
-
-    def _press_open_door_button(self):
-        """Нажимает кнопку открытия двери"""
-        if not self._intercom_state == IntercomState.HANDSET_IS_PICK_UP:
-            raise PressOpenDoorButtonError('Невозможно открыть дверь без снятия трубки домофона')
-
-        self._door_opening_optocoupler.enable()
-        time.sleep_ms(500)
-        self._door_opening_optocoupler.disable()
-
-    def _hang_up_handset(self):
-        """Вешает трубку домофона и переводит контроллер в режим "Трубка повешена"""
-        if not self._intercom_state == IntercomState.HANDSET_IS_PICK_UP:
-            raise HangUpHandsetError('Трубка домофона уже повешена')
-
-        self._handset_relay.disable()
-        self._intercom_state = IntercomState.HANDSET_IS_HANG_UP
-        time.sleep_ms(500)
+    def _publish_metrics(self):
+        """Публикует метрики контроллера за прошедшее окно измерений"""
+        self._state_publisher.enqueue(self._mqtt_metrics_topic, json.dumps(self._metrics.report()))
+        self.flush_states()
 
     @property
-    def _incoming_call(self) -> bool:
-        """Свойство входящего вызова"""
-        if not self._incoming_call_optocoupler.state:
-            return False
-        return True
-
-    def _sound_mode_initialization(self):
-        """Инициализирует звуковой режим"""
-        if self._determine_sound_mode() == SoundMode.AUDIBLE:
-            self._sound_mode = SoundMode.AUDIBLE
-        else:
-            self.mute(mqtt_payload=False, check_auto_mode=False)
-
-    def _determine_sound_mode(self) -> int:
-        """Определяет режим звука относительно текущего времени"""
-        if self._unmute_time < self._rtc.get_datetime().time() < self._mute_time:
-            return SoundMode.AUDIBLE
-        return SoundMode.SILENT
-
-    def _auto_sound_mode_setting_callback(self, timer):
-        """Коллбэк автоматической настройки звукового режима относительно текущего времени"""
-        determined_sound_mode = self._determine_sound_mode()
-        if determined_sound_mode == self._sound_mode:
+    def _network_ready(self) -> bool:
+        """Можно ли подключаться к MQTT серверу (сеть WLAN поднята фоновой загрузкой)"""
+        return self._boot is None or self._boot.network_ready
+
+    def _poll_boot(self):
+        """Выполняет шаг фоновой загрузки и сообщает время этапов после её завершения"""
+        boot = self._boot
+        if not boot.done:
+            boot.poll()
+        if boot.complete and not boot.reported:
+            boot.reported = True
+            print(f'Boot timings: {boot.timings}')
+            if self._mqtt_metrics_topic:
+                self._state_publisher.enqueue(self._mqtt_metrics_topic, json.dumps({'boot': boot.timings}))
+
+    def _poll_time_discipline(self):
+        """Выполняет плановую синхронизацию времени по NTP и публикует статистику ухода часов"""
+        discipline = self._time_discipline
+        if not discipline.attempt_due or not self._network_ready or (self._boot and not self._boot.done):
             return
+        if discipline.poll() and self._mqtt_metrics_topic:
+            self._state_publisher.enqueue(self._mqtt_metrics_topic, json.dumps({'time': discipline.report()}))
 
-        if determined_sound_mode == SoundMode.AUDIBLE:
-            self.unmute(check_auto_mode=False)
-        else:
-            self.mute(check_auto_mode=False)
-
-    def _enable_auto_sound_mode(self):
-        """Включает автоматическое определение звукового режима"""
-        self._sound_mode_switch_timer.init(period=5 * 60000, callback=self._auto_sound_mode_setting_callback)
-
-    def _disable_auto_sound_mode(self):
-        """Отключает автоматическое определение звукового режима"""
-        self._sound_mode_switch_timer.deinit()
-
-    def _auto_open_mode_callback(self, timer):
-        """Коллбэк отключения режима автоматического открытия двери"""
-        self._disable_auto_open_mode()
-
-    def _enable_auto_open_mode(self):
-        """Включает автоматическое открытие двери"""
-        self._auto_open_mode = AutoOpenMode.ENABLED
-        self._auto_open_mode_timer.init(period=30 * 60000, callback=self._auto_open_mode_callback)
-        self._publish_mqtt_message(self._mqtt_auto_open_mode_topic, 'ON')
-
-    def _disable_auto_open_mode(self):
-        """Отключает автоматическое открытие двери"""
-        self._auto_open_mode = AutoOpenMode.DISABLED
-        self._auto_open_mode_timer.deinit()
-        self._publish_mqtt_message(self._mqtt_auto_open_mode_topic, 'OFF')
-
-    def _mqtt_callback(self, _, message):
-        """Обратный вызов MQTT подписки"""
-        command_method_mapper = {
-            'OPEN_DOOR': self.open_door,
-            'REJECT_CALL': self.reject_call,
-            'MUTE_SOUND': self.mute,
-            'UNMUTE_SOUND': self.unmute,
-            'ENABLE_AUTO_OPEN': self._enable_auto_open_mode,
-            'DISABLE_AUTO_OPEN': self._disable_auto_open_mode,
-        }
-
-        message = message.decode()
-        try:
-            command_method_mapper[message]()
-        except KeyError:
-            print(f'Method for "{message}" command not found')
-        except CyfralControllerException as ex:
-            print(f'Cyfral controller error: {ex}')
-            blinks.error_blink()
+    def _time_synchronized(self):
+        """Пересчитывает звуковые режимы блоков после установки времени часов"""
+        for unit in self._units:
+            unit.time_synchronized()
 
     def _connect_to_mqtt_server(self):
         """Подключается в MQTT серверу"""
         try:
-            self._mqtt_client.connect()
-            self._mqtt_connected = True
+            self._connection.connect()
         except OSError as ex:
-            print(f'Server connection error: {ex}')
+            print(f'Server connection error: {ex} (next attempt in {self._connection.milliseconds_to_attempt} ms)')
+            blinks.error_indication(True)
             raise
+        blinks.error_indication(False)
+
+    def _mqtt_session_initialization(self):
+        """Подписывается на топики блоков и публикует текущие состояния после подключения"""
+        if self._boot:
+            self._boot.mark('mqtt')
+        if self._idle_mode == IDLE_MODE_POLL:
+            self._poller = select.poll()
+            self._poller.register(self._mqtt_client.sock, select.POLLIN)
+        for topic in self._topic_units:
+            self._subscribe_to_topic(topic)
+        for unit in self._units:
+            unit.publish_states()
+        self.flush_states()
+        self._replay_event_journal()
+
+    def _replay_event_journal(self):
+        """Публикует одним сообщением события, записанные в журнал без соединения с MQTT сервером"""
+        if not self._journal or not self._connection.connected or not self._journal.pending:
+            return
 
-    def _mqtt_components_state_initialization(self):
-        """Инициализация первоначальных состояний MQTT компонентов"""
-        self._publish_mqtt_message(self._mqtt_incoming_call_state_topic, 'OFF')
-
-        if self._sound_mode == SoundMode.AUDIBLE:
-            self._publish_mqtt_message(self._mqtt_sound_mode_state_topic, 'ON')
-        else:
-            self._publish_mqtt_message(self._mqtt_sound_mode_state_topic, 'OFF')
-
-        self._publish_mqtt_message(self._mqtt_auto_open_mode_topic, 'OFF')
+        try:
+            events = []
+            for event, datetime, unit in self._journal.events():
+                record = {'event': JOURNAL_EVENT_NAMES[event], 'time': datetime.isoformat()}
+                if len(self._units) > 1:
+                    record['unit'] = unit
+                events.append(record)
+            self._mqtt_client.publish(self._mqtt_event_journal_topic, json.dumps(events))
+        except OSError as ex:
+            print(f'Event journal replay error: {ex}')
+            self._mqtt_connection_error()
+            return
+        self._journal.ack()
 
     def _subscribe_to_topic(self, topic_name):
         """Подписывается на MQTT топик"""
@@ -333,15 +446,101 @@ class CyfralController:
             print(f'Check message error: {ex}')
             self._mqtt_connection_error()
 
-    def _publish_mqtt_message(self, topic: str, message: str):
-        """Публикует сообщение в MQTT топик"""
-        try:
-            self._mqtt_client.publish(topic, message)
-        except OSError as ex:
-            print(f'Publishing message error: {ex} (topic: {topic}, message: {message})')
-            self._mqtt_connection_error()
-
     def _mqtt_connection_error(self):
         """Помечает соединение с MQTT сервером как неактивное и отключает keepalive-таймер"""
-        self._mqtt_connected = False
+        self._connection.connection_lost()
+        blinks.error_indication(True)
         self._mqtt_keepalive_timer.deinit()
+        self._poller = None
+
+
+class CyfralController(IntercomSupervisor):
+    """Контроллер домофона Cyfral: супервизор с одним блоком домофона"""
+
+    __slots__ = ()
+
+    def __init__(self,
+                 sound_mode_relay_pin: int,
+                 handset_relay_pin: int,
+                 incoming_call_optocoupler_pin: int,
+                 door_opening_optocoupler_pin: int,
+                 mqtt_client: MQTTClient,
+                 mqtt_incoming_call_state_topic: str,
+                 mqtt_sound_mode_state_topic: str,
+                 mqtt_auto_open_mode_topic: str,
+                 mqtt_control_topic: str,
+                 real_time_clock: DS1307,
+                 incoming_call_irq_mode: bool = True,
+                 mqtt_sequence_state_topic: str = None,
+                 sound_schedule: SoundSchedule = None,
+                 mqtt_sound_schedule_topic: str = None,
+                 mqtt_metrics_topic: str = None,
+                 metrics_period_ms: int = 60000,
+                 mqtt_event_journal_topic: str = None,
+                 ring_cadence: dict = None,
+                 boot: BootPipeline = None,
+                 time_discipline: TimeDiscipline = None,
+                 timing_profile: str = DEFAULT_TIMING_PROFILE,
+                 timing_profiles: dict = None,
+                 idle_mode: str = None):
+        """Инициализирует атрибуты объекта CyfralController"""
+        unit = IntercomUnit(
+            sound_mode_relay_pin=sound_mode_relay_pin,
+            handset_relay_pin=handset_relay_pin,
+            incoming_call_optocoupler_pin=incoming_call_optocoupler_pin,
+            door_opening_optocoupler_pin=door_opening_optocoupler_pin,
+            mqtt_incoming_call_state_topic=mqtt_incoming_call_state_topic,
+            mqtt_sound_mode_state_topic=mqtt_sound_mode_state_topic,
+            mqtt_auto_open_mode_topic=mqtt_auto_open_mode_topic,
+            mqtt_control_topic=mqtt_control_topic,
+            incoming_call_irq_mode=incoming_call_irq_mode,
+            mqtt_sequence_state_topic=mqtt_sequence_state_topic,
+            sound_schedule=sound_schedule,
+            mqtt_sound_schedule_topic=mqtt_sound_schedule_topic,
+            ring_cadence=ring_cadence,
+            timing_profile=timing_profile,
+            timing_profiles=timing_profiles
+        )
+        super().__init__(
+            [unit],
+            mqtt_client,
+            real_time_clock,
+            mqtt_metrics_topic=mqtt_metrics_topic,
+            metrics_period_ms=metrics_period_ms,
+            mqtt_event_journal_topic=mqtt_event_journal_topic,
+            boot=boot,
+            time_discipline=time_discipline,
+            idle_mode=idle_mode
+        )
+
+    def mute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Переводит домофон в режим "Без звука" """
+        self._units[0].mute(mqtt_payload, check_auto_mode)
+
+    def unmute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Переводит домофон в режим "Со звуком" """
+        self._units[0].unmute(mqtt_payload, check_auto_mode)
+
+    def open_door(self):
+        """Открывает дверь домофона"""
+        self._units[0].open_door()
+
+    def reject_call(self):
+        """Сбрасывает входящий вызов"""
+        self._units[0].reject_call()
+
+    async def mute_async(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Асинхронно переводит домофон в режим "Без звука" """
+        await self._units[0].mute_async(mqtt_payload, check_auto_mode)
+
+    async def unmute_async(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Асинхронно переводит домофон в режим "Со звуком" """
+        await self._units[0].unmute_async(mqtt_payload, check_auto_mode)
+
+    async def open_door_async(self, delay_ms: int = 0):
+        """Асинхронно открывает дверь домофона через delay_ms"""
+        await self._units[0].open_door_async(delay_ms)
+
+    async def reject_call_async(self):
+        """Асинхронно сбрасывает входящий вызов"""
+        await self._units[0].reject_call_async()
@@ -1,11 +1,19 @@
+import time
+from array import array
+
 from micropython import const
 
-from datetime import Datetime
+from datetime import Datetime, Timedelta
 
 DATETIME_REG = const(0)  # 0x00-0x06
 CHIP_HALT = const(128)
 CONTROL_REG = const(7)  # 0x07
 RAM_REG = const(8)  # 0x08-0x3F
+RAM_SIZE = const(56)
+
+# BCD lookup tables for every byte value
+_BCD2DEC = bytes(((value >> 4) * 10) + (value & 0x0F) for value in range(256))
+_DEC2BCD = bytes((((value // 10) % 10) << 4 | (value % 10)) for value in range(256))
 
 
 class DS1307:
@@ -16,40 +24,60 @@ class DS1307:
         self.addr = addr
         self.weekday_start = 1
         self._halt = False
+        self._datetime_buf = bytearray(7)
+        self._reg_buf = bytearray(1)
+        self._fields = array('H', (0 for _ in range(7)))
 
     @staticmethod
     def _dec2bcd(value):
         """Convert decimal to binary coded decimal (BCD) format"""
-        return (value // 10) << 4 | (value % 10)
+        return _DEC2BCD[value]
 
     @staticmethod
     def _bcd2dec(value):
         """Convert binary coded decimal (BCD) format to decimal"""
-        return ((value >> 4) * 10) + (value & 0x0F)
+        return _BCD2DEC[value]
 
     def set_datetime(self, datetime: Datetime) -> None:
         """Set datetime"""
-        buf = bytearray(7)
-        buf[0] = self._dec2bcd(datetime.second) & 0x7F  # second, msb = CH, 1=halt, 0=go
-        buf[1] = self._dec2bcd(datetime.minute)
-        buf[2] = self._dec2bcd(datetime.hour)
-        buf[4] = self._dec2bcd(datetime.day)
-        buf[5] = self._dec2bcd(datetime.month)
-        buf[6] = self._dec2bcd(datetime.year - 2000)
+        buf = self._datetime_buf
+        buf[0] = _DEC2BCD[datetime.second] & 0x7F  # second, msb = CH, 1=halt, 0=go
+        buf[1] = _DEC2BCD[datetime.minute]
+        buf[2] = _DEC2BCD[datetime.hour]
+        buf[3] = 0
+        buf[4] = _DEC2BCD[datetime.day]
+        buf[5] = _DEC2BCD[datetime.month]
+        buf[6] = _DEC2BCD[datetime.year - 2000]
         if self._halt:
             buf[0] |= (1 << 7)
         self.i2c.writeto_mem(self.addr, DATETIME_REG, buf)
 
+    def read_fields_into(self, fields):
+        """Read datetime into a preallocated array without building a Datetime.
+
+        Fields follow the internal RTC order: year, month, day, weekday, hour, minute, second.
+        """
+        buf = self._datetime_buf
+        self.i2c.readfrom_mem_into(self.addr, DATETIME_REG, buf)
+        fields[0] = _BCD2DEC[buf[6]] + 2000
+        fields[1] = _BCD2DEC[buf[5]]
+        fields[2] = _BCD2DEC[buf[4]]
+        fields[3] = _BCD2DEC[buf[3] & 0x07]
+        fields[4] = _BCD2DEC[buf[2] & 0x3F]
+        fields[5] = _BCD2DEC[buf[1]]
+        fields[6] = _BCD2DEC[buf[0] & 0x7F]
+        return fields
+
     def get_datetime(self) -> Datetime:
         """Get datetime"""
-        buf = self.i2c.readfrom_mem(self.addr, DATETIME_REG, 7)
+        fields = self.read_fields_into(self._fields)
         return Datetime(
-            year=self._bcd2dec(buf[6]) + 2000,
-            month=self._bcd2dec(buf[5]),
-            day=self._bcd2dec(buf[4]),
-            hour=self._bcd2dec(buf[2]),
-            minute=self._bcd2dec(buf[1]),
-            second=self._bcd2dec(buf[0] & 0x7F),
+            year=fields[0],
+            month=fields[1],
+            day=fields[2],
+            hour=fields[4],
+            minute=fields[5],
+            second=fields[6],
             microsecond=0
         )
 
@@ -57,13 +85,26 @@ class DS1307:
         """Power up, power down or check status"""
         if val is None:
             return self._halt
-        reg = self.i2c.readfrom_mem(self.addr, DATETIME_REG, 1)[0]
+        reg_buf = self._reg_buf
+        self.i2c.readfrom_mem_into(self.addr, DATETIME_REG, reg_buf)
         if val:
-            reg |= CHIP_HALT
+            reg_buf[0] |= CHIP_HALT
         else:
-            reg &= ~CHIP_HALT
+            reg_buf[0] &= ~CHIP_HALT
         self._halt = bool(val)
-        self.i2c.writeto_mem(self.addr, DATETIME_REG, bytearray([reg]))
+        self.i2c.writeto_mem(self.addr, DATETIME_REG, reg_buf)
+
+    def read_ram_into(self, offset: int, buf) -> None:
+        """Read battery-backed RAM starting at offset into buf in a single transaction"""
+        if offset < 0 or offset + len(buf) > RAM_SIZE:
+            raise ValueError('RAM range out of bounds')
+        self.i2c.readfrom_mem_into(self.addr, RAM_REG + offset, buf)
+
+    def write_ram(self, offset: int, buf) -> None:
+        """Write buf to battery-backed RAM starting at offset in a single burst transaction"""
+        if offset < 0 or offset + len(buf) > RAM_SIZE:
+            raise ValueError('RAM range out of bounds')
+        self.i2c.writeto_mem(self.addr, RAM_REG + offset, buf)
 
     def square_wave(self, sqw=0, out=0):
         """Output square wave on pin SQ at 1Hz, 4.096kHz, 8.192kHz or 32.768kHz,
@@ -72,5 +113,70 @@ class DS1307:
         rs1 = 1 if sqw == 8 or sqw == 32 else 0
         out = 1 if out > 0 else 0
         sqw = 1 if sqw > 0 else 0
-        reg = rs0 | rs1 << 1 | sqw << 4 | out << 7
-        self.i2c.writeto_mem(self.addr, CONTROL_REG, bytearray([reg]))
+        self._reg_buf[0] = rs0 | rs1 << 1 | sqw << 4 | out << 7
+        self.i2c.writeto_mem(self.addr, CONTROL_REG, self._reg_buf)
+
+
+class CachedClock:
+    """Clock facade over the DS1307.
+
+    Reads the chip once and derives the current datetime from time.ticks_ms() deltas.
+    The chip is re-read after resync_interval_ms or when a ticks wraparound is detected.
+    Chip readings are corrected by the offset and drift passed to set_correction().
+    """
+
+    def __init__(self, rtc: DS1307, resync_interval_ms: int = 3600000):
+        self.rtc = rtc
+        self.resync_interval_ms = resync_interval_ms
+        self._base_datetime = None
+        self._base_ticks = 0
+        self._last_ticks = 0
+        self._reference = None
+        self._offset_us = 0
+        self._drift_ppm = 0.0
+
+    def set_correction(self, reference: Datetime, offset_us: int = 0, drift_ppm: float = 0.0) -> None:
+        """Correct chip readings by a known offset and drift.
+
+        A chip reading taken t seconds after reference is moved back by offset_us + t * drift_ppm microseconds.
+        """
+        self._reference = reference
+        self._offset_us = offset_us
+        self._drift_ppm = drift_ppm
+        self._base_datetime = None
+
+    def resync(self) -> None:
+        """Re-read datetime from the chip"""
+        datetime = self.rtc.get_datetime()
+        if self._reference is not None:
+            elapsed = datetime - self._reference
+            correction_us = self._offset_us + int((elapsed.days * 86400 + elapsed.seconds) * self._drift_ppm)
+            if correction_us:
+                datetime -= Timedelta(microseconds=correction_us)
+        self._base_datetime = datetime
+        self._base_ticks = time.ticks_ms()
+        self._last_ticks = self._base_ticks
+
+    def get_datetime(self) -> Datetime:
+        """Get datetime derived from the last chip reading"""
+        now = time.ticks_ms()
+        elapsed = time.ticks_diff(now, self._base_ticks)
+        if (self._base_datetime is None or now < self._last_ticks
+                or elapsed < 0 or elapsed >= self.resync_interval_ms):
+            self.resync()
+            return self._base_datetime
+
+        self._last_ticks = now
+        return self._base_datetime + Timedelta(milliseconds=elapsed)
+
+    def set_datetime(self, datetime: Datetime) -> None:
+        """Set datetime on the chip and drop the cached reading and correction"""
+        self.rtc.set_datetime(datetime)
+        self._reference = None
+        self._base_datetime = None
+
+    def halt(self, val=None):
+        """Power up, power down or check status"""
+        result = self.rtc.halt(val)
+        self._base_datetime = None
+        return result
@@ -1,32 +1,68 @@
+import sys
+import time
+from array import array
+
+import machine
 from machine import Pin
+from micropython import const
+
+EDGE_BUFFER_SIZE = const(16)  # должен быть степенью двойки
+
+# Регистр выходов GPIO (адрес, число выводов в нём): ESP8266 GPIO_OUT (GPIO16 - вывод RTC, вне регистра),
+# ESP32 GPIO_OUT_REG (выводы 32-39 - в GPIO_OUT1_REG), ESP32-S2/S3/C3 GPIO_OUT_REG
+ESP8266_GPIO_OUT = (0x60000300, 16)
+ESP32_GPIO_OUT = (0x3FF44004, 32)
+ESP32_S_C_GPIO_OUT = (0x60004004, 32)
+
+_RELAY_DISABLED = const(0)
+_RELAY_ENABLED = const(1)
 
 
 class RelayState:
     """Состояние реле"""
-    DISABLED = 0
-    ENABLED = 1
+    DISABLED = _RELAY_DISABLED
+    ENABLED = _RELAY_ENABLED
+
+
+def gpio_out_register():
+    """Регистр выходов GPIO текущей платы или None, если запись в регистр не поддерживается"""
+    if not hasattr(machine, 'mem32'):
+        return None
+    if sys.platform == 'esp8266':
+        return ESP8266_GPIO_OUT
+    if sys.platform == 'esp32':
+        import os
+
+        board = os.uname().machine
+        if 'ESP32S2' in board or 'ESP32S3' in board or 'ESP32C3' in board:
+            return ESP32_S_C_GPIO_OUT
+        return ESP32_GPIO_OUT
+    return None
 
 
 class Relay:
     """Реле"""
 
+    __slots__ = ('state', 'pin', '_machine_control_pin')
+
     def __init__(self, control_pin: int):
-        self.state = RelayState.DISABLED
+        self.state = _RELAY_DISABLED
+        self.pin = control_pin
         self._machine_control_pin = Pin(control_pin, Pin.OUT, value=0)
 
     def enable(self):
         """Включить реле"""
-        self.state = RelayState.ENABLED
+        self.state = _RELAY_ENABLED
         self._machine_control_pin.on()
 
     def disable(self):
         """Выключить реле"""
-        self.state = RelayState.DISABLED
+        self.state = _RELAY_DISABLED
         self._machine_control_pin.off()
 
     def switch(self):
         """Переключить состояние реле"""
-        if self.state == RelayState.DISABLED:
+        if self.state == _RELAY_DISABLED:
             self.enable()
         else:
             self.disable()
@@ -36,12 +72,124 @@ class ControlOptocoupler(Relay):
     """Управляющая оптопара"""
 
 
+class RelayTransition:
+    """Набор переключений реле банка: маски выводов вычисляются один раз при создании"""
+
+    __slots__ = ('enable', 'disable', 'set_mask', 'clear_mask')
+
+    def __init__(self, enable: tuple, disable: tuple, register_width: int):
+        self.enable = enable
+        self.disable = disable
+        self.set_mask = self._mask(enable, register_width)
+        self.clear_mask = self._mask(disable, register_width)
+        if self.set_mask is None or self.clear_mask is None:
+            # вывод вне регистра: переключения выполняются по одному
+            self.set_mask = self.clear_mask = None
+
+    @staticmethod
+    def _mask(relays: tuple, register_width: int):
+        mask = 0
+        for relay in relays:
+            if relay.pin >= register_width:
+                return None
+            mask |= 1 << relay.pin
+        return mask
+
+
+class RelayBank:
+    """Группа реле и управляющих оптопар, переключаемых одной записью в регистр выходов GPIO
+
+    Переход RelayTransition применяется чтением-изменением-записью регистра GPIO_OUT при
+    запрещённых прерываниях, поэтому все выводы перехода меняются одновременно и промежуточных
+    состояний (трубка снята, а реле звука ещё не переключено) нет. Если регистр платы неизвестен
+    или вывод в него не входит, выводы переключаются по одному без пауз
+    """
+
+    __slots__ = ('_register', '_register_width')
+
+    def __init__(self, register: tuple = None):
+        if register is None:
+            register = gpio_out_register()
+        self._register = register[0] if register else None
+        self._register_width = register[1] if register else 0
+
+    def transition(self, enable: tuple = (), disable: tuple = ()) -> RelayTransition:
+        """Создаёт переход, включающий реле enable и выключающий реле disable"""
+        return RelayTransition(enable, disable, self._register_width)
+
+    def apply(self, transition: RelayTransition):
+        """Применяет переход"""
+        if transition.set_mask is None:
+            for relay in transition.enable:
+                relay.enable()
+            for relay in transition.disable:
+                relay.disable()
+            return
+
+        irq_state = machine.disable_irq()
+        try:
+            machine.mem32[self._register] = \
+                machine.mem32[self._register] & ~transition.clear_mask | transition.set_mask
+        finally:
+            machine.enable_irq(irq_state)
+        for relay in transition.enable:
+            relay.state = _RELAY_ENABLED
+        for relay in transition.disable:
+            relay.state = _RELAY_DISABLED
+
+
 class ControlledOptocoupler:
     """Управляемая оптопара"""
 
-    def __init__(self, state_pin: int):
+    __slots__ = ('_machine_state_pin', 'irq_mode', '_edge_ticks', '_edge_ticks_us', '_edge_states',
+                 '_edge_head', '_edge_tail', 'lost_edges', 'last_state')
+
+    def __init__(self, state_pin: int, irq_mode: bool = False):
         self._machine_state_pin = Pin(state_pin, Pin.IN)
+        self.irq_mode = irq_mode
+
+        self._edge_ticks = array('l', (0 for _ in range(EDGE_BUFFER_SIZE)))
+        self._edge_ticks_us = array('l', (0 for _ in range(EDGE_BUFFER_SIZE)))
+        self._edge_states = bytearray(EDGE_BUFFER_SIZE)
+        self._edge_head = 0
+        self._edge_tail = 0
+        self.lost_edges = 0
+        self.last_state = self._machine_state_pin.value()
+
+        if irq_mode:
+            self._machine_state_pin.irq(
+                handler=self._edge_handler,
+                trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING
+            )
 
     @property
     def state(self) -> int:
         return self._machine_state_pin.value()
+
+    @property
+    def has_edges(self) -> bool:
+        """Наличие необработанных фронтов в кольцевом буфере"""
+        return self._edge_head != self._edge_tail
+
+    def pop_edge(self) -> tuple:
+        """Извлекает из кольцевого буфера самый старый фронт в виде (состояние, ticks_ms, ticks_us)"""
+        tail = self._edge_tail
+        edge = self._edge_states[tail], self._edge_ticks[tail], self._edge_ticks_us[tail]
+        self._edge_tail = (tail + 1) & (EDGE_BUFFER_SIZE - 1)
+        return edge
+
+    def _edge_handler(self, pin):
+        """Обработчик прерывания: сохраняет состояние пина и время фронта без выделения памяти"""
+        state = pin.value()
+        self.last_state = state
+
+        head = self._edge_head
+        next_head = (head + 1) & (EDGE_BUFFER_SIZE - 1)
+        if next_head == self._edge_tail:
+            self.lost_edges += 1
+            return
+
+        self._edge_ticks[head] = time.ticks_ms()
+        self._edge_ticks_us[head] = time.ticks_us()
+        self._edge_states[head] = state
+        self._edge_head = next_head
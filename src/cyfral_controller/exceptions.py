@@ -1,9 +1,25 @@
 class CyfralControllerException(Exception):
-    """Базовое исключение контроллера домофона Cyfral"""
+    """Базовое исключение контроллера домофона Cyfral
+
+    Исключение хранит только номер сообщения из messages (и аргументы для его форматирования),
+    текст формируется лишь при преобразовании исключения в строку
+    """
+    messages = ()
+
+    def __str__(self):
+        args = self.args
+        if not args or isinstance(args[0], int):
+            code = args[0] if args else 0
+            if 0 <= code < len(self.messages):
+                return self.messages[code].format(*args[1:])
+        return ' '.join(str(arg) for arg in args)
 
 
 class SwitchSoundModeError(CyfralControllerException):
     """Ошибка переключения режима звука"""
+    ALREADY_SILENT = 0
+    ALREADY_AUDIBLE = 1
+    messages = ('Домофон уже находится в беззвучном режиме', 'Домофон уже находится в звуковом режиме')
 
 
 class HandsetException(CyfralControllerException):
@@ -12,11 +28,19 @@ class HandsetException(CyfralControllerException):
 
 class PickUpHandsetError(HandsetException):
     """Ошибка снятия трубки домофона"""
+    messages = ('Невозможно снять трубку домофона без входящего звонка',)
 
 
 class HangUpHandsetError(HandsetException):
     """Ошибка повешения трубки домофона"""
+    messages = ('Трубка домофона уже повешена',)
 
 
 class PressOpenDoorButtonError(CyfralControllerException):
     """Ошибка нажатия кнопки открытия двери"""
+    messages = ('Невозможно открыть дверь без снятия трубки домофона',)
+
+
+class SequenceInProgressError(CyfralControllerException):
+    """Ошибка запуска последовательности во время выполнения другой"""
+    messages = ('Последовательность {} ещё выполняется',)
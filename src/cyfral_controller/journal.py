@@ -0,0 +1,130 @@
+from micropython import const
+
+from datetime import Date, Datetime, Timedelta
+
+JOURNAL_MAGIC = const(0xCF)
+RECORD_SIZE = const(6)
+RECORDS_OFFSET = const(2)
+JOURNAL_CAPACITY = const(9)  # (56 байт ОЗУ - 2 байта заголовка) // 6 байт записи
+SEQUENCE_WRAP = const(252)  # кратно JOURNAL_CAPACITY, чтобы номер записи определял её ячейку
+EVENT_MASK = const(0x0F)  # младшие биты кода - событие, старшие - номер блока домофона
+UNIT_SHIFT = const(4)
+
+EPOCH_ORDINAL = Date(2000, 1, 1).toordinal()
+
+
+class JournalEvent:
+    """Событие журнала"""
+    BOOT = 1
+    INCOMING_CALL = 2
+    DOOR_OPENED = 3
+    SOUND_MUTED = 4
+    SOUND_UNMUTED = 5
+    AUTO_OPEN_ENABLED = 6
+    AUTO_OPEN_DISABLED = 7
+
+
+JOURNAL_EVENT_NAMES = (
+    None, 'BOOT', 'INCOMING_CALL', 'DOOR_OPENED', 'SOUND_MUTED', 'SOUND_UNMUTED',
+    'AUTO_OPEN_ENABLED', 'AUTO_OPEN_DISABLED',
+)
+
+
+def _distance(first: int, second: int) -> int:
+    """Количество записей от номера first до номера second"""
+    return (second - first) % SEQUENCE_WRAP
+
+
+def _next_sequence(sequence: int) -> int:
+    return sequence % SEQUENCE_WRAP + 1
+
+
+class EventJournal:
+    """Кольцевой журнал событий в ОЗУ DS1307 с питанием от батареи
+
+    Формат ОЗУ: байт признака журнала, номер последней переданной записи и 9 записей
+    по 6 байт (номер записи, код события, время в секундах от 2000-01-01). Ячейка записи
+    вычисляется по её номеру, поэтому добавление события - одна пакетная запись по I2C.
+    При переполнении самые старые непереданные записи перезаписываются
+    """
+
+    def __init__(self, rtc):
+        self._rtc = rtc
+        self._record_buf = bytearray(RECORD_SIZE)
+        self._ack_buf = bytearray(1)
+        self._last = 0
+        self._acked = 0
+        self.load()
+
+    def load(self):
+        """Читает журнал из ОЗУ часов, при отсутствии журнала размечает ОЗУ"""
+        ram = bytearray(RECORDS_OFFSET + JOURNAL_CAPACITY * RECORD_SIZE)
+        self._rtc.read_ram_into(0, ram)
+        if not ram[0] == JOURNAL_MAGIC or ram[1] > SEQUENCE_WRAP:
+            ram = bytearray(len(ram))
+            ram[0] = JOURNAL_MAGIC
+            self._rtc.write_ram(0, ram)
+
+        self._acked = ram[1]
+        sequences = set()
+        for slot in range(JOURNAL_CAPACITY):
+            sequence = ram[RECORDS_OFFSET + slot * RECORD_SIZE]
+            if sequence and sequence <= SEQUENCE_WRAP and (sequence - 1) % JOURNAL_CAPACITY == slot:
+                sequences.add(sequence)
+
+        self._last = self._acked
+        for sequence in sequences:
+            if _next_sequence(sequence) not in sequences:
+                self._last = sequence
+                break
+
+    @property
+    def pending(self) -> int:
+        """Количество непереданных записей"""
+        return min(_distance(self._acked, self._last), JOURNAL_CAPACITY)
+
+    def record(self, event: int, datetime: Datetime, unit: int = 0):
+        """Добавляет событие блока домофона unit (0-15), произошедшее в момент datetime"""
+        sequence = _next_sequence(self._last)
+        timestamp = ((datetime.toordinal() - EPOCH_ORDINAL) * 86400
+                     + datetime.hour * 3600 + datetime.minute * 60 + datetime.second)
+
+        buf = self._record_buf
+        buf[0] = sequence
+        buf[1] = event | unit << UNIT_SHIFT
+        buf[2] = (timestamp >> 24) & 0xFF
+        buf[3] = (timestamp >> 16) & 0xFF
+        buf[4] = (timestamp >> 8) & 0xFF
+        buf[5] = timestamp & 0xFF
+        self._rtc.write_ram(RECORDS_OFFSET + (sequence - 1) % JOURNAL_CAPACITY * RECORD_SIZE, buf)
+        self._last = sequence
+
+    def events(self) -> list:
+        """Непереданные события от старых к новым: список троек (код события, Datetime, номер блока)"""
+        count = self.pending
+        if not count:
+            return []
+
+        ram = bytearray(JOURNAL_CAPACITY * RECORD_SIZE)
+        self._rtc.read_ram_into(RECORDS_OFFSET, ram)
+        epoch = Datetime.fromordinal(EPOCH_ORDINAL)
+        events = []
+        sequence = self._last
+        for _ in range(count - 1):
+            sequence = (sequence - 2) % SEQUENCE_WRAP + 1
+        for _ in range(count):
+            offset = (sequence - 1) % JOURNAL_CAPACITY * RECORD_SIZE
+            code = ram[offset + 1]
+            event = code & EVENT_MASK
+            # запись с чужим номером или неизвестным кодом события испорчена и пропускается
+            if ram[offset] == sequence and 0 < event < len(JOURNAL_EVENT_NAMES):
+                timestamp = ram[offset + 2] << 24 | ram[offset + 3] << 16 | ram[offset + 4] << 8 | ram[offset + 5]
+                events.append((event, epoch + Timedelta(seconds=timestamp), code >> UNIT_SHIFT))
+            sequence = _next_sequence(sequence)
+        return events
+
+    def ack(self):
+        """Отмечает все записи журнала как переданные"""
+        self._acked = self._last
+        self._ack_buf[0] = self._acked
+        self._rtc.write_ram(1, self._ack_buf)
@@ -0,0 +1,140 @@
+import gc
+import time
+from array import array
+
+# Верхние границы корзин гистограммы задержек, мкс
+LATENCY_BUCKETS_US = (
+    250, 500, 1000, 2000, 5000, 10000, 20000, 50000,
+    100000, 200000, 500000, 1000000, 2000000, 5000000,
+)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами в предвыделенных массивах"""
+
+    def __init__(self, bounds_us: tuple = LATENCY_BUCKETS_US):
+        self._bounds = array('l', bounds_us)
+        self._counts = array('L', (0 for _ in range(len(bounds_us) + 1)))
+        self.count = 0
+        self.max_us = 0
+
+    def add(self, latency_us: int):
+        """Учитывает задержку latency_us"""
+        bounds = self._bounds
+        index = 0
+        while index < len(bounds) and latency_us > bounds[index]:
+            index += 1
+        self._counts[index] += 1
+        self.count += 1
+        if latency_us > self.max_us:
+            self.max_us = latency_us
+
+    def percentile(self, percent: int) -> int:
+        """Верхняя граница корзины, в которую попадает заданный процентиль"""
+        if not self.count:
+            return 0
+        rank = (self.count * percent + 99) // 100
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self._bounds[index], self.max_us) if index < len(self._bounds) else self.max_us
+        return self.max_us
+
+    def summary(self) -> dict:
+        return {
+            'n': self.count,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max_us,
+        }
+
+    def reset(self):
+        for index in range(len(self._counts)):
+            self._counts[index] = 0
+        self.count = 0
+        self.max_us = 0
+
+
+class Metrics:
+    """Метрики контроллера: задержки "вызов → публикация", "команда → кнопка открытия двери",
+    "команда → отпускание кнопки" по профилям длительностей, частота итераций основного цикла,
+    доля времени бодрствования (duty cycle) и свободная память
+    """
+
+    def __init__(self, period_ms: int = 60000):
+        self.period_ms = period_ms
+        self.call_to_publish = LatencyHistogram()
+        self.command_to_door_button = LatencyHistogram()
+        self.command_to_door_release = {}
+        self.loop_iterations = 0
+        self.idle_us = 0
+        self.command_received_us = None
+        self._message_us = None
+        self._door_command_us = None
+        self._window_start = time.ticks_ms()
+
+    @property
+    def report_due(self) -> bool:
+        return time.ticks_diff(time.ticks_ms(), self._window_start) >= self.period_ms
+
+    @property
+    def milliseconds_to_report(self) -> int:
+        """Время в мс до конца окна измерений"""
+        return max(self.period_ms - time.ticks_diff(time.ticks_ms(), self._window_start), 0)
+
+    def command_received(self):
+        """Отмечает момент получения сообщения; отметка предыдущей команды OPEN_DOOR сбрасывается"""
+        self._message_us = time.ticks_us()
+        self.command_received_us = None
+
+    def door_command_dispatched(self):
+        """Отмечает, что полученное сообщение - команда OPEN_DOOR: от него считаются задержки кнопки"""
+        self.command_received_us = self._message_us
+
+    def door_opened_automatically(self):
+        """Сбрасывает отметку команды: нажатие кнопки автоматическим открытием не учитывается"""
+        self.command_received_us = None
+
+    def door_button_pressed(self):
+        """Учитывает задержку от получения команды до нажатия кнопки открытия двери"""
+        if self.command_received_us is not None:
+            self.command_to_door_button.add(time.ticks_diff(time.ticks_us(), self.command_received_us))
+            self._door_command_us = self.command_received_us
+            self.command_received_us = None
+
+    def door_button_released(self, profile: str):
+        """Учитывает задержку от получения команды до отпускания кнопки открытия двери для профиля profile"""
+        if self._door_command_us is None:
+            return
+        histogram = self.command_to_door_release.get(profile)
+        if histogram is None:
+            histogram = self.command_to_door_release[profile] = LatencyHistogram()
+        histogram.add(time.ticks_diff(time.ticks_us(), self._door_command_us))
+        self._door_command_us = None
+
+    def report(self) -> dict:
+        """Формирует отчёт за окно измерений и начинает новое окно"""
+        now = time.ticks_ms()
+        elapsed_ms = time.ticks_diff(now, self._window_start) or 1
+        mem_free = getattr(gc, 'mem_free', None)
+        report = {
+            'loop_hz': self.loop_iterations * 1000 // elapsed_ms,
+            'duty_cycle_percent': 100 - min(self.idle_us // (elapsed_ms * 10), 100),
+            'mem_free': mem_free() if mem_free else None,
+            'call_to_publish_us': self.call_to_publish.summary(),
+            'command_to_door_button_us': self.command_to_door_button.summary(),
+            'command_to_door_release_us': {
+                profile: histogram.summary() for profile, histogram in self.command_to_door_release.items()
+            },
+        }
+
+        self.call_to_publish.reset()
+        self.command_to_door_button.reset()
+        for histogram in self.command_to_door_release.values():
+            histogram.reset()
+        self.loop_iterations = 0
+        self.idle_us = 0
+        self._window_start = now
+        return report
@@ -0,0 +1,58 @@
+from micropython import const
+
+MAX_QUEUED_MESSAGES = const(16)
+
+
+class StatePublisher:
+    """Публикатор состояний и очередь исходящих сообщений
+
+    Хранит последнее опубликованное значение каждого топика и отбрасывает повторы,
+    а изменения, накопившиеся между вызовами flush(), публикует одним сообщением
+    на топик. Состояния публикуются с флагом retain, поэтому подписчики получают их
+    от брокера без повторной публикации после переподключения.
+
+    Прочие сообщения (например, метрики) ставятся в ограниченную очередь: пока нет
+    соединения, они накапливаются, при переполнении отбрасываются самые старые
+    """
+
+    def __init__(self, mqtt_client, retain: bool = True, max_queued: int = MAX_QUEUED_MESSAGES):
+        self._mqtt_client = mqtt_client
+        self._retain = retain
+        self._published = {}
+        self._pending = {}
+        self._queue = []
+        self._max_queued = max_queued
+        self.dropped = 0
+
+    def set(self, topic: str, payload: str):
+        """Запоминает новое значение состояния для публикации"""
+        if self._published.get(topic) == payload:
+            self._pending.pop(topic, None)
+        else:
+            self._pending[topic] = payload
+
+    def enqueue(self, topic: str, payload: str):
+        """Ставит сообщение в очередь публикации, при переполнении вытесняя самое старое"""
+        if len(self._queue) >= self._max_queued:
+            self._queue.pop(0)
+            self.dropped += 1
+        self._queue.append((topic, payload))
+
+    @property
+    def pending(self) -> bool:
+        """Есть ли неопубликованные изменения или сообщения"""
+        return bool(self._pending) or bool(self._queue)
+
+    def flush(self):
+        """Публикует накопленные изменения и сообщения, при ошибке неопубликованные остаются в очереди"""
+        while self._pending:
+            topic = next(iter(self._pending))
+            payload = self._pending[topic]
+            self._mqtt_client.publish(topic, payload, retain=self._retain)
+            self._published[topic] = payload
+            del self._pending[topic]
+
+        while self._queue:
+            topic, payload = self._queue[0]
+            self._mqtt_client.publish(topic, payload)
+            self._queue.pop(0)
@@ -0,0 +1,193 @@
+from array import array
+
+from micropython import const
+
+from datetime import Date, Datetime, Time
+
+DAY_MINUTES = const(24 * 60)
+WEEK_MINUTES = const(7 * 24 * 60)
+ALL_WEEKDAYS = '1234567'
+
+
+def _bisect_right(boundaries, value) -> int:
+    """Индекс первой границы, строго большей value (boundaries отсортирован)"""
+    low, high = 0, len(boundaries)
+    while low < high:
+        middle = (low + high) >> 1
+        if value < boundaries[middle]:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _compile(intervals, span: int) -> tuple:
+    """Компилирует интервалы [начало, конец) в минутах в массив границ и состояний
+
+    Первая граница всегда равна 0, соседние состояния всегда различаются
+    """
+    pieces = []
+    for start, end in intervals:
+        if start < end:
+            pieces.append((start, end))
+        elif start > end:
+            pieces.append((start, span))
+            if end:
+                pieces.append((0, end))
+        else:
+            pieces.append((0, span))
+    pieces.sort()
+
+    merged = []
+    for start, end in pieces:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    points = [[0, 0]]
+    for start, end in merged:
+        if start == points[-1][0]:
+            points[-1][1] = 1
+        else:
+            points.append([start, 1])
+        if end < span:
+            points.append([end, 0])
+
+    boundaries = array('H')
+    states = bytearray()
+    for minute, state in points:
+        if not states or not states[-1] == state:
+            boundaries.append(minute)
+            states.append(state)
+    return boundaries, states
+
+
+def _parse_time(value: str) -> Time:
+    hour, minute = value.split(':')
+    return Time(int(hour), int(minute))
+
+
+def _parse_date(value: str) -> Date:
+    year, month, day = value.split('-')
+    return Date(int(year), int(month), int(day))
+
+
+def _parse_windows(value: str) -> tuple:
+    if value == '-':
+        return ()
+
+    windows = []
+    for window in value.split(','):
+        start, end = window.split('-')
+        windows.append((_parse_time(start), _parse_time(end)))
+    return tuple(windows)
+
+
+class SoundSchedule:
+    """Недельное расписание звукового режима с исключениями по датам
+
+    Окна со звуком задаются по дням недели (0 - понедельник), исключения заменяют
+    расписание конкретной даты. Окна компилируются в отсортированные массивы границ
+    в минутах от начала недели (дня для исключений), поэтому определение текущего
+    режима и времени до его смены выполняется двоичным поиском
+    """
+
+    def __init__(self, windows=(), exceptions=()):
+        """windows - (день недели, начало Time, конец Time), exceptions - (Date, ((начало, конец), ...))"""
+        self._boundaries, self._states = _compile(
+            [(weekday * DAY_MINUTES + self._minutes(start),
+              ((weekday if end > start else weekday + 1) * DAY_MINUTES + self._minutes(end)) % WEEK_MINUTES)
+             for weekday, start, end in windows],
+            WEEK_MINUTES
+        )
+        self._exceptions = {}
+        for date, day_windows in exceptions:
+            self._exceptions[date.toordinal()] = _compile(
+                [(self._minutes(start), self._minutes(end) if end > start else DAY_MINUTES)
+                 for start, end in day_windows],
+                DAY_MINUTES
+            )
+
+    @classmethod
+    def daily(cls, start: Time, end: Time):
+        """Расписание с одним окном со звуком на каждый день недели"""
+        return cls([(weekday, start, end) for weekday in range(7)])
+
+    @classmethod
+    def from_string(cls, spec: str):
+        """Разбирает расписание из строки
+
+        Записи разделяются ';' и имеют вид '<дни> <ЧЧ:ММ>-<ЧЧ:ММ>[,<ЧЧ:ММ>-<ЧЧ:ММ>...]', где дни -
+        цифры дней недели (1 - понедельник), '*' - все дни, либо дата ГГГГ-ММ-ДД для исключения.
+        Исключение без окон со звуком записывается как '<дата> -'
+        """
+        windows = []
+        exceptions = []
+        try:
+            for entry in spec.split(';'):
+                entry = entry.strip()
+                if not entry:
+                    continue
+                days, day_windows = entry.split()
+                day_windows = _parse_windows(day_windows)
+                if '-' in days:
+                    exceptions.append((_parse_date(days), day_windows))
+                    continue
+                for day in ALL_WEEKDAYS if days == '*' else days:
+                    if day not in ALL_WEEKDAYS:
+                        raise ValueError('weekday must be in 1..7', day)
+                    windows.extend((int(day) - 1, start, end) for start, end in day_windows)
+        except (TypeError, ValueError) as ex:
+            raise ValueError(f'invalid schedule entry: {spec}') from ex
+        return cls(windows, exceptions)
+
+    @staticmethod
+    def _minutes(time: Time) -> int:
+        return time.hour * 60 + time.minute
+
+    def is_audible(self, now: Datetime) -> bool:
+        """Определяет, должен ли быть включён звук в момент now"""
+        minute = now.hour * 60 + now.minute
+        ordinal = now.toordinal()
+        exception = self._exceptions.get(ordinal)
+        if exception is not None:
+            boundaries, states = exception
+        else:
+            boundaries, states = self._boundaries, self._states
+            minute += ((ordinal + 6) % 7) * DAY_MINUTES
+        return states[_bisect_right(boundaries, minute) - 1] == 1
+
+    def milliseconds_to_change(self, now: Datetime):
+        """Время в мс до ближайшей границы расписания или None, если режим не меняется"""
+        ordinal = now.toordinal()
+        minute = now.hour * 60 + now.minute
+        elapsed_ms = minute * 60000 + now.second * 1000 + now.microsecond // 1000
+
+        exception = self._exceptions.get(ordinal)
+        if exception is not None:
+            boundaries = exception[0]
+            index = _bisect_right(boundaries, minute)
+            if index < len(boundaries):
+                return boundaries[index] * 60000 - elapsed_ms
+            return DAY_MINUTES * 60000 - elapsed_ms
+
+        weekday = (ordinal + 6) % 7
+        boundaries, states = self._boundaries, self._states
+        index = _bisect_right(boundaries, weekday * DAY_MINUTES + minute)
+        if index < len(boundaries):
+            target = boundaries[index]
+        elif len(boundaries) == 1:
+            target = None
+        else:
+            target = WEEK_MINUTES + (boundaries[0] if not states[0] == states[-1] else boundaries[1])
+
+        delay = None if target is None else (target - weekday * DAY_MINUTES) * 60000 - elapsed_ms
+        for days_ahead in range(1, 8):
+            if ordinal + days_ahead in self._exceptions:
+                midnight = days_ahead * DAY_MINUTES * 60000 - elapsed_ms
+                if delay is None or midnight < delay:
+                    delay = midnight
+                break
+        return delay
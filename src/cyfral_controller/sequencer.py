@@ -0,0 +1,94 @@
+import time
+from micropython import const
+
+from cyfral_controller.exceptions import CyfralControllerException, SequenceInProgressError
+
+
+_IDLE = const(0)
+_RUNNING = const(1)
+_COMPLETED = const(2)
+_FAILED = const(3)
+
+MAX_DELAY_MS = const(24 * 3600 * 1000)  # наибольший интервал ticks_add без переполнения с запасом
+
+
+class SequenceState:
+    """Состояние последовательности"""
+    IDLE = _IDLE
+    RUNNING = _RUNNING
+    COMPLETED = _COMPLETED
+    FAILED = _FAILED
+
+
+SEQUENCE_STATE_NAMES = ('IDLE', 'RUNNING', 'COMPLETED', 'FAILED')
+
+
+class RelaySequencer:
+    """Неблокирующий исполнитель последовательностей переключения реле
+
+    Последовательность - кортеж шагов (действие, пауза в мс). Шаги выполняются по одному
+    при вызове poll() из основного цикла, когда истекла пауза предыдущего шага
+    """
+
+    __slots__ = ('state', 'name', 'step', 'steps_count', 'error', '_sequence', '_deadline')
+
+    def __init__(self):
+        self.state = _IDLE
+        self.name = None
+        self.step = 0
+        self.steps_count = 0
+        self.error = None
+        self._sequence = None
+        self._deadline = 0
+
+    @property
+    def busy(self) -> bool:
+        """Выполняется ли последовательность"""
+        return self.state == _RUNNING
+
+    @property
+    def milliseconds_to_step(self) -> int:
+        """Время в мс до очередного шага выполняемой последовательности"""
+        return max(time.ticks_diff(self._deadline, time.ticks_ms()), 0)
+
+    def start(self, name: str, sequence: tuple, delay_ms: int = 0):
+        """Запускает последовательность, первый шаг выполнится через delay_ms (не больше суток)"""
+        if self.busy:
+            raise SequenceInProgressError(0, self.name)
+
+        self.state = _RUNNING
+        self.name = name
+        self.step = 0
+        self.steps_count = len(sequence)
+        self.error = None
+        self._sequence = sequence
+        self._deadline = time.ticks_add(time.ticks_ms(), min(delay_ms, MAX_DELAY_MS))
+
+    def poll(self) -> bool:
+        """Выполняет очередной шаг, если подошло его время. Возвращает True при изменении состояния"""
+        if not self.state == _RUNNING:
+            return False
+        if time.ticks_diff(time.ticks_ms(), self._deadline) < 0:
+            return False
+
+        if self.step == self.steps_count:
+            self.state = _COMPLETED
+            self._sequence = None
+            return True
+
+        action, delay = self._sequence[self.step]
+        try:
+            action()
+        except CyfralControllerException as ex:
+            self.state = _FAILED
+            self.error = ex
+            self._sequence = None
+            return True
+
+        self.step += 1
+        self._deadline = time.ticks_add(time.ticks_ms(), delay)
+        return True
+
+    def status(self) -> str:
+        """Текстовое представление состояния для публикации"""
+        return f'{self.name} {SEQUENCE_STATE_NAMES[self.state]} {self.step}/{self.steps_count}'
@@ -0,0 +1,129 @@
+import time
+
+import ntptime
+from micropython import const
+
+from datetime import Datetime, Timedelta
+
+RESYNC_MIN_PERIOD_MS = const(3600000)
+RESYNC_MAX_PERIOD_MS = const(86400000)  # не больше половины периода ticks_ms на ESP8266
+RETRY_DELAY_MS = const(60000)
+STEP_THRESHOLD_S = const(10)
+ERROR_TOLERANCE_S = const(1)  # разрешение часов DS1307 и ntptime.time()
+MIN_BASELINE_S = const(3600)
+
+EPOCH = Datetime(2000, 1, 1)
+
+
+class TimeDiscipline:
+    """Коррекция часов DS1307 по NTP
+
+    Синхронизация выполняется по расписанию вызовами poll(). При каждой синхронизации измеряется
+    смещение часов DS1307 относительно NTP, уход часов в ppm оценивается по всем измерениям
+    от первого (база растёт, поэтому секундное разрешение часов перестаёт мешать), а поправка
+    смещения и ухода передаётся CachedClock, который применяет её к каждому чтению часов.
+    Время в микросхеме переписывается только при смещении от STEP_THRESHOLD_S. Если поправка
+    предсказала смещение с точностью до ERROR_TOLERANCE_S, период синхронизации удваивается
+    до max_period_ms, иначе сбрасывается до min_period_ms
+    """
+
+    def __init__(self, real_time_clock,
+                 min_period_ms: int = RESYNC_MIN_PERIOD_MS,
+                 max_period_ms: int = RESYNC_MAX_PERIOD_MS):
+        self._clock = real_time_clock
+        self._min_period_ms = min_period_ms
+        self._max_period_ms = max(min_period_ms, min(max_period_ms, RESYNC_MAX_PERIOD_MS))
+        self._next_attempt = time.ticks_ms()
+        self._reference_ntp = None
+        self._reference_raw_offset = 0
+        self._stepped = 0
+        self._last_ntp = 0
+        self._residual = 0
+        self.on_time_synchronized = None
+
+        self.period_ms = min_period_ms
+        self.drift_ppm = 0.0
+        self.offset_s = 0
+        self.error_s = None
+        self.samples = 0
+        self.failures = 0
+        self.steps = 0
+
+    @property
+    def attempt_due(self) -> bool:
+        """Наступило ли время очередной синхронизации"""
+        return time.ticks_diff(time.ticks_ms(), self._next_attempt) >= 0
+
+    @property
+    def milliseconds_to_attempt(self) -> int:
+        """Время в мс до очередной синхронизации"""
+        return max(time.ticks_diff(self._next_attempt, time.ticks_ms()), 0)
+
+    def defer(self):
+        """Откладывает ближайшую синхронизацию на min_period_ms (время часов уже признано правдоподобным)"""
+        self._next_attempt = time.ticks_add(time.ticks_ms(), self._min_period_ms)
+
+    def poll(self) -> bool:
+        """Выполняет синхронизацию, если наступило её время. Возвращает True после успешной синхронизации"""
+        if not self.attempt_due:
+            return False
+        try:
+            self.synchronize()
+        except OSError as ex:
+            self.failures += 1
+            self._next_attempt = time.ticks_add(time.ticks_ms(), RETRY_DELAY_MS)
+            print(f'Failed to synchronization datetime ({ex})')
+            return False
+        return True
+
+    def synchronize(self):
+        """Измеряет смещение часов по NTP, уточняет уход и обновляет поправку часов"""
+        ntp_seconds = ntptime.time()
+        delta = self._clock.rtc.get_datetime() - EPOCH
+        offset = delta.days * 86400 + delta.seconds - ntp_seconds
+        # смещение без учёта перезаписей времени в микросхеме
+        raw_offset = offset + self._stepped
+
+        if self._reference_ntp is None:
+            self._reference_ntp = ntp_seconds
+            self._reference_raw_offset = raw_offset
+        else:
+            predicted = self._residual + (ntp_seconds - self._last_ntp) * self.drift_ppm / 1000000
+            self.error_s = round(offset - predicted, 1)
+            baseline = ntp_seconds - self._reference_ntp
+            if baseline >= MIN_BASELINE_S:
+                self.drift_ppm = (raw_offset - self._reference_raw_offset) * 1000000 / baseline
+
+        self.offset_s = offset
+        if abs(offset) >= STEP_THRESHOLD_S:
+            self._clock.set_datetime(EPOCH + Timedelta(seconds=ntp_seconds))
+            # запись целых секунд оставляет часы позади NTP в среднем на полсекунды
+            offset = -0.5
+            self._stepped += self.offset_s - offset
+            self.steps += 1
+        self._residual = offset
+        self._last_ntp = ntp_seconds
+        self._clock.set_correction(EPOCH + Timedelta(seconds=ntp_seconds), int(offset * 1000000), self.drift_ppm)
+
+        if self.error_s is not None and abs(self.error_s) <= ERROR_TOLERANCE_S:
+            self.period_ms = min(self.period_ms * 2, self._max_period_ms)
+        else:
+            self.period_ms = self._min_period_ms
+        self._next_attempt = time.ticks_add(time.ticks_ms(), self.period_ms)
+        self.samples += 1
+
+        print(f'Synchronization successful (offset {self.offset_s} s, drift {self.drift_ppm:.1f} ppm)')
+        if self.on_time_synchronized:
+            self.on_time_synchronized()
+
+    def report(self) -> dict:
+        """Статистика синхронизации"""
+        return {
+            'samples': self.samples,
+            'failures': self.failures,
+            'steps': self.steps,
+            'offset_s': self.offset_s,
+            'error_s': self.error_s,
+            'drift_ppm': round(self.drift_ppm, 2),
+            'period_ms': self.period_ms,
+        }
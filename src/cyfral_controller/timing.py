@@ -0,0 +1,42 @@
+DEFAULT_TIMING_PROFILE = 'safe'
+
+
+class TimingProfile:
+    """Длительности шагов последовательностей реле, мс
+
+    pick_up_ms - пауза после снятия трубки до нажатия кнопки открытия двери,
+    press_ms - длительность нажатия кнопки открытия двери, hang_up_ms - пауза после повешения трубки,
+    sound_switch_ms - пауза на срабатывание реле звука, auto_open_delay_ms - задержка
+    автоматического открытия двери от начала вызова
+    """
+
+    __slots__ = ('name', 'pick_up_ms', 'press_ms', 'hang_up_ms', 'sound_switch_ms', 'auto_open_delay_ms')
+
+    def __init__(self, name: str, pick_up_ms: int = 500, press_ms: int = 500, hang_up_ms: int = 500,
+                 sound_switch_ms: int = 500, auto_open_delay_ms: int = 3000):
+        self.name = name
+        self.pick_up_ms = pick_up_ms
+        self.press_ms = press_ms
+        self.hang_up_ms = hang_up_ms
+        self.sound_switch_ms = sound_switch_ms
+        self.auto_open_delay_ms = auto_open_delay_ms
+
+
+def timing_profiles(custom: dict = None) -> dict:
+    """Профили 'safe' и 'fast', дополненные или переопределённые профилями custom
+
+    custom - словарь {имя: {параметр: значение}}, пропущенные параметры берутся из профиля 'safe'
+    """
+    profiles = {
+        'safe': TimingProfile('safe'),
+        'fast': TimingProfile('fast', pick_up_ms=250, press_ms=300, hang_up_ms=250, sound_switch_ms=200,
+                              auto_open_delay_ms=1000),
+    }
+    if custom:
+        for name, parameters in custom.items():
+            profiles[name] = TimingProfile(name, **parameters)
+    return profiles
+
+
+# профили по умолчанию, общие для всех блоков без своих профилей
+DEFAULT_TIMING_PROFILES = timing_profiles()
@@ -0,0 +1,810 @@
+import time
+from micropython import const
+
+from datetime import Time
+
+from cyfral_controller.cadence import RingCadenceDetector, RingEvent
+from cyfral_controller.commands import Argument, CommandRouter
+from cyfral_controller.electronic_components.relays import (
+    ControlOptocoupler,
+    ControlledOptocoupler,
+    Relay,
+    RelayBank
+)
+from cyfral_controller.exceptions import (
+    CyfralControllerException,
+    HangUpHandsetError,
+    PickUpHandsetError,
+    PressOpenDoorButtonError,
+    SwitchSoundModeError
+)
+from cyfral_controller.journal import JournalEvent
+from cyfral_controller.schedule import SoundSchedule
+from cyfral_controller.sequencer import RelaySequencer, SequenceState
+from cyfral_controller.timing import DEFAULT_TIMING_PROFILE, DEFAULT_TIMING_PROFILES
+from cyfral_controller.utils import blinks
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+AUTO_OPEN_MODE_DURATION_MS = const(30 * 60000)
+CALL_END_DELAY_MS = const(5000)
+INCOMING_CALL_POLL_PERIOD_MS = const(10)  # период опроса оптопары вызова без прерываний
+SOUND_MODE_SWITCH_GUARD_MS = const(1000)
+SOUND_MODE_RETRY_DELAY_MS = const(1000)
+DAY_MS = const(24 * 3600 * 1000)  # наибольший срок, отсчитываемый по ticks_ms
+
+# Значения перечислений как const: внутри модуля подставляются при компиляции без поиска атрибутов
+_SOUND_MODE_SILENT = const(1)
+_SOUND_MODE_AUDIBLE = const(2)
+_AUTO_OPEN_DISABLED = const(0)
+_AUTO_OPEN_ENABLED = const(1)
+_WAITING_CALL = const(1)
+_INCOMING_CALL = const(2)
+_HANDSET_IS_PICK_UP = const(3)
+_HANDSET_IS_HANG_UP = const(4)
+
+# расписание не изменяется после создания, поэтому блоки без своего расписания используют общее
+DEFAULT_SOUND_SCHEDULE = SoundSchedule.from_string('* 03:00-18:00')
+
+
+class SoundMode:
+    """Режим звука"""
+    SILENT = _SOUND_MODE_SILENT
+    AUDIBLE = _SOUND_MODE_AUDIBLE
+
+
+class AutoOpenMode:
+    """Режим автоматического открытия двери"""
+    DISABLED = _AUTO_OPEN_DISABLED
+    ENABLED = _AUTO_OPEN_ENABLED
+
+
+class IntercomState:
+    """Состояние домофона"""
+    WAITING_CALL = _WAITING_CALL
+    INCOMING_CALL = _INCOMING_CALL
+    HANDSET_IS_PICK_UP = _HANDSET_IS_PICK_UP
+    HANDSET_IS_HANG_UP = _HANDSET_IS_HANG_UP
+
+
+def encode_topic(topic):
+    """Топик в виде bytes: кодируется один раз при создании объекта, а не при каждой публикации"""
+    return topic.encode() if isinstance(topic, str) else topic
+
+
+async def execute_async_command(command):
+    """Выполняет асинхронную команду (корутину) с обработкой ошибок контроллера"""
+    try:
+        await command
+    except CyfralControllerException as ex:
+        print(f'Cyfral controller error: {ex}')
+        await blinks.error_blink_async()
+
+
+def _milliseconds_to(deadline, now: int, limit: int) -> int:
+    """Время в мс от now до срока deadline (ticks_ms, None - срока нет), не больше limit"""
+    if deadline is None:
+        return limit
+    return min(max(time.ticks_diff(deadline, now), 0), limit)
+
+
+class IntercomUnit:
+    """Трубка домофона: реле, оптопары, состояние вызова и режимы звука и автоматического открытия
+
+    Блок не владеет MQTT соединением: его опрашивает IntercomSupervisor, который
+    передаёт ему сообщения управляющих топиков и публикует состояния через общий StatePublisher.
+    Сроки переключения звука по расписанию и отключения автоматического открытия отсчитываются
+    по ticks_ms при опросе, поэтому блок не занимает аппаратных таймеров
+    """
+
+    __slots__ = (
+        'index', 'ring_detector', '_sound_mode_relay', '_handset_relay', '_incoming_call_optocoupler',
+        '_door_opening_optocoupler', '_call_signal_ended', '_intercom_state', '_incoming_call_time',
+        '_sound_mode', '_auto_sound_mode_enabled', '_sound_mode_switch_deadline', '_sound_schedule',
+        '_sound_schedule_changed', '_auto_open_mode', '_auto_open_deadline', '_auto_opening',
+        '_mqtt_control_topic', '_mqtt_incoming_call_state_topic', '_mqtt_sound_mode_state_topic',
+        '_mqtt_auto_open_mode_topic', '_mqtt_sequence_state_topic', '_mqtt_sound_schedule_topic',
+        '_supervisor', '_publisher', '_rtc', '_metrics', '_async_runtime', '_relay_lock', '_sequencer',
+        '_audible_door_opening_sequence', '_silent_door_opening_sequence', '_audible_call_rejection_sequence',
+        '_silent_call_rejection_sequence', '_mute_sequence', '_unmute_sequence', '_relay_bank',
+        '_pick_up_unmuted_transition', '_hang_up_muted_transition', '_release_and_hang_up_transition',
+        '_timing_profiles', '_timing',
+    )
+
+    def __init__(self,
+                 sound_mode_relay_pin: int,
+                 handset_relay_pin: int,
+                 incoming_call_optocoupler_pin: int,
+                 door_opening_optocoupler_pin: int,
+                 mqtt_incoming_call_state_topic: str,
+                 mqtt_sound_mode_state_topic: str,
+                 mqtt_auto_open_mode_topic: str,
+                 mqtt_control_topic: str,
+                 incoming_call_irq_mode: bool = True,
+                 mqtt_sequence_state_topic: str = None,
+                 sound_schedule: SoundSchedule = None,
+                 mqtt_sound_schedule_topic: str = None,
+                 ring_cadence: dict = None,
+                 timing_profile: str = DEFAULT_TIMING_PROFILE,
+                 timing_profiles: dict = None):
+        """Инициализирует атрибуты объекта IntercomUnit"""
+        self.index = 0
+        self._sound_mode_relay = Relay(sound_mode_relay_pin)
+        self._handset_relay = Relay(handset_relay_pin)
+        self._incoming_call_optocoupler = ControlledOptocoupler(
+            incoming_call_optocoupler_pin,
+            irq_mode=incoming_call_irq_mode and ring_cadence is None
+        )
+        # ring_cadence - параметры RingCadenceDetector; при их наличии вызов распознаётся по отсчётам таймера
+        self.ring_detector = None if ring_cadence is None \
+            else RingCadenceDetector(self._incoming_call_optocoupler, **ring_cadence)
+        self._call_signal_ended = False
+        self._door_opening_optocoupler = ControlOptocoupler(door_opening_optocoupler_pin)
+
+        self._intercom_state = _WAITING_CALL
+        self._incoming_call_time = None
+
+        self._sound_mode = None
+        self._auto_sound_mode_enabled = False
+        self._sound_mode_switch_deadline = None
+        self._sound_schedule = sound_schedule or DEFAULT_SOUND_SCHEDULE
+        self._sound_schedule_changed = None
+        self._auto_open_mode = _AUTO_OPEN_DISABLED
+        self._auto_open_deadline = None
+        self._auto_opening = False
+
+        self._mqtt_control_topic = encode_topic(mqtt_control_topic)
+        self._mqtt_incoming_call_state_topic = encode_topic(mqtt_incoming_call_state_topic)
+        self._mqtt_sound_mode_state_topic = encode_topic(mqtt_sound_mode_state_topic)
+        self._mqtt_auto_open_mode_topic = encode_topic(mqtt_auto_open_mode_topic)
+        self._mqtt_sequence_state_topic = encode_topic(mqtt_sequence_state_topic)
+        self._mqtt_sound_schedule_topic = encode_topic(mqtt_sound_schedule_topic)
+
+        self._supervisor = None
+        self._publisher = None
+        self._rtc = None
+        self._metrics = None
+        self._async_runtime = False
+        self._relay_lock = None
+        self._sequencer = RelaySequencer()
+        # timing_profiles - профили длительностей шагов (timing.timing_profiles()), timing_profile - имя текущего
+        self._timing_profiles = timing_profiles or DEFAULT_TIMING_PROFILES
+        self._timing = self._timing_profiles[timing_profile]
+        self._relay_bank = RelayBank()
+        self._pick_up_unmuted_transition = self._relay_bank.transition(
+            enable=(self._handset_relay,),
+            disable=(self._sound_mode_relay,)
+        )
+        self._hang_up_muted_transition = self._relay_bank.transition(
+            enable=(self._sound_mode_relay,),
+            disable=(self._door_opening_optocoupler, self._handset_relay)
+        )
+        self._release_and_hang_up_transition = self._relay_bank.transition(
+            disable=(self._door_opening_optocoupler, self._handset_relay)
+        )
+        self._build_relay_sequences()
+
+    @property
+    def topics(self) -> tuple:
+        """Топики, на которые нужно подписаться для управления блоком"""
+        if self._mqtt_sound_schedule_topic:
+            return self._mqtt_control_topic, self._mqtt_sound_schedule_topic
+        return (self._mqtt_control_topic,)
+
+    def attach(self, supervisor, index: int, publisher, real_time_clock, metrics):
+        """Подключает блок к супервизору: общим очереди публикации, часам и метрикам"""
+        self.index = index
+        self._supervisor = supervisor
+        self._publisher = publisher
+        self._rtc = real_time_clock
+        self._metrics = metrics
+
+    def start(self, async_runtime: bool = False):
+        """Устанавливает звуковой режим и включает его автоматическое переключение"""
+        self._async_runtime = async_runtime
+        if async_runtime:
+            self._relay_lock = asyncio.Lock()
+            self._sound_schedule_changed = asyncio.Event()
+        self._sound_mode_initialization()
+        self._enable_auto_sound_mode()
+
+    def poll(self):
+        """Шаг блокирующего цикла: сроки режимов, последовательность реле, вызов и автоматическое открытие"""
+        self._check_deadlines()
+        self._advance_relay_sequence()
+        self._process_incoming_call_signal()
+
+        if (self._intercom_state == _INCOMING_CALL
+                and self._auto_open_mode == _AUTO_OPEN_ENABLED
+                and not self._sequencer.busy):
+            self._start_relay_sequence('OPEN_DOOR', self._door_opening_sequence, self._timing.auto_open_delay_ms)
+            if self._metrics:
+                self._metrics.door_opened_automatically()
+
+    def poll_async(self):
+        """Шаг задачи отслеживания вызова: автоматическое открытие запускается отдельной задачей"""
+        self._check_deadlines()
+        self._process_incoming_call_signal()
+
+        if (self._intercom_state == _INCOMING_CALL
+                and self._auto_open_mode == _AUTO_OPEN_ENABLED
+                and not self._auto_opening):
+            self._auto_opening = True
+            asyncio.create_task(execute_async_command(self._auto_open_door_async()))
+
+    @property
+    def input_pending(self) -> bool:
+        """Требует ли сигнал вызова опроса без задержки: фронты оптопары или отсчёты детектора каденции"""
+        if self.ring_detector:
+            return self.ring_detector.pending
+        optocoupler = self._incoming_call_optocoupler
+        return optocoupler.irq_mode and optocoupler.has_edges
+
+    def milliseconds_to_next_event(self, limit: int) -> int:
+        """Время в мс, через которое блоку нужен следующий poll(), не больше limit
+
+        Учитывает шаг последовательности реле, сроки режимов, окончание вызова, заполнение буфера
+        детектора каденции и опрос оптопары без прерываний. Фронты оптопары в режиме прерываний
+        и сигнал в отсчётах детектора проверяются отдельно через input_pending
+        """
+        if self.input_pending:
+            return 0
+        if (self._intercom_state == _INCOMING_CALL
+                and self._auto_open_mode == _AUTO_OPEN_ENABLED
+                and not self._sequencer.busy):
+            return 0
+
+        now = time.ticks_ms()
+        if self._sequencer.busy:
+            limit = min(self._sequencer.milliseconds_to_step, limit)
+        limit = _milliseconds_to(self._sound_mode_switch_deadline, now, limit)
+        limit = _milliseconds_to(self._auto_open_deadline, now, limit)
+        if self.ring_detector:
+            limit = min(self.ring_detector.milliseconds_to_overflow, limit)
+        elif not self._incoming_call_optocoupler.irq_mode:
+            limit = min(INCOMING_CALL_POLL_PERIOD_MS, limit)
+        elif not self._intercom_state == _WAITING_CALL and not self._incoming_call:
+            limit = _milliseconds_to(time.ticks_add(self._incoming_call_time, CALL_END_DELAY_MS), now, limit)
+        return limit
+
+    def handle_message(self, topic: bytes, message: bytes):
+        """Выполняет сообщение топика блока
+
+        Для асинхронной среды выполнения возвращает корутину команды, которую нужно запустить
+        отдельной задачей. Ошибки команд пробрасываются супервизору
+        """
+        if topic == self._mqtt_sound_schedule_topic:
+            self._set_sound_schedule(message.decode())
+            return None
+        return _command_router.dispatch(message, self, self._async_runtime)
+
+    def time_synchronized(self):
+        """Пересчитывает звуковой режим после установки времени часов"""
+        if not self._auto_sound_mode_enabled:
+            return
+        if self._async_runtime:
+            self._sound_schedule_changed.set()
+        else:
+            self._switch_sound_mode_by_schedule()
+
+    def publish_states(self):
+        """Ставит в очередь публикации текущие состояния блока
+
+        Публикуются только состояния, изменившиеся с момента последней публикации,
+        остальные подписчики получают от брокера как retained сообщения
+        """
+        if self._intercom_state == _WAITING_CALL:
+            self._publish_state(self._mqtt_incoming_call_state_topic, 'OFF')
+        else:
+            self._publish_state(self._mqtt_incoming_call_state_topic, 'ON')
+
+        if self._sound_mode == _SOUND_MODE_AUDIBLE:
+            self._publish_state(self._mqtt_sound_mode_state_topic, 'ON')
+        else:
+            self._publish_state(self._mqtt_sound_mode_state_topic, 'OFF')
+
+        if self._auto_open_mode == _AUTO_OPEN_ENABLED:
+            self._publish_state(self._mqtt_auto_open_mode_topic, 'ON')
+        else:
+            self._publish_state(self._mqtt_auto_open_mode_topic, 'OFF')
+
+    def mute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Переводит домофон в режим "Без звука" """
+        self._mute(mqtt_payload, check_auto_mode)
+        time.sleep_ms(self._timing.sound_switch_ms)
+
+    def unmute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Переводит домофон в режим "Со звуком" """
+        self._unmute(mqtt_payload, check_auto_mode)
+        time.sleep_ms(self._timing.sound_switch_ms)
+
+    def open_door(self):
+        """Открывает дверь домофона"""
+        self._run_relay_sequence(self._door_opening_sequence)
+
+    def reject_call(self):
+        """Сбрасывает входящий вызов"""
+        self._run_relay_sequence(self._call_rejection_sequence)
+
+    async def mute_async(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Асинхронно переводит домофон в режим "Без звука" """
+        async with self._relay_lock:
+            await self._run_relay_sequence_async(
+                'MUTE_SOUND',
+                ((lambda: self._mute(mqtt_payload, check_auto_mode), self._timing.sound_switch_ms),)
+            )
+
+    async def unmute_async(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Асинхронно переводит домофон в режим "Со звуком" """
+        async with self._relay_lock:
+            await self._run_relay_sequence_async(
+                'UNMUTE_SOUND',
+                ((lambda: self._unmute(mqtt_payload, check_auto_mode), self._timing.sound_switch_ms),)
+            )
+
+    async def open_door_async(self, delay_ms: int = 0):
+        """Асинхронно открывает дверь домофона через delay_ms"""
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        async with self._relay_lock:
+            await self._run_relay_sequence_async('OPEN_DOOR', self._door_opening_sequence)
+
+    async def reject_call_async(self):
+        """Асинхронно сбрасывает входящий вызов"""
+        async with self._relay_lock:
+            await self._run_relay_sequence_async('REJECT_CALL', self._call_rejection_sequence)
+
+    async def _auto_open_door_async(self):
+        """Автоматически открывает дверь через auto_open_delay_ms профиля после начала вызова"""
+        if self._metrics:
+            self._metrics.door_opened_automatically()
+        try:
+            await self.open_door_async(self._timing.auto_open_delay_ms)
+        finally:
+            self._auto_opening = False
+
+    async def sound_schedule_task(self):
+        """Задача автоматического переключения звука по расписанию"""
+        while True:
+            try:
+                await asyncio.wait_for(self._sound_schedule_changed.wait(),
+                                       self._milliseconds_to_sound_mode_change() / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._sound_schedule_changed.clear()
+
+            if not self._auto_sound_mode_enabled or self._determine_sound_mode() == self._sound_mode:
+                continue
+
+            if self._sound_mode == _SOUND_MODE_AUDIBLE:
+                await self.mute_async(check_auto_mode=False)
+            else:
+                await self.unmute_async(check_auto_mode=False)
+
+    def _publish_state(self, topic: bytes, state: str):
+        """Ставит состояние в очередь публикации (повторы отбрасываются)"""
+        self._publisher.set(topic, state)
+
+    def _record_event(self, event: int):
+        """Записывает событие блока в журнал супервизора"""
+        self._supervisor.record_event(event, self.index)
+
+    def _mute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Переключает реле звука в режим "Без звука" без ожидания срабатывания реле"""
+        if self._sound_mode == _SOUND_MODE_SILENT:
+            raise SwitchSoundModeError(SwitchSoundModeError.ALREADY_SILENT)
+
+        self._sound_mode_relay.enable()
+        self._sound_mode = _SOUND_MODE_SILENT
+
+        if mqtt_payload:
+            self._publish_state(self._mqtt_sound_mode_state_topic, 'OFF')
+            self._record_event(JournalEvent.SOUND_MUTED)
+
+        if check_auto_mode:
+            if self._determine_sound_mode() == _SOUND_MODE_AUDIBLE:
+                self._disable_auto_sound_mode()
+            else:
+                self._enable_auto_sound_mode()
+
+    def _unmute(self, mqtt_payload: bool = True, check_auto_mode: bool = True):
+        """Переключает реле звука в режим "Со звуком" без ожидания срабатывания реле"""
+        if self._sound_mode == _SOUND_MODE_AUDIBLE:
+            raise SwitchSoundModeError(SwitchSoundModeError.ALREADY_AUDIBLE)
+
+        self._sound_mode_relay.disable()
+        self._sound_mode = _SOUND_MODE_AUDIBLE
+
+        if mqtt_payload:
+            self._publish_state(self._mqtt_sound_mode_state_topic, 'ON')
+            self._record_event(JournalEvent.SOUND_UNMUTED)
+
+        if check_auto_mode:
+            if self._determine_sound_mode() == _SOUND_MODE_SILENT:
+                self._disable_auto_sound_mode()
+            else:
+                self._enable_auto_sound_mode()
+
+    def _build_relay_sequences(self):
+        """Формирует последовательности шагов (действие, пауза в мс) по текущему профилю длительностей
+
+        Реле, переключаемые в одном шаге, меняют состояние одной записью в регистр GPIO (RelayBank).
+        После шага с реле звука пауза не короче sound_switch_ms
+        """
+        timing = self._timing
+        pick_up_unmuted_ms = max(timing.pick_up_ms, timing.sound_switch_ms)
+        hang_up_muted_ms = max(timing.hang_up_ms, timing.sound_switch_ms)
+        self._audible_door_opening_sequence = (
+            (self._pick_up_handset, timing.pick_up_ms),
+            (self._press_open_door_button, timing.press_ms),
+            (self._release_button_and_hang_up_handset, timing.hang_up_ms),
+        )
+        self._silent_door_opening_sequence = (
+            (self._pick_up_handset_unmuted, pick_up_unmuted_ms),
+            (self._press_open_door_button, timing.press_ms),
+            (self._hang_up_handset_muted, hang_up_muted_ms),
+        )
+        self._audible_call_rejection_sequence = (
+            (self._pick_up_handset, timing.pick_up_ms),
+            (self._hang_up_handset, timing.hang_up_ms),
+        )
+        self._silent_call_rejection_sequence = (
+            (self._pick_up_handset_unmuted, pick_up_unmuted_ms),
+            (self._hang_up_handset_muted, hang_up_muted_ms),
+        )
+        self._mute_sequence = ((self._mute, timing.sound_switch_ms),)
+        self._unmute_sequence = ((self._unmute, timing.sound_switch_ms),)
+
+    def _set_timing_profile(self, name: str):
+        """Выбирает профиль длительностей шагов, выполняемая последовательность доигрывает по прежнему"""
+        timing = self._timing_profiles.get(name)
+        if timing is None:
+            raise ValueError('unknown timing profile', name)
+        self._timing = timing
+        self._build_relay_sequences()
+        print(f'Timing profile: {name}')
+
+    @property
+    def _door_opening_sequence(self) -> tuple:
+        """Последовательность открытия двери для текущего режима звука"""
+        if self._sound_mode == _SOUND_MODE_AUDIBLE:
+            return self._audible_door_opening_sequence
+        return self._silent_door_opening_sequence
+
+    @property
+    def _call_rejection_sequence(self) -> tuple:
+        """Последовательность сброса вызова для текущего режима звука"""
+        if self._sound_mode == _SOUND_MODE_AUDIBLE:
+            return self._audible_call_rejection_sequence
+        return self._silent_call_rejection_sequence
+
+    @staticmethod
+    def _run_relay_sequence(sequence: tuple):
+        """Выполняет последовательность шагов, блокируя цикл на время пауз"""
+        for action, delay in sequence:
+            action()
+            if delay:
+                time.sleep_ms(delay)
+
+    async def _run_relay_sequence_async(self, name: str, sequence: tuple):
+        """Выполняет последовательность исполнителем реле, уступая управление другим задачам на время пауз
+
+        Прогресс публикуется так же, как в блокирующем цикле, ошибка шага передаётся вызывающей задаче
+        """
+        sequencer = self._sequencer
+        self._start_relay_sequence(name, sequence)
+        while True:
+            if sequencer.poll():
+                self._publish_sequence_state()
+            if not sequencer.busy:
+                break
+            await asyncio.sleep(sequencer.milliseconds_to_step / 1000)
+
+        if sequencer.state == SequenceState.FAILED:
+            raise sequencer.error
+
+    def _start_relay_sequence(self, name: str, sequence: tuple, delay_ms: int = 0):
+        """Запускает неблокирующее выполнение последовательности в основном цикле"""
+        self._sequencer.start(name, sequence, delay_ms)
+        self._publish_sequence_state()
+
+    def _start_door_opening(self, delay_ms: int = 0):
+        """Запускает неблокирующее открытие двери через delay_ms"""
+        self._start_relay_sequence('OPEN_DOOR', self._door_opening_sequence, delay_ms)
+
+    def _open_door_command(self, delay_ms: int = 0):
+        """Обработчик команды OPEN_DOOR блокирующего цикла: задержки кнопки считаются от этой команды"""
+        self._start_door_opening(delay_ms)
+        if self._metrics:
+            self._metrics.door_command_dispatched()
+
+    def _open_door_command_async(self, delay_ms: int = 0):
+        """Обработчик команды OPEN_DOOR асинхронной среды: отмечает команду и возвращает корутину открытия"""
+        if self._metrics:
+            self._metrics.door_command_dispatched()
+        return self.open_door_async(delay_ms)
+
+    def _start_call_rejection(self):
+        """Запускает неблокирующий сброс вызова"""
+        self._start_relay_sequence('REJECT_CALL', self._call_rejection_sequence)
+
+    def _start_mute(self):
+        """Запускает неблокирующее выключение звука"""
+        self._start_relay_sequence('MUTE_SOUND', self._mute_sequence)
+
+    def _start_unmute(self):
+        """Запускает неблокирующее включение звука"""
+        self._start_relay_sequence('UNMUTE_SOUND', self._unmute_sequence)
+
+    def _advance_relay_sequence(self):
+        """Выполняет очередной шаг запущенной последовательности и публикует её состояние"""
+        if not self._sequencer.poll():
+            return
+
+        if self._sequencer.state == SequenceState.FAILED:
+            print(f'Cyfral controller error: {self._sequencer.error}')
+            blinks.start_error_blink()
+        self._publish_sequence_state()
+
+    def _publish_sequence_state(self):
+        """Публикует прогресс выполнения последовательности"""
+        if self._mqtt_sequence_state_topic:
+            self._publish_state(self._mqtt_sequence_state_topic, self._sequencer.status())
+
+    def _pick_up_handset(self):
+        """Поднимает трубку домофона и переводит блок в режим "Трубка поднята"""
+        if not self._intercom_state == _INCOMING_CALL:
+            raise PickUpHandsetError()
+
+        self._handset_relay.enable()
+        self._intercom_state = _HANDSET_IS_PICK_UP
+
+    def _press_open_door_button(self):
+        """Нажимает кнопку открытия двери"""
+        if not self._intercom_state == _HANDSET_IS_PICK_UP:
+            raise PressOpenDoorButtonError()
+
+        self._door_opening_optocoupler.enable()
+        if self._metrics:
+            self._metrics.door_button_pressed()
+        self._record_event(JournalEvent.DOOR_OPENED)
+
+    def _hang_up_handset(self):
+        """Вешает трубку домофона и переводит блок в режим "Трубка повешена"""
+        if not self._intercom_state == _HANDSET_IS_PICK_UP:
+            raise HangUpHandsetError()
+
+        self._handset_relay.disable()
+        self._intercom_state = _HANDSET_IS_HANG_UP
+
+    def _pick_up_handset_unmuted(self):
+        """Поднимает трубку домофона и одновременно включает звук без публикации состояния"""
+        if not self._intercom_state == _INCOMING_CALL:
+            raise PickUpHandsetError()
+
+        self._relay_bank.apply(self._pick_up_unmuted_transition)
+        self._intercom_state = _HANDSET_IS_PICK_UP
+        self._sound_mode = _SOUND_MODE_AUDIBLE
+
+    def _release_button_and_hang_up_handset(self):
+        """Отпускает кнопку открытия двери и одновременно вешает трубку домофона"""
+        if not self._intercom_state == _HANDSET_IS_PICK_UP:
+            raise HangUpHandsetError()
+
+        self._relay_bank.apply(self._release_and_hang_up_transition)
+        self._intercom_state = _HANDSET_IS_HANG_UP
+        if self._metrics:
+            self._metrics.door_button_released(self._timing.name)
+
+    def _hang_up_handset_muted(self):
+        """Отпускает кнопку открытия двери, вешает трубку и выключает звук одним переключением"""
+        if not self._intercom_state == _HANDSET_IS_PICK_UP:
+            raise HangUpHandsetError()
+
+        self._relay_bank.apply(self._hang_up_muted_transition)
+        self._intercom_state = _HANDSET_IS_HANG_UP
+        self._sound_mode = _SOUND_MODE_SILENT
+        if self._metrics:
+            self._metrics.door_button_released(self._timing.name)
+
+    @property
+    def _incoming_call(self) -> bool:
+        """Свойство входящего вызова"""
+        if self._incoming_call_optocoupler.irq_mode:
+            return bool(self._incoming_call_optocoupler.last_state)
+        if not self._incoming_call_optocoupler.state:
+            return False
+        return True
+
+    def _process_incoming_call_signal(self):
+        """Обрабатывает сигнал входящего вызова
+
+        При распознавании каденции разбирает события детектора, в режиме прерываний - накопленные
+        фронты оптопары, иначе опрашивает её состояние
+        """
+        if self.ring_detector:
+            self._process_ring_cadence()
+            return
+
+        optocoupler = self._incoming_call_optocoupler
+        if optocoupler.irq_mode:
+            while optocoupler.has_edges:
+                state, edge_time, edge_time_us = optocoupler.pop_edge()
+                if state:
+                    self._register_incoming_call(edge_time, edge_time_us)
+                elif not self._intercom_state == _WAITING_CALL:
+                    self._incoming_call_time = edge_time
+
+        if self._incoming_call:
+            self._register_incoming_call(time.ticks_ms())
+        elif not self._intercom_state == _WAITING_CALL:
+            if time.ticks_diff(time.ticks_ms(), self._incoming_call_time) >= CALL_END_DELAY_MS:
+                self._intercom_state = _WAITING_CALL
+                self._publish_state(self._mqtt_incoming_call_state_topic, 'OFF')
+
+    def _process_ring_cadence(self):
+        """Обрабатывает события распознавания каденции вызова
+
+        Окончание вызова применяется после того, как трубка повешена, чтобы не прервать
+        выполняемую последовательность открытия двери или сброса вызова
+        """
+        detector = self.ring_detector
+        event = detector.process()
+        while event:
+            if event == RingEvent.CALL_STARTED:
+                self._call_signal_ended = False
+                self._register_incoming_call(detector.event_ticks_ms, detector.event_ticks_us)
+            else:
+                self._call_signal_ended = True
+            event = detector.process()
+
+        if self._call_signal_ended and not self._intercom_state == _HANDSET_IS_PICK_UP:
+            self._call_signal_ended = False
+            if not self._intercom_state == _WAITING_CALL:
+                self._intercom_state = _WAITING_CALL
+                self._publish_state(self._mqtt_incoming_call_state_topic, 'OFF')
+
+    def _register_incoming_call(self, call_time: int, call_time_us: int = None):
+        """Фиксирует сигнал входящего вызова, полученный в момент call_time (ticks_ms)"""
+        if self._intercom_state == _WAITING_CALL:
+            if self._metrics and call_time_us is None:
+                call_time_us = time.ticks_us()
+            self._intercom_state = _INCOMING_CALL
+            self._publish_state(self._mqtt_incoming_call_state_topic, 'ON')
+            self._supervisor.flush_states()
+            if self._metrics:
+                self._metrics.call_to_publish.add(time.ticks_diff(time.ticks_us(), call_time_us))
+            self._record_event(JournalEvent.INCOMING_CALL)
+        self._incoming_call_time = call_time
+
+    def _check_deadlines(self):
+        """Переключает звук по расписанию и отключает автоматическое открытие по истечении их сроков"""
+        now = time.ticks_ms()
+        if (self._sound_mode_switch_deadline is not None
+                and time.ticks_diff(now, self._sound_mode_switch_deadline) >= 0):
+            self._sound_mode_switch_deadline = None
+            self._switch_sound_mode_by_schedule()
+        if self._auto_open_deadline is not None and time.ticks_diff(now, self._auto_open_deadline) >= 0:
+            self._disable_auto_open_mode()
+
+    def _sound_mode_initialization(self):
+        """Инициализирует звуковой режим"""
+        if self._determine_sound_mode() == _SOUND_MODE_AUDIBLE:
+            self._sound_mode = _SOUND_MODE_AUDIBLE
+        else:
+            self.mute(mqtt_payload=False, check_auto_mode=False)
+
+    def _determine_sound_mode(self) -> int:
+        """Определяет режим звука относительно текущего времени"""
+        if self._sound_schedule.is_audible(self._rtc.get_datetime()):
+            return _SOUND_MODE_AUDIBLE
+        return _SOUND_MODE_SILENT
+
+    def _milliseconds_to_sound_mode_change(self) -> int:
+        """Вычисляет время в мс до ближайшей смены звукового режима по расписанию"""
+        delay = self._sound_schedule.milliseconds_to_change(self._rtc.get_datetime())
+        if delay is None:
+            return DAY_MS
+        return delay + SOUND_MODE_SWITCH_GUARD_MS
+
+    def _set_sound_schedule(self, spec: str):
+        """Устанавливает расписание звукового режима из строки"""
+        try:
+            schedule = SoundSchedule.from_string(spec)
+        except ValueError as ex:
+            print(f'Sound schedule error: {ex}')
+            return
+        self._apply_sound_schedule(schedule)
+
+    def _set_mute_window(self, start: int, end: int):
+        """Устанавливает ежедневное окно без звука с start до end (минуты от начала суток)"""
+        if start == end:
+            raise ValueError('empty mute window')
+        self._apply_sound_schedule(SoundSchedule.daily(Time(end // 60, end % 60), Time(start // 60, start % 60)))
+
+    def _apply_sound_schedule(self, schedule: SoundSchedule):
+        """Устанавливает расписание звукового режима и включает автоматическое переключение звука"""
+        self._sound_schedule = schedule
+        self._auto_sound_mode_enabled = True
+        if self._async_runtime:
+            self._sound_schedule_changed.set()
+        else:
+            self._switch_sound_mode_by_schedule()
+
+    def _schedule_sound_mode_switch(self, delay_ms: int):
+        """Назначает срок переключения звукового режима"""
+        self._sound_mode_switch_deadline = time.ticks_add(time.ticks_ms(), min(delay_ms, DAY_MS))
+
+    def _switch_sound_mode_by_schedule(self):
+        """Настраивает звуковой режим относительно текущего времени
+
+        Переключение запускается неблокирующей последовательностью, чтобы пауза срабатывания реле
+        не задерживала опрос остальных блоков
+        """
+        if self._sequencer.busy:
+            self._schedule_sound_mode_switch(SOUND_MODE_RETRY_DELAY_MS)
+            return
+
+        determined_sound_mode = self._determine_sound_mode()
+        if not determined_sound_mode == self._sound_mode:
+            if determined_sound_mode == _SOUND_MODE_AUDIBLE:
+                self._start_unmute()
+            else:
+                self._start_mute()
+
+        self._schedule_sound_mode_switch(self._milliseconds_to_sound_mode_change())
+
+    def _enable_auto_sound_mode(self):
+        """Включает автоматическое определение звукового режима"""
+        self._auto_sound_mode_enabled = True
+        if not self._async_runtime:
+            self._schedule_sound_mode_switch(self._milliseconds_to_sound_mode_change())
+
+    def _disable_auto_sound_mode(self):
+        """Отключает автоматическое определение звукового режима"""
+        self._auto_sound_mode_enabled = False
+        self._sound_mode_switch_deadline = None
+
+    def _enable_auto_open_mode(self, duration_ms: int = AUTO_OPEN_MODE_DURATION_MS):
+        """Включает автоматическое открытие двери на duration_ms (не больше суток)"""
+        if not duration_ms:
+            raise ValueError('auto open duration must be positive')
+        self._auto_open_mode = _AUTO_OPEN_ENABLED
+        self._auto_open_deadline = time.ticks_add(time.ticks_ms(), min(duration_ms, DAY_MS))
+        self._publish_state(self._mqtt_auto_open_mode_topic, 'ON')
+        self._record_event(JournalEvent.AUTO_OPEN_ENABLED)
+
+    def _disable_auto_open_mode(self):
+        """Отключает автоматическое открытие двери, в журнал записывается только смена режима"""
+        if self._auto_open_mode == _AUTO_OPEN_DISABLED:
+            return
+        self._auto_open_mode = _AUTO_OPEN_DISABLED
+        self._auto_open_deadline = None
+        self._publish_state(self._mqtt_auto_open_mode_topic, 'OFF')
+        self._record_event(JournalEvent.AUTO_OPEN_DISABLED)
+
+
+def _build_command_router() -> CommandRouter:
+    """Формирует общую для всех блоков таблицу команд управляющего топика
+
+    OPEN_DOOR [задержка], REJECT_CALL, MUTE_SOUND, UNMUTE_SOUND, ENABLE_AUTO_OPEN [длительность],
+    DISABLE_AUTO_OPEN, SET_MUTE_WINDOW <ЧЧ:ММ>-<ЧЧ:ММ> и SET_TIMING_PROFILE <имя>
+    """
+    router = CommandRouter()
+    router.add('OPEN_DOOR', IntercomUnit._open_door_command, IntercomUnit._open_door_command_async,
+               Argument.DURATION, 0)
+    router.add('REJECT_CALL', IntercomUnit._start_call_rejection, IntercomUnit.reject_call_async)
+    router.add('MUTE_SOUND', IntercomUnit._start_mute, IntercomUnit.mute_async)
+    router.add('UNMUTE_SOUND', IntercomUnit._start_unmute, IntercomUnit.unmute_async)
+    router.add('ENABLE_AUTO_OPEN', IntercomUnit._enable_auto_open_mode, argument=Argument.DURATION,
+               default=AUTO_OPEN_MODE_DURATION_MS)
+    router.add('DISABLE_AUTO_OPEN', IntercomUnit._disable_auto_open_mode)
+    router.add('SET_MUTE_WINDOW', IntercomUnit._set_mute_window, argument=Argument.TIME_RANGE)
+    router.add('SET_TIMING_PROFILE', IntercomUnit._set_timing_profile, argument=Argument.WORD)
+    return router
+
+
+_command_router = _build_command_router()
@@ -1,9 +1,20 @@
 import time
 
 import machine
+from micropython import const
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
 
 onboard_led = machine.Pin(2, machine.Pin.OUT, value=1)
 
+ERROR_BLINK_PERIOD_MS = const(200)
+
+_error_blink_steps = 0
+_error_blink_deadline = 0
+
 
 def error_blink() -> None:
     for i in range(2):
@@ -11,3 +22,40 @@ def error_blink() -> None:
         time.sleep_ms(200)
         onboard_led.on()
         time.sleep_ms(200)
+
+
+async def error_blink_async() -> None:
+    for i in range(2):
+        onboard_led.off()
+        await asyncio.sleep(0.2)
+        onboard_led.on()
+        await asyncio.sleep(0.2)
+
+
+def start_error_blink() -> None:
+    """Начинает то же мигание, что error_blink(), без ожидания: шаги выполняет poll_error_blink()"""
+    global _error_blink_steps, _error_blink_deadline
+    onboard_led.off()
+    _error_blink_steps = 3
+    _error_blink_deadline = time.ticks_add(time.ticks_ms(), ERROR_BLINK_PERIOD_MS)
+
+
+def poll_error_blink() -> None:
+    """Переключает светодиод мигания об ошибке, если подошло время шага"""
+    global _error_blink_steps, _error_blink_deadline
+    if not _error_blink_steps or time.ticks_diff(time.ticks_ms(), _error_blink_deadline) < 0:
+        return
+    _error_blink_steps -= 1
+    onboard_led.value(0 if _error_blink_steps % 2 else 1)
+    _error_blink_deadline = time.ticks_add(time.ticks_ms(), ERROR_BLINK_PERIOD_MS)
+
+
+def milliseconds_to_error_blink_step(limit: int) -> int:
+    """Время в мс до шага мигания об ошибке, не больше limit"""
+    if not _error_blink_steps:
+        return limit
+    return min(max(time.ticks_diff(_error_blink_deadline, time.ticks_ms()), 0), limit)
+
+
+def error_indication(enabled: bool) -> None:
+    onboard_led.value(0 if enabled else 1)
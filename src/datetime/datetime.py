@@ -10,10 +10,6 @@ for dim in _DAYS_IN_MONTH[1:]:
 del dbm, dim
 
 
-def _compare(x, y) -> int:
-    return 0 if x == y else 1 if x > y else -1
-
-
 def _check_int_field(*args):
     for item in args:
         if not isinstance(item, int):
@@ -98,6 +94,90 @@ def _check_date_fields(year, month, day):
         raise ValueError(f'day must be in 1..{dim}', day)
 
 
+def _write_digits(buf, pos, value, width):
+    """Write value as width zero-padded ASCII digits into buf at pos, return the end position."""
+    end = pos + width
+    while width:
+        width -= 1
+        buf[pos + width] = 48 + value % 10
+        value //= 10
+    return end
+
+
+def _write_date(buf, pos, year, month, day):
+    """Write YYYY-MM-DD into buf at pos, return the end position."""
+    pos = _write_digits(buf, pos, year, 4)
+    buf[pos] = 45  # '-'
+    pos = _write_digits(buf, pos + 1, month, 2)
+    buf[pos] = 45
+    return _write_digits(buf, pos + 1, day, 2)
+
+
+def _write_time(buf, pos, seconds, microsecond):
+    """Write HH:MM:SS.ffffff for seconds since midnight into buf at pos, return the end position."""
+    pos = _write_digits(buf, pos, seconds // 3600, 2)
+    buf[pos] = 58  # ':'
+    pos = _write_digits(buf, pos + 1, seconds // 60 % 60, 2)
+    buf[pos] = 58
+    pos = _write_digits(buf, pos + 1, seconds % 60, 2)
+    buf[pos] = 46  # '.'
+    return _write_digits(buf, pos + 1, microsecond, 6)
+
+
+def _isoformat_bytes(text):
+    """Bytes-like ISO string; str is encoded once."""
+    return text.encode() if isinstance(text, str) else text
+
+
+def _invalid_isoformat(text):
+    return ValueError('invalid isoformat string', bytes(text))
+
+
+def _parse_digits(text, pos, width):
+    """Parse width ASCII digits of text starting at pos."""
+    value = 0
+    end = pos + width
+    while pos < end:
+        digit = text[pos] - 48
+        if not 0 <= digit <= 9:
+            raise _invalid_isoformat(text)
+        value = value * 10 + digit
+        pos += 1
+    return value
+
+
+def _parse_date(text, pos):
+    """YYYY-MM-DD at pos -> ordinal, validating the fields."""
+    if len(text) < pos + 10 or not text[pos + 4] == 45 or not text[pos + 7] == 45:
+        raise _invalid_isoformat(text)
+    year = _parse_digits(text, pos, 4)
+    month = _parse_digits(text, pos + 5, 2)
+    day = _parse_digits(text, pos + 8, 2)
+    _check_date_fields(year, month, day)
+    return _ymd2ord(year, month, day)
+
+
+def _parse_time(text, pos):
+    """HH:MM[:SS[.f...]] from pos to the end of text -> (seconds since midnight, microsecond).
+
+    The fraction may have 1 to 6 digits, as accepted by CPython.
+    """
+    size = len(text) - pos
+    if size < 5 or 5 < size < 8 or not text[pos + 2] == 58 or (size > 5 and not text[pos + 5] == 58):
+        raise _invalid_isoformat(text)
+    hour = _parse_digits(text, pos, 2)
+    minute = _parse_digits(text, pos + 3, 2)
+    second = _parse_digits(text, pos + 6, 2) if size > 5 else 0
+    microsecond = 0
+    if size > 8:
+        digits = size - 9
+        if not text[pos + 8] == 46 or not 1 <= digits <= 6:
+            raise _invalid_isoformat(text)
+        microsecond = _parse_digits(text, pos + 9, digits) * 10 ** (6 - digits)
+    _check_time_fields(hour, minute, second, microsecond)
+    return hour * 3600 + minute * 60 + second, microsecond
+
+
 def _check_time_fields(hour, minute, second, microsecond):
     _check_int_field(hour, minute, second, microsecond)
     if not 0 <= hour <= 23:
@@ -193,37 +273,49 @@ class Timedelta:
 
 
 class Time:
-    __slots__ = '_hour', '_minute', '_second', '_microsecond'
+    __slots__ = '_seconds', '_microsecond'
+
+    ISOFORMAT_SIZE = 15  # HH:MM:SS.ffffff
 
     def __new__(cls, hour: int = 0, minute: int = 0, second: int = 0, microsecond: int = 0):
         _check_time_fields(hour, minute, second, microsecond)
+        return cls._from_seconds(hour * 3600 + minute * 60 + second, microsecond)
+
+    @classmethod
+    def _from_seconds(cls, seconds, microsecond):
+        """seconds since midnight, microsecond -> time without field validation."""
         self = object.__new__(cls)
-        self._hour = hour
-        self._minute = minute
-        self._second = second
+        self._seconds = seconds
         self._microsecond = microsecond
 
         return self
 
+    @classmethod
+    def fromisoformat(cls, text):
+        """Parse HH:MM[:SS[.ffffff]] from bytes without creating substrings."""
+        seconds, microsecond = _parse_time(_isoformat_bytes(text), 0)
+        return cls._from_seconds(seconds, microsecond)
+
     def isoformat(self) -> str:
-        return "{hour:02d}:{minute:02d}:{second:02d}.{microsecond:06d}".format(
-            hour=self._hour,
-            minute=self._minute,
-            second=self._second,
-            microsecond=self._microsecond,
-        )
+        buf = bytearray(Time.ISOFORMAT_SIZE)
+        self.isoformat_into(buf)
+        return str(buf, 'ascii')
+
+    def isoformat_into(self, buf, pos: int = 0) -> int:
+        """Write HH:MM:SS.ffffff into a bytearray/memoryview at pos without allocation, return the end position."""
+        return _write_time(buf, pos, self._seconds, self._microsecond)
 
     @property
     def hour(self) -> int:
-        return self._hour
+        return self._seconds // 3600
 
     @property
     def minute(self) -> int:
-        return self._minute
+        return self._seconds // 60 % 60
 
     @property
     def second(self) -> int:
-        return self._second
+        return self._seconds % 60
 
     @property
     def microsecond(self) -> int:
@@ -233,8 +325,7 @@ class Time:
         if not isinstance(other, Time):
             raise TypeError(f"can't compare '{type(self).__name__}' to '{type(other).__name__}'")
 
-        return _compare((self._hour, self._minute, self._second, self._microsecond),
-                        (other._hour, other._minute, other._second, other._microsecond))
+        return self._seconds - other._seconds or self._microsecond - other._microsecond
 
     def __lt__(self, other):
         """x<y"""
@@ -261,45 +352,80 @@ class Time:
 
 
 class Date:
-    __slots__ = '_year', '_month', '_day'
+    __slots__ = '_ordinal', '_ymd'
+
+    ISOFORMAT_SIZE = 10  # YYYY-MM-DD
 
     def __new__(cls, year: int, month: int, day: int):
         _check_date_fields(year, month, day)
         self = object.__new__(cls)
-        self._year = year
-        self._month = month
-        self._day = day
+        self._ordinal = _ymd2ord(year, month, day)
+        self._ymd = None
 
         return self
 
     @classmethod
     def fromordinal(cls, n):
-        y, m, d = _ord2ymd(n)
-        return cls(y, m, d)
+        if not 0 < n <= _MAXORDINAL:
+            raise ValueError(f'ordinal must be in 1..{_MAXORDINAL}', n)
+        self = object.__new__(cls)
+        self._ordinal = n
+        self._ymd = None
+
+        return self
+
+    @classmethod
+    def fromisoformat(cls, text):
+        """Parse YYYY-MM-DD from bytes without creating substrings."""
+        text = _isoformat_bytes(text)
+        if not len(text) == 10:
+            raise _invalid_isoformat(text)
+        return cls.fromordinal(_parse_date(text, 0))
 
     def isoformat(self) -> str:
-        return "{year:04d}-{month:02d}-{day:02d}".format(year=self._year, month=self._month, day=self._day)
+        buf = bytearray(Date.ISOFORMAT_SIZE)
+        Date.isoformat_into(self, buf)
+        return str(buf, 'ascii')
+
+    def isoformat_into(self, buf, pos: int = 0) -> int:
+        """Write YYYY-MM-DD into a bytearray/memoryview at pos without allocation, return the end position."""
+        year, month, day = self._fields()
+        return _write_date(buf, pos, year, month, day)
 
     def toordinal(self):
-        return _ymd2ord(self._year, self._month, self._day)
+        return self._ordinal
+
+    def weekday(self) -> int:
+        """Return day of the week, where Monday == 0 ... Sunday == 6."""
+        return (self._ordinal + 6) % 7
+
+    def isoweekday(self) -> int:
+        """Return day of the week, where Monday == 1 ... Sunday == 7."""
+        return self._ordinal % 7 or 7
+
+    def _fields(self) -> tuple:
+        """(year, month, day), derived from the ordinal on first access."""
+        if self._ymd is None:
+            self._ymd = _ord2ymd(self._ordinal)
+        return self._ymd
 
     @property
     def year(self) -> int:
-        return self._year
+        return self._fields()[0]
 
     @property
     def month(self) -> int:
-        return self._month
+        return self._fields()[1]
 
     @property
     def day(self) -> int:
-        return self._day
+        return self._fields()[2]
 
     def _compare(self, other):
         if not isinstance(other, Date):
             raise TypeError(f"can't compare '{type(self).__name__}' to '{type(other).__name__}'")
 
-        return _compare((self._year, self._month, self._day), (other._year, other._month, other._day))
+        return self._ordinal - other._ordinal
 
     def __lt__(self, other):
         """x<y"""
@@ -328,7 +454,7 @@ class Date:
         """Add a date to a timedelta."""
         if not isinstance(other, Timedelta):
             return NotImplemented
-        o = self.toordinal() + other.days
+        o = self._ordinal + other.days
         if 0 < o <= _MAXORDINAL:
             return type(self).fromordinal(o)
         raise OverflowError("result out of range")
@@ -340,41 +466,69 @@ class Date:
         if isinstance(other, Timedelta):
             return self + Timedelta(-other.days)
         if isinstance(other, Date):
-            days1 = self.toordinal()
-            days2 = other.toordinal()
-            return Timedelta(days1 - days2)
+            return Timedelta(self._ordinal - other._ordinal)
         return NotImplemented
 
 
 class Datetime(Date):
     __slots__ = Date.__slots__ + Time.__slots__
 
+    ISOFORMAT_SIZE = 26  # YYYY-MM-DDTHH:MM:SS.ffffff
+
     def __new__(cls, year: int, month: int, day: int, hour: int = 0, minute: int = 0, second: int = 0,
                 microsecond: int = 0):
         _check_date_fields(year, month, day)
         _check_time_fields(hour, minute, second, microsecond)
         self = object.__new__(cls)
-        self._year = year
-        self._month = month
-        self._day = day
-        self._hour = hour
-        self._minute = minute
-        self._second = second
+        self._ordinal = _ymd2ord(year, month, day)
+        self._ymd = None
+        self._seconds = hour * 3600 + minute * 60 + second
+        self._microsecond = microsecond
+
+        return self
+
+    @classmethod
+    def _from_ordinal_seconds(cls, ordinal, seconds, microsecond):
+        """ordinal, seconds since midnight, microsecond -> datetime without field validation."""
+        if not 0 < ordinal <= _MAXORDINAL:
+            raise OverflowError("result out of range")
+        self = object.__new__(cls)
+        self._ordinal = ordinal
+        self._ymd = None
+        self._seconds = seconds
         self._microsecond = microsecond
 
         return self
 
+    @classmethod
+    def fromordinal(cls, n):
+        if not 0 < n <= _MAXORDINAL:
+            raise ValueError(f'ordinal must be in 1..{_MAXORDINAL}', n)
+        return cls._from_ordinal_seconds(n, 0, 0)
+
+    @classmethod
+    def fromisoformat(cls, text):
+        """Parse YYYY-MM-DD[*HH:MM[:SS[.ffffff]]] from bytes without creating substrings.
+
+        Any single character separates the date and the time, as in CPython.
+        """
+        text = _isoformat_bytes(text)
+        ordinal = _parse_date(text, 0)
+        if len(text) == 10:
+            return cls._from_ordinal_seconds(ordinal, 0, 0)
+        seconds, microsecond = _parse_time(text, 11)
+        return cls._from_ordinal_seconds(ordinal, seconds, microsecond)
+
     def isoformat(self, sep='T') -> str:
-        return "{year:04d}-{month:02d}-{day:02d}{sep}{hour:02d}:{minute:02d}:{second:02d}.{microsecond:06d}".format(
-            year=self._year,
-            month=self._month,
-            day=self._day,
-            sep=sep,
-            hour=self._hour,
-            minute=self._minute,
-            second=self._second,
-            microsecond=self._microsecond
-        )
+        buf = bytearray(Datetime.ISOFORMAT_SIZE)
+        self.isoformat_into(buf, 0, sep)
+        return str(buf, 'ascii')
+
+    def isoformat_into(self, buf, pos: int = 0, sep='T') -> int:
+        """Write YYYY-MM-DD<sep>HH:MM:SS.ffffff into buf at pos without allocation, return the end position."""
+        pos = Date.isoformat_into(self, buf, pos)
+        buf[pos] = ord(sep)
+        return _write_time(buf, pos + 1, self._seconds, self._microsecond)
 
     @classmethod
     def from_internal_rtc_format(cls, datetime: tuple):
@@ -386,25 +540,25 @@ class Datetime(Date):
             raise TypeError("date argument must be a date instance")
         if not isinstance(time, Time):
             raise TypeError("time argument must be a time instance")
-        return cls(date.year, date.month, date.day, time.hour, time.minute, time.second, time.microsecond)
+        return cls._from_ordinal_seconds(date._ordinal, time._seconds, time._microsecond)
 
     def date(self) -> Date:
-        return Date(self._year, self._month, self._day)
+        return Date.fromordinal(self._ordinal)
 
     def time(self) -> Time:
-        return Time(self._hour, self._minute, self._second, self._microsecond)
+        return Time._from_seconds(self._seconds, self._microsecond)
 
     @property
     def hour(self) -> int:
-        return self._hour
+        return self._seconds // 3600
 
     @property
     def minute(self) -> int:
-        return self._minute
+        return self._seconds // 60 % 60
 
     @property
     def second(self) -> int:
-        return self._second
+        return self._seconds % 60
 
     @property
     def microsecond(self) -> int:
@@ -414,12 +568,9 @@ class Datetime(Date):
         if not isinstance(other, Datetime):
             raise TypeError(f"can't compare '{type(self).__name__}' to '{type(other).__name__}'")
 
-        return _compare((self._year, self._month, self._day,
-                         self._hour, self._minute, self._second,
-                         self._microsecond),
-                        (other._year, other._month, other._day,
-                         other._hour, other._minute, other._second,
-                         other._microsecond))
+        return (self._ordinal - other._ordinal
+                or self._seconds - other._seconds
+                or self._microsecond - other._microsecond)
 
     def __str__(self):
         return self.isoformat(sep=' ')
@@ -428,17 +579,16 @@ class Datetime(Date):
         """Add a datetime and a timedelta."""
         if not isinstance(other, Timedelta):
             return NotImplemented
-        delta = Timedelta(self.toordinal(),
-                          hours=self._hour,
-                          minutes=self._minute,
-                          seconds=self._second,
-                          microseconds=self._microsecond)
-        delta += other
-        hour, rem = divmod(delta.seconds, 3600)
-        minute, second = divmod(rem, 60)
-        if 0 < delta.days <= _MAXORDINAL:
-            return type(self).combine(Date.fromordinal(delta.days), Time(hour, minute, second, delta.microseconds))
-        raise OverflowError("result out of range")
+        microsecond = self._microsecond + other.microseconds
+        seconds = self._seconds + other.seconds
+        if microsecond >= 1000000:
+            microsecond -= 1000000
+            seconds += 1
+        days = self._ordinal + other.days
+        if seconds >= 86400:
+            seconds -= 86400
+            days += 1
+        return type(self)._from_ordinal_seconds(days, seconds, microsecond)
 
     __radd__ = __add__
 
@@ -449,9 +599,6 @@ class Datetime(Date):
                 return self + -other
             return NotImplemented
 
-        days1 = self.toordinal()
-        days2 = other.toordinal()
-        secs1 = self._second + self._minute * 60 + self._hour * 3600
-        secs2 = other._second + other._minute * 60 + other._hour * 3600
-
-        return Timedelta(days1 - days2, secs1 - secs2, self._microsecond - other._microsecond)
+        return Timedelta(self._ordinal - other._ordinal,
+                         self._seconds - other._seconds,
+                         self._microsecond - other._microsecond)
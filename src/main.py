@@ -1,21 +1,78 @@
 import machine
 import micropython
 import network
-import ntptime
-from datetime import Datetime
 from umqtt.simple import MQTTClient
 
 import settings
-from cyfral_controller.controller import CyfralController
-from cyfral_controller.electronic_components.clock import DS1307
+from cyfral_controller.boot import BootPipeline
+from cyfral_controller.controller import IntercomSupervisor
+from cyfral_controller.electronic_components.clock import DS1307, CachedClock
+from cyfral_controller.schedule import SoundSchedule
+from cyfral_controller.timekeeping import RESYNC_MAX_PERIOD_MS, RESYNC_MIN_PERIOD_MS, TimeDiscipline
+from cyfral_controller.timing import DEFAULT_TIMING_PROFILE, timing_profiles
+from cyfral_controller.unit import IntercomUnit
 
 micropython.alloc_emergency_exception_buf(100)
 
-cyfral_controller = CyfralController(
+real_time_clock = CachedClock(DS1307(machine.I2C(scl=machine.Pin(5), sda=machine.Pin(4))))
+
+time_discipline = TimeDiscipline(
+    real_time_clock,
+    min_period_ms=getattr(settings, 'NTP_RESYNC_MIN_PERIOD_MS', RESYNC_MIN_PERIOD_MS),
+    max_period_ms=getattr(settings, 'NTP_RESYNC_MAX_PERIOD_MS', RESYNC_MAX_PERIOD_MS)
+)
+
+boot = BootPipeline(
+    sta_if=network.WLAN(network.STA_IF),
+    ap_if=network.WLAN(network.AP_IF),
+    ssid=settings.WLAN_SSID,
+    password=settings.WLAN_PASSWORD,
+    real_time_clock=real_time_clock,
+    time_discipline=time_discipline,
+    ifconfig=None if settings.WLAN_DHCP else (
+        settings.WLAN_IP, settings.WLAN_MASK, settings.WLAN_GATE, settings.WLAN_DNS
+    )
+)
+
+sound_schedule = SoundSchedule.from_string(getattr(settings, 'SOUND_SCHEDULE', '* 03:00-18:00'))
+mqtt_sequence_state_topic = getattr(settings, 'MQTT_SEQUENCE_STATE_TOPIC', None)
+mqtt_sound_schedule_topic = getattr(settings, 'MQTT_SOUND_SCHEDULE_TOPIC', None)
+profiles = timing_profiles(getattr(settings, 'TIMING_PROFILES', None))
+
+
+def create_unit(sound_mode_relay_pin: int, handset_relay_pin: int, incoming_call_optocoupler_pin: int,
+                door_opening_optocoupler_pin: int, topic_prefix: str = '',
+                ring_cadence: dict = getattr(settings, 'RING_CADENCE', None),
+                timing_profile: str = getattr(settings, 'TIMING_PROFILE', DEFAULT_TIMING_PROFILE)) -> IntercomUnit:
+    """Создаёт блок домофона с топиками из settings, перед которыми добавлен topic_prefix"""
+    return IntercomUnit(
+        sound_mode_relay_pin=sound_mode_relay_pin,
+        handset_relay_pin=handset_relay_pin,
+        incoming_call_optocoupler_pin=incoming_call_optocoupler_pin,
+        door_opening_optocoupler_pin=door_opening_optocoupler_pin,
+        mqtt_incoming_call_state_topic=topic_prefix + settings.MQTT_INCOMING_CALL_STATE_TOPIC,
+        mqtt_sound_mode_state_topic=topic_prefix + settings.MQTT_SOUND_MODE_STATE_TOPIC,
+        mqtt_auto_open_mode_topic=topic_prefix + settings.MQTT_AUTO_OPEN_MODE_TOPIC,
+        mqtt_control_topic=topic_prefix + settings.MQTT_CONTROL_TOPIC,
+        mqtt_sequence_state_topic=mqtt_sequence_state_topic and topic_prefix + mqtt_sequence_state_topic,
+        sound_schedule=sound_schedule,
+        mqtt_sound_schedule_topic=mqtt_sound_schedule_topic and topic_prefix + mqtt_sound_schedule_topic,
+        ring_cadence=ring_cadence,
+        timing_profile=timing_profile,
+        timing_profiles=profiles
+    )
+
+
+# INTERCOM_UNITS - параметры create_unit для каждого блока; без него один блок с выводами и топиками из settings
+units = [create_unit(**unit) for unit in getattr(settings, 'INTERCOM_UNITS', ())] or [create_unit(
     sound_mode_relay_pin=settings.SOUND_MODE_RELAY_PIN,
     handset_relay_pin=settings.HANDSET_RELAY_PIN,
     incoming_call_optocoupler_pin=settings.INCOMING_CALL_OPTOCOUPLER_PIN,
-    door_opening_optocoupler_pin=settings.DOOR_OPENING_OPTOCOUPLER_PIN,
+    door_opening_optocoupler_pin=settings.DOOR_OPENING_OPTOCOUPLER_PIN
+)]
+
+cyfral_controller = IntercomSupervisor(
+    units=units,
     mqtt_client=MQTTClient(
         client_id=settings.MQTT_CLIENT_ID,
         server=settings.MQTT_HOST,
@@ -24,62 +81,23 @@ cyfral_controller = CyfralController(
         password=settings.MQTT_PASSWORD,
         keepalive=settings.MQTT_KEEPALIVE
     ),
-    mqtt_incoming_call_state_topic=settings.MQTT_INCOMING_CALL_STATE_TOPIC,
-    mqtt_sound_mode_state_topic=settings.MQTT_SOUND_MODE_STATE_TOPIC,
-    mqtt_auto_open_mode_topic=settings.MQTT_AUTO_OPEN_MODE_TOPIC,
-    mqtt_control_topic=settings.MQTT_CONTROL_TOPIC,
-    real_time_clock=DS1307(machine.I2C(scl=machine.Pin(5), sda=machine.Pin(4)))
+    real_time_clock=real_time_clock,
+    mqtt_metrics_topic=getattr(settings, 'MQTT_METRICS_TOPIC', None),
+    metrics_period_ms=getattr(settings, 'METRICS_PERIOD_MS', 60000),
+    mqtt_event_journal_topic=getattr(settings, 'MQTT_EVENT_JOURNAL_TOPIC', None),
+    boot=boot,
+    time_discipline=time_discipline,
+    idle_mode=getattr(settings, 'IDLE_MODE', None)
 )
 
 
-def connection_to_wlan_network():
-    ap_if = network.WLAN(network.AP_IF)
-    print('Deactivate AP interface')
-    ap_if.active(False)
-
-    sta_if = network.WLAN(network.STA_IF)
-    if not sta_if.isconnected():
-        print('Activate STA interface...')
-        sta_if.active(True)
-
-        if not settings.WLAN_DHCP:
-            sta_if.ifconfig((settings.WLAN_IP, settings.WLAN_MASK, settings.WLAN_GATE, settings.WLAN_DNS))
-
-        print('Connecting to wlan network...')
-        sta_if.connect(settings.WLAN_SSID, settings.WLAN_PASSWORD)
-
-        while not sta_if.isconnected():
-            machine.idle()
-
-        print(f'Connection successful {sta_if.ifconfig()}')
-        return
-
-    print(f'Connection already established {sta_if.ifconfig()}')
-
-
-def datetime_synchronization():
-    print('Synchronization of datetime')
-    try:
-        print('Set datetime to internal RTC from NTP pool')
-        ntptime.settime()
-
-        print('Get internal RTC datetime')
-        internal_rtc = machine.RTC()
-        datetime = internal_rtc.datetime()
-
-        print('Set datetime to controller RTC')
-        datetime = Datetime.from_internal_rtc_format(datetime)
-        cyfral_controller._rtc.set_datetime(datetime)
-    except OSError as ex:
-        print(f'Failed to synchronization datetime ({ex})')
-    else:
-        print('Synchronization successful')
-
-
 if __name__ == '__main__':
     micropython.mem_info()
-    connection_to_wlan_network()
-    datetime_synchronization()
 
+    # WLAN, NTP и MQTT поднимаются в фоне, отслеживание вызова начинается сразу
     print('Starting cyfral controller')
-    cyfral_controller.run()
+    if getattr(settings, 'ASYNC_RUNTIME', False):
+        import uasyncio
+        uasyncio.run(cyfral_controller.run_async())
+    else:
+        cyfral_controller.run()